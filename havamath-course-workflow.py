@@ -2,24 +2,165 @@ import json
 import re
 import argparse
 import os
-from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import threading
+from urllib.parse import urlparse, urljoin
+from concurrent.futures import ThreadPoolExecutor
 import time
 
+from site_profile import SiteProfile, load_site_profile
+
+# Heavy dependencies are imported on first use so that startup stays fast
+requests = BeautifulSoup = None
+webdriver = Options = Service = By = WebDriverWait = EC = None
+
+
+def _require_requests():
+    """Import requests and BeautifulSoup on first use"""
+    global requests, BeautifulSoup
+    if requests is None:
+        from bs4 import BeautifulSoup as _BeautifulSoup
+        import requests as _requests
+        BeautifulSoup = _BeautifulSoup
+        requests = _requests
+
+
+def _require_selenium():
+    """Import Selenium on first use"""
+    global webdriver, Options, Service, By, WebDriverWait, EC
+    if webdriver is None:
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.chrome.options import Options as _Options
+        from selenium.webdriver.chrome.service import Service as _Service
+        from selenium.webdriver.common.by import By as _By
+        from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+        from selenium.webdriver.support import expected_conditions as _EC
+        Options, Service, By = _Options, _Service, _By
+        WebDriverWait, EC = _WebDriverWait, _EC
+        webdriver = _webdriver
+
+
+class HLSResolver:
+    """Fetch HLS master playlists concurrently and summarize the selected stream
+
+    Requests go through a pooled session (with the scraper's cookies) and results
+    are cached per playlist URL for the rest of the run.
+    """
+
+    ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+    def __init__(self, session, max_workers=8, timeout=15, max_height=None):
+        self.session = session
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_height = max_height
+        self.cache = {}
+        self._lock = threading.Lock()
+
+        # Allow one pooled connection per worker
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _get(self, url, referer=None):
+        headers = {'Referer': referer} if referer else None
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def parse_master(self, text, base_url):
+        """Return the variants listed in a master playlist"""
+        variants = []
+        attributes = None
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith('#EXT-X-STREAM-INF:'):
+                attributes = dict(
+                    (key, value.strip('"'))
+                    for key, value in self.ATTRIBUTE_PATTERN.findall(line.split(':', 1)[1])
+                )
+            elif attributes is not None and line and not line.startswith('#'):
+                resolution = attributes.get('RESOLUTION', '')
+                width, _, height = resolution.partition('x')
+                variants.append({
+                    "uri": urljoin(base_url, line),
+                    "bandwidth": int(attributes.get('BANDWIDTH', 0) or 0),
+                    "resolution": resolution or None,
+                    "height": int(height) if height.isdigit() else None,
+                    "codecs": attributes.get('CODECS'),
+                })
+                attributes = None
+        return variants
+
+    def parse_media(self, text):
+        """Return (segment count, total duration in seconds, ended) for a media playlist"""
+        durations = [float(match) for match in re.findall(r'#EXTINF:([\d.]+)', text)]
+        return len(durations), round(sum(durations), 3), '#EXT-X-ENDLIST' in text
+
+    def select_variant(self, variants):
+        """Pick the highest bandwidth variant, limited to max_height when set"""
+        candidates = variants
+        if self.max_height:
+            candidates = [v for v in variants if v['height'] is None or v['height'] <= self.max_height] or variants
+        return max(candidates, key=lambda v: v['bandwidth'])
+
+    def resolve_one(self, url, referer=None):
+        """Resolve one playlist URL (cached)"""
+        with self._lock:
+            if url in self.cache:
+                return self.cache[url]
+
+        try:
+            text = self._get(url, referer)
+            variants = self.parse_master(text, url)
+            if variants:
+                selected = self.select_variant(variants)
+                media_text = self._get(selected['uri'], referer)
+            else:
+                # Not a master playlist: the URL is already a media playlist
+                selected = None
+                media_text = text
+
+            segments, duration, ended = self.parse_media(media_text)
+            info = {
+                "status": "ok",
+                "variants": variants,
+                "selected": selected,
+                "segments": segments,
+                "duration": duration,
+                "live": not ended,
+            }
+        except Exception as e:
+            info = {"status": "error", "error": str(e)}
+
+        with self._lock:
+            self.cache[url] = info
+        return info
+
+    def resolve(self, items):
+        """Resolve (playlist URL, referer) pairs concurrently; returns {url: info}"""
+        unique = {}
+        for url, referer in items:
+            unique.setdefault(url, referer)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {url: executor.submit(self.resolve_one, url, referer) for url, referer in unique.items()}
+            return {url: future.result() for url, future in futures.items()}
+
 
 class HavamathCourseScraper:
-    def __init__(self, cookies_file=None, headless=True):
+    def __init__(self, cookies_file=None, headless=True, resolve_hls=False, hls_workers=8, hls_max_height=None,
+                 site_profile=None):
         """Initialize the course scraper with optional cookies file"""
         self.cookies_file = cookies_file
         self.headless = headless
-        self.session = requests.Session()
+        self.site = site_profile if isinstance(site_profile, SiteProfile) else load_site_profile(site_profile)
+        self._session = None
+
+        # Optional stage that fetches and summarizes HLS playlists after extraction
+        self.resolve_hls = resolve_hls
+        self.hls_workers = hls_workers
+        self.hls_max_height = hls_max_height
+        self._hls_resolver = None
 
         # Set up headers for requests
         self.headers = {
@@ -27,16 +168,25 @@ class HavamathCourseScraper:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         }
-        self.session.headers.update(self.headers)
 
         # Initialize the driver only when needed
         self.driver = None
 
+    @property
+    def session(self):
+        """Requests session, created on first use"""
+        if self._session is None:
+            _require_requests()
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        return self._session
+
     def init_driver(self):
         """Initialize the Selenium WebDriver"""
         if self.driver is not None:
             return
 
+        _require_selenium()
         chrome_options = Options()
         if self.headless:
             chrome_options.add_argument("--headless")
@@ -85,8 +235,7 @@ class HavamathCourseScraper:
         self.init_driver()
 
         # Visit the domain first
-        domain = 'havamath.vn'
-        self.driver.get(f"https://{domain}")
+        self.driver.get(self.site.base_url)
         time.sleep(2)  # Allow the page to load
 
         try:
@@ -151,21 +300,15 @@ class HavamathCourseScraper:
             lectures = []
 
             # Method 1: Try to find a structured list of lectures
-            lecture_links = soup.select('a[href*="/learn/"]')
+            lecture_links = soup.select(self.site.lecture_selector)
 
             if lecture_links:
                 position = 1
                 for link in lecture_links:
                     href = link.get('href', '')
-                    if '/learn/' in href:
+                    if self.site.is_lecture_link(href):
                         # Ensure full URL
-                        if not href.startswith('http'):
-                            if href.startswith('/'):
-                                lecture_url = f"https://havamath.vn{href}"
-                            else:
-                                lecture_url = f"https://havamath.vn/{href}"
-                        else:
-                            lecture_url = href
+                        lecture_url = self.site.absolute_url(href)
 
                         # Get title from the link text or nearby elements
                         title = link.get_text(strip=True)
@@ -195,18 +338,18 @@ class HavamathCourseScraper:
                 # Wait for potential lecture elements to be visible
                 try:
                     WebDriverWait(self.driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/learn/']"))
+                        EC.presence_of_element_located((By.CSS_SELECTOR, self.site.lecture_selector))
                     )
                 except:
                     print("Timeout waiting for lecture elements")
 
                 # Try to find lecture links again
-                lecture_elements = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/learn/']")
+                lecture_elements = self.driver.find_elements(By.CSS_SELECTOR, self.site.lecture_selector)
 
                 position = 1
                 for elem in lecture_elements:
                     href = elem.get_attribute('href')
-                    if href and '/learn/' in href:
+                    if self.site.is_lecture_link(href):
                         title = elem.text.strip()
                         if not title:
                             # Try to find title in child elements
@@ -364,6 +507,41 @@ class HavamathCourseScraper:
                 # Pause to avoid overloading the server
                 time.sleep(2)
 
+        if self.resolve_hls:
+            self.resolve_hls_streams(lecture_data)
+
+        return lecture_data
+
+    @property
+    def hls_resolver(self):
+        """HLS resolver sharing the cookie session, created on first use"""
+        if self._hls_resolver is None:
+            if self.cookies_file and os.path.exists(self.cookies_file):
+                self.load_cookies_to_requests()
+            self._hls_resolver = HLSResolver(self.session, max_workers=self.hls_workers,
+                                             max_height=self.hls_max_height)
+        return self._hls_resolver
+
+    def resolve_hls_streams(self, lecture_data):
+        """Add stream metadata for every lecture whose video URL is an HLS playlist"""
+        lectures = [lecture for lecture in lecture_data.get('data', []) if '.m3u8' in (lecture.get('Video URL') or '')]
+        if not lectures:
+            return lecture_data
+
+        print(f"Resolving {len(lectures)} HLS playlists...")
+        results = self.hls_resolver.resolve(
+            (lecture['Video URL'], lecture.get('Lecture Link')) for lecture in lectures
+        )
+
+        failed = 0
+        for lecture in lectures:
+            info = results[lecture['Video URL']]
+            lecture['Stream Info'] = info
+            if info['status'] != 'ok':
+                failed += 1
+                print(f"  Could not resolve {lecture['Video URL']}: {info['error']}")
+
+        print(f"Resolved {len(lectures) - failed}/{len(lectures)} HLS playlists")
         return lecture_data
 
     def process_full_workflow(self, course_url, output_file=None):
@@ -427,12 +605,22 @@ def main():
     parser.add_argument('--cookies', help='Path to cookies JSON file')
     parser.add_argument('--output', help='Output file path')
     parser.add_argument('--no-headless', action='store_true', help='Run browser in non-headless mode')
+    parser.add_argument('--resolve-hls', action='store_true',
+                        help='Fetch .m3u8 playlists and add variant, segment and duration info')
+    parser.add_argument('--hls-workers', type=int, default=8, help='Number of concurrent playlist requests')
+    parser.add_argument('--hls-max-height', type=int, help='Highest resolution (height) to select, e.g. 720')
+    parser.add_argument('--site-profile', metavar='NAME|FILE',
+                        help='Site profile (selectors, video ID patterns) by name in site_profiles/ or a JSON file')
 
     args = parser.parse_args()
 
     scraper = HavamathCourseScraper(
         cookies_file=args.cookies,
-        headless=not args.no_headless
+        headless=not args.no_headless,
+        resolve_hls=args.resolve_hls,
+        hls_workers=args.hls_workers,
+        hls_max_height=args.hls_max_height,
+        site_profile=args.site_profile
     )
 
     try:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Đo độ chính xác và tốc độ của các heuristic trích xuất trên bộ trang mẫu
+------------------------------------------
+Mô tả: Chạy từng phương pháp tìm ID video và phân chương trên các trang trong
+corpus/ (khai báo ở corpus/manifest.json), hoàn toàn bằng Python: trang được phát
+lại qua ReplayDriver, không cần mạng hay Chrome. Báo cáo precision, recall và thời
+gian xử lý mỗi trang của từng phương pháp, để kiểm tra các thay đổi về tốc độ
+không làm giảm độ chính xác.
+
+Cách dùng:
+    python havamath-heuristics-benchmark.py [--corpus DIR] [--repeat N] [--json FILE] [--show-misses]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urldefrag
+
+from bs4 import BeautifulSoup
+
+from havamath_extractor import HavamathExtractor, ReplayDriver
+from site_profile import SiteProfile, VIDEO_METHODS
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+UNCLASSIFIED = "Chưa phân loại"
+
+
+class CorpusStore:
+    """Kho trang chỉ đọc cho ReplayDriver: cùng một HTML cho cả loại 'raw' và 'dom'"""
+
+    def __init__(self):
+        self.pages = {}
+
+    def add(self, url, html):
+        self.pages[urldefrag(url)[0]] = html
+
+    def load(self, url, kind):
+        return self.pages.get(urldefrag(url)[0])
+
+
+class MethodResult:
+    """Kết quả của một phương pháp: số đúng/số dự đoán/số cần tìm và thời gian từng trang"""
+
+    def __init__(self, name):
+        self.name = name
+        self.correct = 0
+        self.predicted = 0
+        self.relevant = 0
+        self.timings = []
+        self.misses = []
+
+    def add(self, case, expected, predicted, seconds):
+        """Ghi nhận một giá trị: None là không dự đoán / không có giá trị đúng"""
+        self.relevant += expected is not None
+        self.predicted += predicted is not None
+        if predicted is not None and predicted == expected:
+            self.correct += 1
+        elif predicted != expected:
+            self.misses.append({"case": case, "expected": expected, "predicted": predicted})
+        if seconds is not None:
+            self.timings.append(seconds)
+
+    @property
+    def precision(self):
+        return self.correct / self.predicted if self.predicted else 1.0
+
+    @property
+    def recall(self):
+        return self.correct / self.relevant if self.relevant else 1.0
+
+    def to_dict(self):
+        return {
+            "precision": round(self.precision, 4),
+            "recall": round(self.recall, 4),
+            "correct": self.correct,
+            "predicted": self.predicted,
+            "relevant": self.relevant,
+            "mean_ms": round(1000 * sum(self.timings) / len(self.timings), 3) if self.timings else None,
+            "max_ms": round(1000 * max(self.timings), 3) if self.timings else None,
+            "misses": self.misses,
+        }
+
+
+def timed(func, repeat):
+    """Gọi func repeat lần, trả về (kết quả lần cuối, thời gian nhỏ nhất của một lần)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def video_id_of(url):
+    """ID video từ URL dạng https://youtu.be/<id> mà trình trích xuất trả về"""
+    return url.rsplit('/', 1)[-1] if url else None
+
+
+class HeuristicsBenchmark:
+    """Chạy các phương pháp của HavamathExtractor trên bộ trang mẫu"""
+
+    def __init__(self, corpus_dir, repeat=20, site_profile=None):
+        self.corpus_dir = corpus_dir
+        self.repeat = repeat
+        with open(os.path.join(corpus_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        self.store = CorpusStore()
+        self._replay_dir = tempfile.TemporaryDirectory()
+        self.extractor = HavamathExtractor(verbose=False, replay_dir=self._replay_dir.name, video_hook=False,
+                                           auth_check=False, max_workers=1, site_profile=site_profile)
+        self.extractor.page_store = self.store
+
+        with open(self.extractor.site.source, 'r', encoding='utf-8') as f:
+            self._site_config = json.load(f)
+
+    def _read(self, relative_path):
+        with open(os.path.join(self.corpus_dir, relative_path), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _single_method_profile(self, method):
+        """Hồ sơ trang chỉ bật một phương pháp tìm video"""
+        config = json.loads(json.dumps(self._site_config))
+        config['video']['methods'] = [method]
+        return SiteProfile(config, self.extractor.site.source)
+
+    def run_video(self):
+        """Tìm ID video: cả chuỗi extract_youtube_url, từng phương pháp quét DOM và _extract_youtube_id"""
+        extractor = self.extractor
+        pages = []
+        for case in self.manifest.get('video_pages', []):
+            self.store.add(case['url'], self._read(case['file']))
+            pages.append(case)
+
+        results = []
+        full = MethodResult('extract_youtube_url')
+        for case in pages:
+            video_url, seconds = timed(lambda: extractor.extract_youtube_url(case['url']), self.repeat)
+            full.add(case['file'], case['expected'], video_id_of(video_url), seconds)
+        results.append(full)
+
+        # JavaScript không chạy được khi phát lại nên không có trong bảng
+        site = extractor.site
+        for method in VIDEO_METHODS:
+            if method == 'javascript':
+                continue
+            result = MethodResult(f"_scan_youtube_url[{method}]")
+            extractor.site = self._single_method_profile(method)
+            try:
+                for case in pages:
+                    driver = ReplayDriver(self.store)
+                    driver.get(case['url'])
+                    video_url, seconds = timed(lambda: extractor._scan_youtube_url(driver), self.repeat)
+                    result.add(case['file'], case['expected'], video_id_of(video_url), seconds)
+            finally:
+                extractor.site = site
+            results.append(result)
+
+        result = MethodResult('_extract_youtube_id')
+        for case in self.manifest.get('video_urls', []):
+            video_id, seconds = timed(lambda: extractor._extract_youtube_id(case['url']), self.repeat)
+            result.add(case['url'], case['expected'], video_id, seconds)
+        results.append(result)
+        return results
+
+    def run_chapters(self):
+        """Phân chương: từng phương pháp HTML tĩnh, _classify_lectures_by_title và cả chuỗi _extract_chapters"""
+        extractor = self.extractor
+        methods = {
+            '_static_lecture_links': None,
+            '_chapters_by_section': lambda soup, links: extractor._chapters_by_section(links),
+            '_chapters_by_position': lambda soup, links: extractor._chapters_by_position(soup, links),
+            '_chapters_by_title': lambda soup, links: extractor._chapters_by_title(links),
+            '_classify_lectures_by_title': self._classify_by_title,
+            '_extract_chapters': None,
+        }
+        results = {name: MethodResult(name) for name in methods}
+
+        for case in self.manifest.get('chapter_pages', []):
+            html = self._read(case['file'])
+            course_url = case['course_url']
+            self.store.add(course_url, html)
+            expected = case['expected']
+
+            # Phân tích HTML và tìm liên kết bài giảng, dùng chung cho các phương pháp phía sau
+            (soup, links), seconds = timed(lambda: self._parse_links(html, course_url), self.repeat)
+            found = {title for _, title, _ in links}
+            self._score(results['_static_lecture_links'], case['file'],
+                        {title: title if title in found else None for title in expected},
+                        {title: title for title in expected}, seconds)
+
+            for name, method in methods.items():
+                if method is None:
+                    continue
+                lectures, seconds = timed(lambda: method(soup, links), self.repeat)
+                self._score(results[name], case['file'], self._chapters_by_title_map(lectures), expected, seconds)
+
+            lectures, seconds = timed(lambda: self._extract_chapters_fresh(course_url), self.repeat)
+            self._score(results['_extract_chapters'], case['file'], self._chapters_by_title_map(lectures),
+                        expected, seconds)
+
+        return list(results.values())
+
+    def _extract_chapters_fresh(self, course_url):
+        """_extract_chapters như ở đầu một lần chạy: bỏ trang khóa học đã phân tích ở lần lặp trước"""
+        self.extractor._drop_course_page(course_url)
+        return self.extractor._extract_chapters(course_url)
+
+    def _parse_links(self, html, course_url):
+        soup = BeautifulSoup(html, 'html.parser')
+        return soup, self.extractor._static_lecture_links(soup, course_url)
+
+    def _classify_by_title(self, soup, links):
+        records = [{"Lecture Title": title, "Lecture Link": url} for _, title, url in links]
+        self.extractor._classify_lectures_by_title(records)
+        return [{"title": record["Lecture Title"], "chapter": record["Chapter"]} for record in records]
+
+    @staticmethod
+    def _chapters_by_title_map(lectures):
+        """Tiêu đề bài giảng -> chương; chương rỗng hoặc "Chưa phân loại" coi như không dự đoán"""
+        chapters = {}
+        for lecture in lectures or []:
+            chapter = lecture.get('chapter')
+            chapters[lecture['title']] = chapter if chapter and chapter != UNCLASSIFIED else None
+        return chapters
+
+    @staticmethod
+    def _score(result, case, predicted, expected, seconds):
+        """Chấm từng bài giảng của trang; thời gian tính một lần cho cả trang"""
+        for title, chapter in expected.items():
+            result.add(f"{case}: {title}", chapter, predicted.get(title), None)
+        result.timings.append(seconds)
+
+    def close(self):
+        self.extractor.close()
+        self._replay_dir.cleanup()
+
+
+def print_table(title, results, show_misses=False):
+    print(f"\n{title}")
+    print(f"{'Phương pháp':<36} {'Precision':>9} {'Recall':>8} {'Đúng':>9} {'TB/trang (ms)':>14} {'Max (ms)':>9}")
+    for result in results:
+        data = result.to_dict()
+        mean_ms = f"{data['mean_ms']:.3f}" if data['mean_ms'] is not None else '-'
+        max_ms = f"{data['max_ms']:.3f}" if data['max_ms'] is not None else '-'
+        print(f"{result.name:<36} {data['precision']:>9.2f} {data['recall']:>8.2f} "
+              f"{result.correct:>4}/{result.relevant:<4} {mean_ms:>14} {max_ms:>9}")
+        if show_misses:
+            for miss in result.misses:
+                print(f"    - {miss['case']}: cần {miss['expected']!r}, nhận {miss['predicted']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Đo độ chính xác và tốc độ các heuristic trích xuất trên bộ trang mẫu')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Thư mục bộ trang mẫu (có manifest.json)')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Số lần chạy mỗi phương pháp trên mỗi trang; thời gian lấy lần nhanh nhất')
+    parser.add_argument('--site-profile', metavar='NAME|FILE', help='Hồ sơ trang dùng để chạy (mặc định: havamath)')
+    parser.add_argument('--json', metavar='FILE', help='Ghi kết quả chi tiết ra file JSON để so sánh giữa các lần chạy')
+    parser.add_argument('--show-misses', action='store_true', help='Liệt kê các trường hợp sai')
+    args = parser.parse_args(argv)
+
+    benchmark = HeuristicsBenchmark(args.corpus, max(1, args.repeat), args.site_profile)
+    try:
+        video_results = benchmark.run_video()
+        chapter_results = benchmark.run_chapters()
+    finally:
+        benchmark.close()
+
+    print_table("ID video", video_results, args.show_misses)
+    print_table("Phân chương (theo từng bài giảng)", chapter_results, args.show_misses)
+
+    if args.json:
+        report = {
+            "corpus": os.path.abspath(args.corpus),
+            "repeat": args.repeat,
+            "video": {result.name: result.to_dict() for result in video_results},
+            "chapters": {result.name: result.to_dict() for result in chapter_results},
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nĐã ghi kết quả vào {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
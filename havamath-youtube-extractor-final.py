@@ -12,39 +12,1353 @@ Mô tả: Trích xuất URL YouTube và thông tin chương từ các bài giả
 import json
 import re
 import os
+import sys
 import time
 import argparse
+import glob
+import gzip
+import hashlib
+import importlib.util
+import queue
+import shutil
+import signal
+import sqlite3
+import subprocess
+import tempfile
+import threading
 import traceback
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
 from datetime import datetime
-from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, urljoin, urldefrag
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from site_profile import SiteProfile, SiteProfileError, load_site_profile
 
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
+# Các thư viện nặng (selenium, webdriver_manager, bs4, requests, psutil) chỉ được import
+# khi thực sự cần, để các lệnh xử lý JSON ngoại tuyến khởi động trong vài chục ms
+WEBDRIVER_MANAGER_AVAILABLE = importlib.util.find_spec('webdriver_manager') is not None
+BS4_AVAILABLE = importlib.util.find_spec('bs4') is not None and importlib.util.find_spec('requests') is not None
+PSUTIL_AVAILABLE = importlib.util.find_spec('psutil') is not None
 
-    WEBDRIVER_MANAGER_AVAILABLE = True
-except ImportError:
-    WEBDRIVER_MANAGER_AVAILABLE = False
+webdriver = Options = Service = By = WebDriverWait = EC = NoSuchElementException = TimeoutException = None
+ChromeDriverManager = None
+BeautifulSoup = requests = None
+psutil = None
 
-try:
-    from bs4 import BeautifulSoup
-    import requests
 
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
+def _require_selenium():
+    """Import selenium (và webdriver_manager nếu có) ở lần dùng đầu tiên"""
+    global webdriver, Options, Service, By, WebDriverWait, EC, NoSuchElementException, TimeoutException
+    global ChromeDriverManager
+    if webdriver is not None:
+        return
+
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.chrome.options import Options as _Options
+    from selenium.webdriver.chrome.service import Service as _Service
+    from selenium.webdriver.common.by import By as _By
+    from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+    from selenium.webdriver.support import expected_conditions as _EC
+    from selenium.common.exceptions import NoSuchElementException as _NoSuchElementException
+    from selenium.common.exceptions import TimeoutException as _TimeoutException
+
+    if WEBDRIVER_MANAGER_AVAILABLE:
+        from webdriver_manager.chrome import ChromeDriverManager as _ChromeDriverManager
+        ChromeDriverManager = _ChromeDriverManager
+
+    Options, Service, By = _Options, _Service, _By
+    WebDriverWait, EC = _WebDriverWait, _EC
+    NoSuchElementException, TimeoutException = _NoSuchElementException, _TimeoutException
+    webdriver = _webdriver
+
+
+def _require_bs4():
+    """Import BeautifulSoup và requests ở lần dùng đầu tiên"""
+    global BeautifulSoup, requests
+    if BeautifulSoup is None:
+        from bs4 import BeautifulSoup as _BeautifulSoup
+        import requests as _requests
+        requests = _requests
+        BeautifulSoup = _BeautifulSoup
+
+
+def _require_psutil():
+    global psutil
+    if psutil is None:
+        import psutil as _psutil
+        psutil = _psutil
+
+
+class ExtractionCancelled(Exception):
+    """Quá trình trích xuất đã bị hủy (Ctrl-C hoặc SIGTERM)"""
+
+
+class AuthenticationLost(ExtractionCancelled):
+    """Trang bài giảng cho thấy phiên đăng nhập đã mất (cookies hết hạn), cả lần chạy bị dừng"""
+
+
+# Kết quả của một bài giảng do iter_course/iter_lectures trả về; record là bản ghi đầy đủ đã cập nhật
+LectureResult = namedtuple('LectureResult',
+                           ['position', 'title', 'chapter', 'lecture_url', 'video_url', 'status', 'record'])
+
+
+def _process_tree_pids(root_pid):
+    """Lấy PID của một tiến trình và toàn bộ tiến trình con của nó"""
+    if PSUTIL_AVAILABLE:
+        _require_psutil()
+        try:
+            root = psutil.Process(root_pid)
+            return [root_pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    # Dự phòng khi không có psutil: đọc cây tiến trình từ /proc (Linux)
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return []
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # Trường ppid nằm sau tên tiến trình (có thể chứa dấu cách) trong ngoặc
+            ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    if not os.path.exists(f'/proc/{root_pid}'):
+        return []
+
+    pids = [root_pid]
+    pending = [root_pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            pids.append(child)
+            pending.append(child)
+    return pids
+
+
+def _process_rss(pid):
+    """Trả về RSS (byte) của một tiến trình, 0 nếu tiến trình không còn"""
+    if PSUTIL_AVAILABLE:
+        _require_psutil()
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _driver_pid(driver):
+    """Lấy PID của tiến trình chromedriver gắn với driver (nếu có)"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def kill_driver(driver):
+    """Buộc dừng chromedriver và các tiến trình Chrome con; lệnh đang chờ sẽ lỗi ngay"""
+    pid = _driver_pid(driver)
+    if pid is not None:
+        # Dừng tiến trình con trước để Chrome không bị mồ côi
+        for child_pid in reversed(_process_tree_pids(pid)):
+            try:
+                os.kill(child_pid, signal.SIGKILL)
+            except OSError:
+                continue
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def driver_tree_rss(driver):
+    """Tổng RSS (byte) của chromedriver và các tiến trình Chrome con"""
+    pid = _driver_pid(driver)
+    if pid is None:
+        return 0
+    return sum(_process_rss(p) for p in _process_tree_pids(pid))
+
+
+def host_load():
+    """Tải CPU trung bình 1 phút trên mỗi lõi, None nếu không đọc được"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def available_memory_fraction():
+    """Tỷ lệ bộ nhớ còn dùng được của máy (MemAvailable / MemTotal), None nếu không đọc được"""
+    if PSUTIL_AVAILABLE:
+        _require_psutil()
+        memory = psutil.virtual_memory()
+        return memory.available / memory.total
+
+    info = {}
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                info[key] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    if not info.get('MemTotal') or 'MemAvailable' not in info:
+        return None
+    return info['MemAvailable'] / info['MemTotal']
+
+
+class EventLog:
+    """Luồng sự kiện có cấu trúc (mỗi dòng một JSON) và thông báo console, ghi bởi một luồng nền
+
+    Các luồng worker chỉ đưa sự kiện vào hàng đợi, không ghi trực tiếp ra stdout.
+    Khi ghi sự kiện ra stdout ('-'), thông báo console chuyển sang stderr.
+    """
+
+    LECTURE_DONE_EVENTS = ('lecture_finish', 'lecture_error', 'lecture_timeout', 'lecture_skipped')
+
+    def __init__(self, path=None, progress=False):
+        self.path = path
+        self.progress = progress
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._console = sys.stderr if path == '-' else sys.stdout
+        self._total = 0
+        self._done = 0
+        self._started_at = None
+        self._progress_shown = False
+        self._failure_reported = False
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    if self.path == '-':
+                        self._file = sys.stdout
+                    elif self.path:
+                        self._file = open(self.path, 'a', encoding='utf-8')
+                    self._thread = threading.Thread(target=self._run, name='event-writer', daemon=True)
+                    self._thread.start()
+
+    def emit(self, event, **fields):
+        """Đưa một sự kiện vào hàng đợi (không chặn)"""
+        self._ensure_started()
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        self._queue.put(record)
+
+    def console(self, message):
+        """Đưa một thông báo console vào hàng đợi (không chặn)"""
+        self._ensure_started()
+        self._queue.put(message)
+
+    def flush(self):
+        """Chờ luồng nền ghi hết các sự kiện đang chờ"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._progress_shown:
+            self._console.write("\n")
+            self._progress_shown = False
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+        self._file = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if isinstance(item, str):
+                    self._write_console(item)
+                else:
+                    self._handle_event(item)
+            except Exception as e:
+                # Luồng ghi không được dừng vì một sự kiện lỗi, nhưng lỗi đầu tiên phải được báo
+                if not self._failure_reported:
+                    self._failure_reported = True
+                    sys.stderr.write(f"Lỗi khi ghi sự kiện: {e} (các lỗi tiếp theo sẽ không được báo)\n")
+            finally:
+                self._queue.task_done()
+
+    def _disable_file(self, error):
+        """Ngừng ghi sự kiện vào file bị lỗi (đĩa đầy, pipe bị đóng...), báo một lần ra stderr"""
+        sys.stderr.write(f"Không ghi được sự kiện vào {self.path}: {error}; ngừng ghi sự kiện vào file\n")
+        if self._file is not sys.stdout:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+
+    def _write_console(self, message):
+        if self._progress_shown:
+            self._console.write("\r\033[K")
+        self._console.write(message + "\n")
+        if self._progress_shown:
+            self._write_progress()
+        self._console.flush()
+
+    def _handle_event(self, record):
+        if record['event'] == 'run_start':
+            self._total = record.get('total', 0)
+            self._done = 0
+            self._started_at = time.monotonic()
+        elif record['event'] in self.LECTURE_DONE_EVENTS:
+            self._done += 1
+        elif record['event'] == 'lecture_discovered':
+            # Chế độ pipeline: tổng số bài tăng dần trong lúc tìm bài giảng
+            self._total += 1
+
+        if self._file is not None:
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            try:
+                self._file.write(line)
+                self._file.flush()
+            except (OSError, ValueError) as e:
+                self._disable_file(e)
+
+        if self.progress and self._total:
+            self._write_progress()
+            if record['event'] == 'run_finish':
+                # Kết thúc dòng tiến độ để thông báo sau không bị ghi đè
+                self._console.write("\n")
+                self._progress_shown = False
+                self._total = 0
+            self._console.flush()
+
+    def _write_progress(self):
+        elapsed = time.monotonic() - (self._started_at or time.monotonic())
+        rate = self._done / elapsed if elapsed > 0 else 0.0
+        if rate > 0:
+            eta = int((self._total - self._done) / rate)
+            eta_text = f"{eta // 60:02d}:{eta % 60:02d}"
+        else:
+            eta_text = "--:--"
+        self._console.write(f"\r\033[K[{self._done}/{self._total}] {rate:.2f} bài/giây, còn lại ~{eta_text}")
+        self._progress_shown = True
+
+
+class LectureWatchdog:
+    """Áp đặt hạn chót cho từng bài giảng; quá hạn thì gọi on_expire để buộc dừng trình duyệt bị treo"""
+
+    def __init__(self, timeout, on_expire, interval=1.0):
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self.interval = interval
+        self._deadlines = {}  # worker_id -> (hạn chót, url)
+        self._expired = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def begin(self, worker_id, url):
+        """Bắt đầu tính giờ cho bài giảng mà worker đang xử lý"""
+        if not self.timeout:
+            return
+        with self._lock:
+            self._deadlines[worker_id] = (time.monotonic() + self.timeout, url)
+            self._expired.discard(worker_id)
+            if self._thread is None:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='lecture-watchdog', daemon=True)
+                self._thread.start()
+
+    def end(self, worker_id):
+        """Kết thúc tính giờ, trả về True nếu bài giảng đã bị quá hạn"""
+        with self._lock:
+            self._deadlines.pop(worker_id, None)
+            if worker_id in self._expired:
+                self._expired.discard(worker_id)
+                return True
+        return False
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                expired = [(worker_id, url) for worker_id, (deadline, url) in self._deadlines.items()
+                           if deadline <= now]
+                for worker_id, _ in expired:
+                    del self._deadlines[worker_id]
+                    self._expired.add(worker_id)
+
+            for worker_id, url in expired:
+                try:
+                    self.on_expire(worker_id, url)
+                except Exception:
+                    continue
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class ConcurrencyLimiter:
+    """Giới hạn số worker hoạt động đồng thời, có thể điều chỉnh khi đang chạy"""
+
+    def __init__(self, limit):
+        self._limit = max(1, limit)
+        self._active = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @property
+    def waiting(self):
+        """Số worker đang chờ được phép chạy"""
+        return self._waiting
+
+    def set_limit(self, limit):
+        """Đặt lại giới hạn và đánh thức các worker đang chờ"""
+        with self._cond:
+            self._limit = max(1, limit)
+            self._cond.notify_all()
+
+    def over_limit(self):
+        """Kiểm tra số worker đang hoạt động có vượt giới hạn hiện tại không"""
+        with self._cond:
+            return self._active > self._limit
+
+    def acquire(self):
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._active >= self._limit:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+
+class AdaptiveConcurrency:
+    """Bộ điều khiển AIMD cho số worker hoạt động
+
+    Sau mỗi vòng (ít nhất một bài giảng cho mỗi worker và min_interval giây): giảm theo cấp số nhân khi tỷ lệ
+    lỗi/timeout cao, CPU quá tải, bộ nhớ trống thấp hoặc độ trễ tăng mạnh so với mức
+    tốt nhất đã thấy; nếu không thì tăng thêm một worker khi vẫn còn bài giảng đang chờ.
+    """
+
+    def __init__(self, limiter, min_workers, max_workers, log=None, events=None, max_error_rate=0.2,
+                 max_load=1.0, min_free_memory=0.1, latency_factor=2.0, decrease_factor=0.75, min_interval=1.0):
+        self.limiter = limiter
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.log = log or (lambda message: None)
+        self.events = events
+        self.max_error_rate = max_error_rate
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.latency_factor = latency_factor
+        self.decrease_factor = decrease_factor
+        self.min_interval = min_interval
+        self.baseline_latency = None
+        self.adjustments = 0
+        self.best = None  # (thông lượng, số worker)
+        self._samples = []
+        self._window_started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, duration, outcome):
+        """Ghi nhận một bài giảng đã xong (outcome: 'ok', 'error' hoặc 'timeout')"""
+        with self._lock:
+            self._samples.append((duration, outcome))
+            # Mỗi vòng cần đủ mẫu và đủ thời gian để thông lượng đo được có ý nghĩa
+            if len(self._samples) < max(4, self.limiter.limit) or \
+                    time.monotonic() - self._window_started < self.min_interval:
+                return
+            samples, self._samples = self._samples, []
+            started, self._window_started = self._window_started, time.monotonic()
+            self._decide(samples, self._window_started - started)
+
+    def _decide(self, samples, elapsed):
+        limit = self.limiter.limit
+        latencies = sorted(duration for duration, outcome in samples if outcome == 'ok')
+        error_rate = sum(outcome != 'ok' for _, outcome in samples) / len(samples)
+        median = latencies[len(latencies) // 2] if latencies else None
+        if median is not None:
+            self.baseline_latency = median if self.baseline_latency is None else min(self.baseline_latency, median)
+        load = host_load()
+        free_memory = available_memory_fraction()
+        throughput = len(samples) / elapsed if elapsed > 0 else 0.0
+        if self.best is None or throughput > self.best[0]:
+            self.best = (throughput, limit)
+
+        if error_rate > self.max_error_rate:
+            reason = f"lỗi/timeout {error_rate:.0%}"
+        elif load is not None and load > self.max_load:
+            reason = f"tải CPU {load:.2f}/lõi"
+        elif free_memory is not None and free_memory < self.min_free_memory:
+            reason = f"bộ nhớ trống {free_memory:.0%}"
+        elif median is not None and median > self.baseline_latency * self.latency_factor:
+            reason = f"độ trễ {median:.1f}s (tốt nhất {self.baseline_latency:.1f}s)"
+        else:
+            reason = None
+
+        if reason:
+            new_limit = max(self.min_workers, min(limit - 1, int(limit * self.decrease_factor)))
+        elif self.limiter.waiting and limit < self.max_workers:
+            new_limit = limit + 1
+            reason = "ổn định, còn bài giảng đang chờ"
+        else:
+            new_limit = limit
+
+        if self.events is not None:
+            self.events.emit('concurrency', previous=limit, limit=new_limit, reason=reason,
+                             throughput=round(throughput, 3), error_rate=round(error_rate, 3),
+                             median_latency_s=round(median, 3) if median is not None else None,
+                             load=round(load, 2) if load is not None else None,
+                             free_memory=round(free_memory, 3) if free_memory is not None else None)
+        if new_limit != limit:
+            self.adjustments += 1
+            self.limiter.set_limit(new_limit)
+            self.log(f"  Điều chỉnh số worker {limit} -> {new_limit} ({reason}; {throughput:.2f} bài/giây)")
+
+    def summary(self):
+        """Chuỗi tóm tắt số lần điều chỉnh và mức thông lượng tốt nhất"""
+        text = f"Điều chỉnh worker: {self.adjustments} lần, kết thúc với {self.limiter.limit} worker"
+        if self.best is not None:
+            text += f", tốt nhất {self.best[0]:.2f} bài/giây với {self.best[1]} worker"
+        return text
+
+
+class MemoryMonitor:
+    """Lấy mẫu RSS của các trình duyệt và thống kê đỉnh/trung bình
+
+    Mẫu đến từ luồng nền định kỳ và từ các worker sau mỗi bài giảng (khi có --memory-budget),
+    nên trung bình được tính theo thời gian: mỗi mức bộ nhớ có trọng số bằng khoảng thời gian
+    tới mẫu kế tiếp, worker xong bài nhanh không làm lệch kết quả.
+    """
+
+    def __init__(self, budget_mb=None, interval=2.0):
+        self.budget_bytes = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.interval = interval
+        self.last_usage = {}
+        self.peak_bytes = 0
+        self.byte_seconds = 0.0
+        self.sampled_seconds = 0.0
+        self.sample_count = 0
+        self._last_total = None
+        self._last_sample_at = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sample(self, drivers):
+        """Lấy mẫu RSS cho từng driver, trả về dict worker_id -> byte"""
+        usage = {worker_id: driver_tree_rss(driver) for worker_id, driver in drivers}
+        total = sum(usage.values())
+
+        with self._lock:
+            self._advance(time.monotonic())
+            self._last_total, self._last_sample_at = total, time.monotonic()
+            self.last_usage = usage
+            self.peak_bytes = max(self.peak_bytes, total)
+            self.sample_count += 1
+
+        return usage
+
+    def _advance(self, now):
+        """Cộng mức bộ nhớ của mẫu trước, nhân với thời gian nó kéo dài, vào trung bình"""
+        if self._last_sample_at is not None:
+            elapsed = max(0.0, now - self._last_sample_at)
+            self.byte_seconds += self._last_total * elapsed
+            self.sampled_seconds += elapsed
+
+    def over_budget(self, usage):
+        return self.budget_bytes is not None and sum(usage.values()) > self.budget_bytes
+
+    def start(self, get_drivers):
+        """Chạy luồng nền lấy mẫu định kỳ"""
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.sample(get_drivers())
+                except Exception:
+                    continue
+
+        self._thread = threading.Thread(target=run, name='memory-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Khoảng nghỉ giữa các lần chạy không được tính vào trung bình
+        with self._lock:
+            self._advance(time.monotonic())
+            self._last_sample_at = None
+
+    def summary(self):
+        """Chuỗi tóm tắt bộ nhớ đỉnh và trung bình (MB)"""
+        with self._lock:
+            if not self.sample_count:
+                return "Bộ nhớ trình duyệt: không có mẫu"
+            peak = self.peak_bytes / (1024 * 1024)
+            average_bytes = self.byte_seconds / self.sampled_seconds if self.sampled_seconds else self._last_total
+            average = average_bytes / (1024 * 1024)
+            return f"Bộ nhớ trình duyệt: đỉnh {peak:.0f} MB, trung bình {average:.0f} MB ({self.sample_count} mẫu)"
+
+
+class ProfileTemplate:
+    """Profile Chrome mẫu (đã đăng nhập, cache tài nguyên tĩnh đã nạp) được sao chép cho từng trình duyệt
+
+    Bản sao được tạo bằng cp --reflink=always (copy-on-write trên btrfs/XFS) trong thư mục
+    <mẫu>.clones, cùng hệ thống file với thư mục mẫu. Hệ thống file không hỗ trợ reflink
+    (ext4...) thì các mục cache được hardlink và chỉ các file nhỏ còn lại được sao chép.
+    """
+
+    MARKER = '.havamath-template'
+    # File khóa và dữ liệu riêng của một phiên Chrome, không được sao chép
+    SKIP_PATTERNS = ('Singleton*', 'lockfile', 'Crashpad', 'BrowserMetrics*')
+    # Thư mục cache HTTP/mã JS: các mục là tài nguyên tĩnh đã nạp sẵn, chủ yếu chỉ được đọc nên có thể
+    # hardlink; file chỉ mục của cache bị ghi lại trong mỗi phiên nên vẫn phải sao chép
+    CACHE_DIRS = ('Cache', 'Code Cache')
+    CACHE_INDEX_NAMES = ('index', 'the-real-index')
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.clone_root = self.path.rstrip(os.sep) + '.clones'
+
+    def is_fresh(self, cookies_file=None):
+        """Mẫu đã được tạo và mới hơn file cookies"""
+        marker = os.path.join(self.path, self.MARKER)
+        if not os.path.exists(marker):
+            return False
+        if cookies_file and os.path.exists(cookies_file):
+            return os.path.getmtime(cookies_file) <= os.path.getmtime(marker)
+        return True
+
+    def reset(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+
+    def mark_ready(self):
+        with open(os.path.join(self.path, self.MARKER), 'w', encoding='utf-8') as f:
+            f.write(datetime.now().isoformat())
+
+    def clone(self):
+        """Sao chép mẫu sang một thư mục user-data-dir mới, trả về đường dẫn"""
+        os.makedirs(self.clone_root, exist_ok=True)
+        target = tempfile.mkdtemp(prefix='profile-', dir=self.clone_root)
+        try:
+            subprocess.run(['cp', '-a', '--reflink=always', os.path.join(self.path, '.'), target],
+                           check=True, capture_output=True)
+            for pattern in self.SKIP_PATTERNS:
+                for path in glob.glob(os.path.join(target, pattern)):
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+        except (OSError, subprocess.CalledProcessError):
+            # Không có reflink (hoặc không có cp của GNU): hardlink cache, sao chép phần còn lại bằng Python
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(self.path, target, symlinks=True, ignore=shutil.ignore_patterns(*self.SKIP_PATTERNS),
+                            copy_function=self._copy_entry)
+        return target
+
+    def _copy_entry(self, src, dst):
+        """Hardlink mục cache của mẫu (khác hệ thống file thì sao chép), sao chép các file khác"""
+        parts = os.path.relpath(src, self.path).split(os.sep)
+        if set(parts[:-1]) & set(self.CACHE_DIRS) and parts[-1] not in self.CACHE_INDEX_NAMES:
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                pass
+        return shutil.copy2(src, dst)
+
+    def discard(self, clone_path):
+        shutil.rmtree(clone_path, ignore_errors=True)
+        try:
+            os.rmdir(self.clone_root)
+        except OSError:
+            pass
+
+
+class PageStore:
+    """Kho lưu trang đã tải, nén gzip và định địa chỉ theo nội dung (sha256)
+
+    Cấu trúc thư mục:
+        index.json                 -- ánh xạ "<loại> <url>" -> mã băm nội dung
+        objects/ab/cdef....html.gz -- nội dung trang đã nén
+
+    Loại "raw" là HTML nhận được qua HTTP, "dom" là DOM đã render trong Chrome.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.json')
+        self._lock = threading.Lock()
+        self.index = {}
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def _key(url, kind):
+        return f"{kind} {urldefrag(url)[0]}"
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest[2:]}.html.gz")
+
+    def record(self, url, kind, content):
+        """Lưu nội dung trang; nội dung trùng lặp chỉ được ghi một lần"""
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with gzip.open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+            self.index[self._key(url, kind)] = {
+                "sha256": digest,
+                "recorded_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            }
+
+            tmp_index = f"{self.index_path}.tmp"
+            with open(tmp_index, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_index, self.index_path)
+
+        return digest
+
+    def load(self, url, kind):
+        """Đọc nội dung trang đã ghi, trả về None nếu chưa có"""
+        entry = self.index.get(self._key(url, kind))
+        if not entry:
+            return None
+
+        with gzip.open(self._object_path(entry['sha256']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+
+class CoursePage:
+    """Ảnh chụp trang khóa học trong một lần chạy: HTML thô và DOM đã render
+
+    Mỗi loại chỉ được tải (hoặc render) tối đa một lần, mọi phương pháp tìm bài giảng và
+    phân chương đọc từ đây. Cũng dùng được làm kho trang cho ReplayDriver để đọc lại DOM.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.lock = threading.Lock()
+        self.raw = None
+        self.raw_loaded = False
+        self.dom = None
+        self.driver = None  # driver đang hiển thị DOM đã render
+        self.rendered_url = None
+        self._soup = None
+
+    def soup(self):
+        """HTML thô đã phân tích (một lần), None nếu không tải được"""
+        if self._soup is None and self.raw:
+            _require_bs4()
+            self._soup = BeautifulSoup(self.raw, 'html.parser')
+        return self._soup
+
+    def load(self, url, kind):
+        return self.dom if kind == 'dom' else self.raw
+
+
+class ReplayElement:
+    """Phần tử DOM tương thích với các thuộc tính WebElement mà trình trích xuất dùng"""
+
+    def __init__(self, node, driver):
+        self._node = node
+        self._driver = driver
+
+    @property
+    def tag_name(self):
+        return self._node.name
+
+    @property
+    def text(self):
+        return self._node.get_text(' ', strip=True)
+
+    def get_attribute(self, name):
+        value = self._node.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        # WebElement trả về href/src đã chuyển thành URL tuyệt đối
+        if value is not None and name in ('href', 'src'):
+            value = urljoin(self._driver.current_url, value)
+        return value
+
+    def find_elements(self, by, value):
+        return self._driver._select(self._node, by, value)
+
+
+class _ReplaySwitchTo:
+    """Chuyển tab/frame cho ReplayDriver"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def new_window(self, type_hint=None):
+        handle = f"replay-{len(self._driver._windows)}"
+        self._driver._windows[handle] = ('', '', None)
+        self._driver.current_window_handle = handle
+
+    def window(self, handle):
+        self._driver.current_window_handle = handle
+
+    def frame(self, frame_reference):
+        pass
+
+    def default_content(self):
+        pass
+
+
+class ReplayDriver:
+    """Driver phát lại các trang đã ghi bằng PageStore, không cần mạng hay Chrome
+
+    Chỉ hỗ trợ những lệnh WebDriver mà trình trích xuất sử dụng; execute_script
+    trả về None nên các phương pháp dùng JavaScript sẽ được bỏ qua.
+    """
+
+    def __init__(self, store):
+        _require_selenium()
+        _require_bs4()
+        self._store = store
+        self._windows = {'replay-0': ('', '', None)}
+        self.current_window_handle = 'replay-0'
+        self.switch_to = _ReplaySwitchTo(self)
+
+    @property
+    def current_url(self):
+        return self._windows[self.current_window_handle][0]
+
+    @property
+    def page_source(self):
+        return self._windows[self.current_window_handle][1]
+
+    def get(self, url):
+        html = self._store.load(url, 'dom')
+        if html is None:
+            html = self._store.load(url, 'raw') or ''
+        self._windows[self.current_window_handle] = (url, html, BeautifulSoup(html, 'html.parser'))
+
+    def _select(self, node, by, value):
+        if node is None:
+            return []
+        if by == By.CSS_SELECTOR:
+            nodes = node.select(value)
+        elif by == By.TAG_NAME:
+            nodes = node.find_all(value)
+        else:
+            nodes = []
+        return [ReplayElement(n, self) for n in nodes]
+
+    def find_elements(self, by, value):
+        return self._select(self._windows[self.current_window_handle][2], by, value)
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"{by}={value}")
+        return elements[0]
+
+    def execute_script(self, script, *args):
+        return None
+
+    def refresh(self):
+        pass
+
+    def add_cookie(self, cookie):
+        pass
+
+    def quit(self):
+        pass
+
+
+class TaskQueue(ABC):
+    """Hàng đợi tác vụ dùng chung giữa coordinator và các worker trên nhiều máy
+
+    Mỗi tác vụ là một bài giảng. Worker nhận tác vụ theo hợp đồng thuê (lease) có
+    thời hạn; nếu worker chết, tác vụ sẽ xuất hiện lại sau khi hết hạn thuê.
+    """
+
+    @abstractmethod
+    def create_job(self, job_id, lecture_data):
+        """Đẩy toàn bộ bài giảng của một lần xuất vào hàng đợi; ValueError nếu job_id đang có tác vụ dở dang"""
+
+    @abstractmethod
+    def lease(self, worker_id, visibility_timeout):
+        """Nhận một tác vụ, trả về (task_id, job_id, position, lecture) hoặc None"""
+
+    @abstractmethod
+    def complete(self, task_id, worker_id, lecture):
+        """Ghi kết quả; bỏ qua nếu hợp đồng thuê đã chuyển sang worker khác"""
+
+    @abstractmethod
+    def progress(self, job_id):
+        """Số tác vụ theo trạng thái (pending, leased, done, failed)"""
+
+    @abstractmethod
+    def has_open_tasks(self):
+        """Còn tác vụ đang chờ hoặc đang được thuê trong bất kỳ job nào"""
+
+    @abstractmethod
+    def results(self, job_id):
+        """Dữ liệu bài giảng của job theo thứ tự ban đầu"""
+
+    def close(self):
+        pass
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """Hàng đợi tác vụ trên một file SQLite (có thể đặt trên ổ đĩa dùng chung)
+
+    Dùng journal mặc định thay vì WAL vì WAL không hoạt động trên ổ mạng.
+    Mỗi luồng có kết nối riêng; việc nhận tác vụ chạy trong giao dịch IMMEDIATE.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            header TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            lease_owner TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, lease_expires);
+        CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks(job_id, position);
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def create_job(self, job_id, lecture_data):
+        header = {k: v for k, v in lecture_data.items() if k != 'data'}
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Không ghi đè job đang chạy: các worker vẫn đang giữ tác vụ của nó
+            active = conn.execute("SELECT 1 FROM tasks WHERE job_id = ? AND status IN ('pending', 'leased') LIMIT 1",
+                                  (job_id,)).fetchone()
+            if active is not None:
+                raise ValueError(f"Job {job_id} vẫn còn tác vụ chưa xong trong hàng đợi")
+            conn.execute("INSERT OR REPLACE INTO jobs (job_id, header, created_at) VALUES (?, ?, ?)",
+                         (job_id, json.dumps(header, ensure_ascii=False), time.time()))
+            conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO tasks (job_id, position, payload) VALUES (?, ?, ?)",
+                [(job_id, i, json.dumps(lecture, ensure_ascii=False))
+                 for i, lecture in enumerate(lecture_data.get('data', []))]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def lease(self, worker_id, visibility_timeout):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Tác vụ hết hạn thuê quá số lần thử cho phép được đánh dấu thất bại
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, job_id, position, payload FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + visibility_timeout, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return row[0], row[1], row[2], json.loads(row[3])
+
+    def complete(self, task_id, worker_id, lecture):
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = 'done', result = ?, lease_owner = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(lecture, ensure_ascii=False), task_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def progress(self, job_id):
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status, count in self._connect().execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status", (job_id,)):
+            counts[status] = count
+        return counts
+
+    def has_open_tasks(self):
+        """Còn tác vụ đang chờ hoặc đang được thuê trong bất kỳ job nào"""
+        row = self._connect().execute(
+            "SELECT 1 FROM tasks WHERE status IN ('pending', 'leased') LIMIT 1").fetchone()
+        return row is not None
+
+    def results(self, job_id):
+        conn = self._connect()
+        row = conn.execute("SELECT header FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        lecture_data = json.loads(row[0]) if row else {}
+        lecture_data['data'] = [
+            json.loads(result or payload)
+            for payload, result in conn.execute(
+                "SELECT payload, result FROM tasks WHERE job_id = ? ORDER BY position", (job_id,))
+        ]
+        return lecture_data
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LectureIndex:
+    """Chỉ mục SQLite cho bài giảng của nhiều khóa học (tra cứu theo khóa học, chương, video, trạng thái)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS courses (
+            course_id TEXT PRIMARY KEY,
+            course_url TEXT,
+            header TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lectures (
+            course_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            title TEXT,
+            chapter TEXT,
+            lecture_url TEXT,
+            video_id TEXT,
+            video_url TEXT,
+            status TEXT,
+            record TEXT NOT NULL,
+            PRIMARY KEY (course_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_lectures_chapter ON lectures(course_id, chapter);
+        CREATE INDEX IF NOT EXISTS idx_lectures_video ON lectures(video_id);
+        CREATE INDEX IF NOT EXISTS idx_lectures_status ON lectures(status);
+    """
+
+    def __init__(self, path, site=None):
+        self.path = path
+        self.site = site or load_site_profile()
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.executescript(self.SCHEMA)
+
+    def video_id(self, value):
+        """Lấy ID video từ URL video (đúng host theo link_pattern của hồ sơ trang) hoặc chính ID"""
+        return self.site.video_id_from_link(value)
+
+    def write_course(self, course_id, lecture_data, course_url=None, replace=True):
+        """Ghi bài giảng của một khóa học trong một giao dịch (replace=False: chỉ cập nhật các vị trí có trong dữ liệu)"""
+        header = {k: v for k, v in lecture_data.items() if k not in ('data', 'shard')}
+        rows = []
+        for i, lecture in enumerate(lecture_data.get('data', [])):
+            video_url = lecture.get('Video URL') or ''
+            status = lecture.get('Extract Status') or ('found' if video_url else 'missing')
+            rows.append((course_id, lecture.get('Position', i + 1), lecture.get('Lecture Title'),
+                         lecture.get('Chapter'), lecture.get('Lecture Link'), self.video_id(video_url),
+                         video_url, status, json.dumps(lecture, ensure_ascii=False)))
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO courses (course_id, course_url, header, updated_at) VALUES (?, ?, ?, ?)",
+                (course_id, course_url, json.dumps(header, ensure_ascii=False),
+                 datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+            )
+            if replace:
+                self.conn.execute("DELETE FROM lectures WHERE course_id = ?", (course_id,))
+            self.conn.executemany("INSERT OR REPLACE INTO lectures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def courses(self):
+        return self.conn.execute(
+            "SELECT c.course_id, COUNT(l.position), SUM(l.video_id IS NULL), c.updated_at "
+            "FROM courses c LEFT JOIN lectures l ON l.course_id = c.course_id "
+            "GROUP BY c.course_id ORDER BY c.course_id").fetchall()
+
+    def find_video(self, video_id):
+        """Các bài giảng (ở mọi khóa học) dùng video này"""
+        return self.conn.execute(
+            "SELECT course_id, position, title, chapter FROM lectures WHERE video_id = ? "
+            "ORDER BY course_id, position", (video_id,)).fetchall()
+
+    def reused_videos(self, min_courses=2):
+        """Video xuất hiện trong ít nhất min_courses khóa học"""
+        return self.conn.execute(
+            "SELECT video_id, COUNT(DISTINCT course_id), GROUP_CONCAT(DISTINCT course_id) FROM lectures "
+            "WHERE video_id IS NOT NULL GROUP BY video_id HAVING COUNT(DISTINCT course_id) >= ? "
+            "ORDER BY COUNT(DISTINCT course_id) DESC, video_id", (min_courses,)).fetchall()
+
+    def missing_videos(self, course_id=None):
+        """Bài giảng chưa có URL video"""
+        query = ("SELECT course_id, position, title, chapter, status FROM lectures WHERE video_id IS NULL")
+        params = ()
+        if course_id:
+            query += " AND course_id = ?"
+            params = (course_id,)
+        return self.conn.execute(query + " ORDER BY course_id, position", params).fetchall()
+
+    def export_course(self, course_id):
+        """Dựng lại dữ liệu đầy đủ (định dạng Lecture List) của một khóa học"""
+        row = self.conn.execute("SELECT header FROM courses WHERE course_id = ?", (course_id,)).fetchone()
+        if row is None:
+            return None
+        lecture_data = json.loads(row[0])
+        lecture_data['data'] = [json.loads(record) for (record,) in self.conn.execute(
+            "SELECT record FROM lectures WHERE course_id = ? ORDER BY position", (course_id,))]
+        return lecture_data
+
+    def close(self):
+        self.conn.close()
+
+
+# Các backend hàng đợi theo scheme của URI, ví dụ sqlite:///mnt/shared/queue.db
+QUEUE_BACKENDS = {
+    'sqlite': SQLiteTaskQueue,
+}
+
+
+def open_task_queue(uri):
+    """Mở hàng đợi từ URI; đường dẫn không có scheme được coi là SQLite"""
+    scheme, sep, location = uri.partition('://')
+    if not sep:
+        scheme, location = 'sqlite', uri
+    elif scheme == 'sqlite':
+        # sqlite:///tuyet/doi.db -> /tuyet/doi.db, sqlite://tuong/doi.db -> tuong/doi.db
+        location = location[1:] if location.startswith('//') else location
+
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Không hỗ trợ hàng đợi '{scheme}' (hỗ trợ: {', '.join(QUEUE_BACKENDS)})")
+
+    return QUEUE_BACKENDS[scheme](location)
+
+
+def canonical_lecture_url(url):
+    """URL bài giảng chuẩn hóa (bỏ fragment, dấu '/' cuối, scheme/host viết thường) để chia shard ổn định"""
+    parsed = urlparse(urldefrag(url or '')[0])
+    path = parsed.path.rstrip('/') or '/'
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}{query}"
+
+
+def lecture_shard(url, count):
+    """Shard (0..count-1) của một bài giảng, dựa trên SHA-1 của URL chuẩn hóa"""
+    digest = hashlib.sha1(canonical_lecture_url(url).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) % count
+
+
+def parse_shard(value):
+    """Đọc giá trị --shard dạng 'i/N' (0 <= i < N)"""
+    match = re.match(r'^(\d+)/(\d+)$', value or '')
+    if not match or not 0 <= int(match.group(1)) < int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"shard phải có dạng i/N với 0 <= i < N: {value}")
+    return int(match.group(1)), int(match.group(2))
+
+
+# Chạy ở đầu mọi tài liệu mới: theo dõi phần tử được chèn/cập nhật và ghi ID video đầu tiên
+# vào window.__havamathVideoId để Python chỉ cần đọc một giá trị thay vì quét lại DOM
+VIDEO_ID_HOOK_SCRIPT = r"""
+(function () {
+    if (window.__havamathVideoHook) { return; }
+    window.__havamathVideoHook = true;
+    window.__havamathVideoId = null;
+
+    var config = __HOOK_CONFIG__;
+    var idPattern = new RegExp('^(?:' + config.idPattern + ')$');
+    var srcPattern = new RegExp(config.srcPattern);
+    var attributes = config.attributes;
+    var selector = ['[src]'].concat(attributes.map(function (name) { return '[' + name + ']'; })).join(', ');
+    var observer;
+
+    function check(el) {
+        if (window.__havamathVideoId || !el || el.nodeType !== 1) { return; }
+        var found = null;
+        var src = el.getAttribute('src');
+        var match = src && srcPattern.exec(src);
+        if (match) {
+            found = {id: match[1], method: el.tagName === 'IFRAME' ? 'iframe' : 'src'};
+        }
+        for (var i = 0; i < attributes.length && !found; i++) {
+            var value = el.getAttribute(attributes[i]);
+            if (value && idPattern.test(value)) {
+                found = {id: value, method: attributes[i]};
+            }
+        }
+        if (found) {
+            window.__havamathVideoId = found;
+            if (observer) { observer.disconnect(); }
+        }
+    }
+
+    function scan(root) {
+        check(root);
+        if (root.querySelectorAll) {
+            var elements = root.querySelectorAll(selector);
+            for (var i = 0; i < elements.length && !window.__havamathVideoId; i++) { check(elements[i]); }
+        }
+    }
+
+    observer = new MutationObserver(function (mutations) {
+        for (var i = 0; i < mutations.length && !window.__havamathVideoId; i++) {
+            var mutation = mutations[i];
+            if (mutation.type === 'attributes') {
+                check(mutation.target);
+            } else {
+                for (var j = 0; j < mutation.addedNodes.length; j++) { scan(mutation.addedNodes[j]); }
+            }
+        }
+    });
+    observer.observe(document, {childList: true, subtree: true, attributes: true,
+                                attributeFilter: ['src'].concat(attributes)});
+})();
+"""
+
+
+def video_hook_script(site):
+    """Script theo dõi ID video với mẫu ID, mẫu src và các thuộc tính lấy từ hồ sơ trang"""
+    config = {'idPattern': site.video_id_source, 'srcPattern': site.hook_src_pattern,
+              'attributes': list(site.hook_id_attributes)}
+    return VIDEO_ID_HOOK_SCRIPT.replace('__HOOK_CONFIG__', json.dumps(config))
+
+
+class NoVideoCache:
+    """Cache (file JSON) các bài giảng đã mở trong trình duyệt mà không có video
+
+    Khóa là URL bài giảng chuẩn hóa. Bài được ghi lại khi lần trích xuất kết thúc với
+    not_found và bị xóa khi sau đó tìm thấy video.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def __contains__(self, url):
+        return canonical_lecture_url(url) in self.entries
+
+    def add(self, url, title=None):
+        with self._lock:
+            key = canonical_lecture_url(url)
+            entry = self.entries.setdefault(key, {"title": title, "misses": 0})
+            entry['misses'] += 1
+            entry['checked_at'] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+            self._dirty = True
+
+    def discard(self, url):
+        with self._lock:
+            if self.entries.pop(canonical_lecture_url(url), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Ghi cache ra file (ghi file tạm rồi đổi tên) nếu có thay đổi"""
+        with self._lock:
+            if not self.cache_file or not self._dirty:
+                return
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_file)
+            self._dirty = False
 
 
 class HavamathExtractor:
+    # Khóa của trình duyệt chính (self.driver) trong các mẫu bộ nhớ
+    MAIN_DRIVER_ID = 'main'
+
     def __init__(self, cookies_file=None, headless=True, verbose=True, wait_time=10, debug=False,
-                 max_workers=4, simplified_output=True, reuse_driver=False):
+                 max_workers=4, simplified_output=True, reuse_driver=False, memory_budget_mb=None,
+                 tabs=0, record_dir=None, replay_dir=None, task_queue=None, lease_timeout=300,
+                 events_file=None, progress=False, page_load_timeout=30, script_timeout=20,
+                 lecture_timeout=120, enricher=None, lecture_index=None, video_hook=True,
+                 limit=None, offset=0, shard=None, pipeline=False, adaptive=False, min_workers=1,
+                 start_workers=None, auth_check=True, profile_template=None, site_profile=None,
+                 non_video='browse', no_video_cache=None, attach=None):
         """Khởi tạo trình trích xuất"""
         self.cookies_file = cookies_file
         self.headless = headless
@@ -54,46 +1368,356 @@ class HavamathExtractor:
         self.max_workers = max_workers
         self.simplified_output = simplified_output
         self.reuse_driver = reuse_driver
+        self.tabs = tabs  # Số tab trong một trình duyệt (0 = dùng nhiều luồng)
+
+        # Selector, tiêu đề bỏ qua và mẫu ID video của trang, biên dịch một lần khi khởi động
+        self.site = site_profile if isinstance(site_profile, SiteProfile) else load_site_profile(site_profile)
+
+        # Chỉ xử lý một phần khóa học: khoảng [offset, offset + limit) rồi lọc theo shard (i, N)
+        self.limit = limit
+        self.offset = offset or 0
+        self.shard = shard
+
+        # Đưa bài giảng cho worker ngay khi tìm thấy thay vì chờ lấy xong cả danh sách
+        self.pipeline = pipeline
 
         self.driver = None
         self.worker_drivers = {}
-        self.session = None
+        self._drivers_lock = threading.Lock()
+        self._session = None
         self.chapters = []  # Danh sách các chương
-
-        # Thiết lập requests session nếu có BeautifulSoup
-        if BS4_AVAILABLE:
-            self.session = requests.Session()
-            self.session.headers.update({
+        self._local = threading.local()  # Trạng thái riêng của từng luồng (phương pháp tìm thấy, thời gian)
+
+        # Giới hạn thời gian: trình duyệt tự hủy lệnh quá hạn, watchdog xử lý trường hợp bị treo hẳn
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = script_timeout
+        self.watchdog = LectureWatchdog(lecture_timeout, self._on_lecture_timeout)
+
+        # Script theo dõi ID video từ đầu tài liệu; các driver đã đăng ký script được ghi nhận ở đây
+        self.video_hook = video_hook
+        self._hooked_drivers = weakref.WeakSet()
+
+        # Bổ sung thông tin video sau khi trích xuất (tùy chọn)
+        self.enricher = enricher
+
+        # Chỉ mục SQLite dùng chung cho nhiều khóa học (tùy chọn)
+        self.lecture_index = lecture_index
+
+        # Bài có vẻ không có video (theo tiêu đề, dấu hiệu trên trang khóa học hoặc cache) được
+        # mở bằng trình duyệt như bài thường ('browse'), chỉ kiểm tra qua HTTP ('http') hoặc bỏ qua ('skip')
+        self.non_video = non_video
+        self.no_video_cache = no_video_cache
+        self.lecture_hints = {}  # URL chuẩn hóa -> class, biểu tượng, nhãn của liên kết trên trang khóa học
+
+        # Hủy hợp tác: các luồng kiểm tra cờ này giữa các bước và trong lúc chờ trang tải
+        self._cancel_event = threading.Event()
+        self.interrupted = False
+
+        # Kiểm tra đăng nhập trước khi chạy và trên từng trang bài giảng
+        self.auth_check = auth_check
+        self.auth_lost = False
+        self._auth_lock = threading.Lock()
+
+        # Nhật ký sự kiện và thông báo được ghi bởi luồng nền, ngoài luồng worker
+        self.events = EventLog(events_file, progress)
+
+        # Hàng đợi phân tán: khi có, các bài giảng được giao cho worker trên các máy khác
+        self.task_queue = task_queue
+        self.lease_timeout = lease_timeout
+
+        # Ghi lại hoặc phát lại các trang đã tải
+        self.replay = bool(replay_dir)
+        self.page_store = None
+        if replay_dir:
+            self.page_store = PageStore(replay_dir)
+        elif record_dir:
+            self.page_store = PageStore(record_dir)
+
+        # Profile Chrome mẫu: mỗi trình duyệt khởi động từ một bản sao đã đăng nhập và có cache
+        self.profile_template = ProfileTemplate(profile_template) if profile_template else None
+        self._profile_lock = threading.Lock()
+        self._profile_clones = {}  # driver -> thư mục bản sao
+
+        # Trang khóa học của lần chạy hiện tại: URL chuẩn hóa -> CoursePage
+        self._course_pages = {}
+        self._course_pages_lock = threading.Lock()
+
+        # Chrome đang chạy sẵn (host:port của cổng remote debugging): chỉ mở và đóng tab của mình
+        self.attach = attach
+        self._attached_tabs = {}  # driver -> các tab do lần chạy này mở
+
+        # Giới hạn bộ nhớ và số worker hoạt động
+        self.memory_monitor = MemoryMonitor(memory_budget_mb)
+        self.limiter = ConcurrencyLimiter(start_workers or max_workers)
+
+        # Tự điều chỉnh số worker hoạt động trong khoảng [min_workers, max_workers]
+        self.adaptive = None
+        if adaptive:
+            self.adaptive = AdaptiveConcurrency(self.limiter, min_workers, max_workers, log=self._log,
+                                                events=self.events)
+        self._recycle_requested = set()
+
+    @property
+    def session(self):
+        """Requests session (kèm cookies), chỉ được tạo khi cần gửi yêu cầu HTTP"""
+        if self._session is None and BS4_AVAILABLE:
+            _require_bs4()
+            self._session = requests.Session()
+            self._session.headers.update({
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
             })
 
             # Tải cookies cho session requests
-            if cookies_file and os.path.exists(cookies_file):
+            if self.cookies_file and os.path.exists(self.cookies_file):
                 self._load_cookies_to_requests()
+        return self._session
+
+    def _sleep(self, seconds):
+        """Chờ trang tải; bỏ qua khi phát lại trang đã ghi, dừng ngay khi bị hủy"""
+        if not self.replay:
+            self._cancel_event.wait(seconds)
+        if self._cancel_event.is_set():
+            raise ExtractionCancelled()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Ngừng giao bài giảng mới và hủy các lượt tải trang đang chạy"""
+        self._cancel_event.set()
+        with self._drivers_lock:
+            drivers = list(self.worker_drivers.values())
+            self.worker_drivers.clear()
+        for driver in drivers:
+            kill_driver(driver)
+            self._discard_profile(driver)
+            self._close_attached_tabs(driver)
+
+    def _begin_run(self):
+        """Bắt đầu một lần chạy/job mới: xóa trạng thái hủy và mất đăng nhập của lần trước"""
+        with self._auth_lock:
+            self._cancel_event.clear()
+            self.auth_lost = False
+            self.interrupted = False
+
+    def _handle_interrupt(self, completed, total):
+        """Xử lý Ctrl-C/SIGTERM trong lúc trích xuất: hủy và giữ lại kết quả đã có"""
+        self.interrupted = True
+        self.cancel()
+        self._log(f"\nĐã hủy: giữ lại {completed}/{total} bài giảng đã hoàn thành")
+        self.events.emit('run_cancelled', completed=completed, total=total)
+
+    def _record_dom(self, url, driver):
+        """Lưu DOM đã render của trang hiện tại khi đang ở chế độ ghi"""
+        if self.page_store is not None and not self.replay:
+            try:
+                self.page_store.record(url, 'dom', driver.page_source)
+            except Exception as e:
+                self._debug_log(f"Lỗi khi ghi trang {url}: {e}")
+
+    def _fetch_html(self, url):
+        """Tải HTML qua requests (hoặc từ kho khi phát lại), trả về None nếu thất bại"""
+        if BS4_AVAILABLE:
+            _require_bs4()
+
+        if self.replay:
+            return self.page_store.load(url, 'raw')
+
+        if not (BS4_AVAILABLE and self.session):
+            return None
+
+        response = self.session.get(url, timeout=self.page_load_timeout)
+        if response.status_code != 200:
+            return None
+
+        if self.page_store is not None:
+            self.page_store.record(url, 'raw', response.text)
+        return response.text
+
+    def _course_page(self, course_url):
+        """Ảnh chụp trang khóa học của lần chạy hiện tại (tạo mới khi chưa có)"""
+        key = canonical_lecture_url(course_url)
+        with self._course_pages_lock:
+            page = self._course_pages.get(key)
+            if page is None:
+                page = self._course_pages[key] = CoursePage(course_url)
+        return page
+
+    def _drop_course_page(self, course_url):
+        """Bắt đầu lần chạy mới cho khóa học: bỏ HTML và DOM đã lưu từ lần trước"""
+        with self._course_pages_lock:
+            self._course_pages.pop(canonical_lecture_url(course_url), None)
+
+    def _course_html(self, course_url):
+        """Trang khóa học với HTML thô đã tải; chỉ gửi một yêu cầu trong lần chạy, kể cả khi thất bại"""
+        page = self._course_page(course_url)
+        with page.lock:
+            if not page.raw_loaded:
+                try:
+                    page.raw = self._fetch_html(course_url)
+                except Exception as e:
+                    self._debug_log(f"Lỗi khi tải HTML trang khóa học: {e}")
+                page.raw_loaded = True
+        return page
+
+    def _render_course_page(self, course_url, on_link=None):
+        """Driver hiển thị DOM đã render của trang khóa học; Chrome chỉ tải trang này một lần trong lần chạy
+
+        Nếu driver chính đã rời trang hoặc đã bị thay, DOM đã lưu được đọc lại qua ReplayDriver.
+        on_link(title, url) được gọi cho từng liên kết bài giảng xuất hiện trong lúc trang đang render.
+        """
+        page = self._course_page(course_url)
+        with page.lock:
+            if page.dom is not None:
+                driver = page.driver
+                if driver is not None and driver is self.driver and driver.current_url == page.rendered_url:
+                    return driver
+                driver = ReplayDriver(page)
+                driver.get(course_url)
+                return driver
+
+            driver = self._init_driver()
+            driver.get(course_url)
+            if on_link is None:
+                self._sleep(5)  # Đợi trang tải đầy đủ
+            else:
+                self._stream_rendered_links(driver, on_link, 5)
+
+            # Đợi các phần tử bài giảng xuất hiện
+            if not self.replay:
+                try:
+                    WebDriverWait(driver, 15).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, self.site.lecture_selector))
+                    )
+                except Exception:
+                    self._log("Hết thời gian chờ các phần tử bài giảng")
+            self._record_dom(course_url, driver)
+
+            page.dom = driver.page_source
+            page.driver = driver
+            page.rendered_url = driver.current_url
+            return driver
+
+    RENDERED_LINKS_SCRIPT = """
+        return Array.from(document.querySelectorAll(arguments[0])).map(
+            a => [a.href, (a.innerText || a.textContent || '').trim()]);
+    """
+
+    def _rendered_lecture_links(self, driver):
+        """(tiêu đề, URL) của các liên kết bài giảng đang có trong DOM, đọc bằng một lần gọi script"""
+        pairs = driver.execute_script(self.RENDERED_LINKS_SCRIPT, self.site.lecture_selector)
+        if pairs is None:
+            # ReplayDriver không chạy JavaScript
+            pairs = [(elem.get_attribute('href'), elem.text.strip())
+                     for elem in driver.find_elements(By.CSS_SELECTOR, self.site.lecture_selector)]
+        return [(title, href) for href, title in pairs
+                if self.site.is_lecture_link(href) and title and not self.site.skip_title(title)]
+
+    def _stream_rendered_links(self, driver, on_link, seconds, interval=0.5):
+        """Chờ trang render trong seconds giây, mỗi interval giây đưa các liên kết bài giảng mới cho on_link"""
+        seen = set()
+        deadline = time.monotonic() + (0 if self.replay else seconds)
+        while True:
+            try:
+                links = self._rendered_lecture_links(driver)
+            except Exception as e:
+                self._debug_log(f"Không đọc được liên kết bài giảng khi đang render: {e}")
+                links = []
+            for title, url in links:
+                if url not in seen:
+                    seen.add(url)
+                    on_link(title, url)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._cancel_event.wait(min(interval, remaining))
+            if self._cancel_event.is_set():
+                raise ExtractionCancelled()
 
     def _log(self, message):
         """In thông báo nếu chế độ verbose được bật"""
         if self.verbose:
-            print(message)
+            self.events.console(message)
 
     def _debug_log(self, message):
         """In thông báo debug nếu chế độ debug được bật"""
         if self.debug:
-            print(f"[DEBUG] {message}")
+            self.events.console(f"[DEBUG] {message}")
 
-    def _init_driver(self, worker_id=None):
+    def _init_driver(self, worker_id=None, page_load_strategy=None):
         """Khởi tạo trình duyệt Chrome"""
         # Nếu đang sử dụng lại driver và đã có driver chính
         if worker_id is None and self.reuse_driver and self.driver is not None:
             return self.driver
 
         # Nếu đang sử dụng lại driver cho worker và đã có driver cho worker này
-        if worker_id is not None and self.reuse_driver and worker_id in self.worker_drivers:
-            return self.worker_drivers[worker_id]
+        if worker_id is not None and self.reuse_driver:
+            with self._drivers_lock:
+                if worker_id in self.worker_drivers:
+                    return self.worker_drivers[worker_id]
+
+        if self._cancel_event.is_set():
+            raise ExtractionCancelled()
+
+        # Phát lại từ kho: không khởi động Chrome và không cần cookies
+        if self.replay:
+            driver = ReplayDriver(self.page_store)
+            if worker_id is None:
+                self.driver = driver
+            else:
+                with self._drivers_lock:
+                    self.worker_drivers[worker_id] = driver
+            return driver
+
+        # Chrome đang chạy đã đăng nhập sẵn: không cài driver, không khởi động, không nạp cookies
+        if self.attach:
+            driver = self._attach_chrome(page_load_strategy)
+            if worker_id is None:
+                self.driver = driver
+            else:
+                with self._drivers_lock:
+                    self.worker_drivers[worker_id] = driver
+            return driver
+
+        profile_dir = None
+        if self.profile_template is not None:
+            self._ensure_profile_template()
+            profile_dir = self.profile_template.clone()
 
+        try:
+            driver = self._create_chrome(page_load_strategy, profile_dir)
+        except Exception:
+            if profile_dir:
+                self.profile_template.discard(profile_dir)
+            raise
+
+        if profile_dir:
+            # Bản sao của profile mẫu đã đăng nhập sẵn, không cần nạp cookies
+            with self._drivers_lock:
+                self._profile_clones[driver] = profile_dir
+        elif self.cookies_file and os.path.exists(self.cookies_file):
+            # Tải cookies
+            self._load_cookies_to_driver(driver)
+
+        # Lưu driver
+        if worker_id is None:
+            self.driver = driver
+        else:
+            with self._drivers_lock:
+                self.worker_drivers[worker_id] = driver
+
+        return driver
+
+    def _create_chrome(self, page_load_strategy=None, user_data_dir=None):
+        """Khởi động một trình duyệt Chrome với các tùy chọn và giới hạn thời gian đã cấu hình"""
+        _require_selenium()
         chrome_options = Options()
+        if user_data_dir:
+            chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
         if self.headless:
             chrome_options.add_argument("--headless")
         chrome_options.add_argument("--no-sandbox")
@@ -105,24 +1729,220 @@ class HavamathExtractor:
         chrome_options.add_argument("--disable-logging")
         chrome_options.add_argument("--log-level=3")
 
+        if page_load_strategy:
+            chrome_options.page_load_strategy = page_load_strategy
+
+        # Các tab chạy nền không bị giảm tốc khi điều khiển nhiều tab cùng lúc
+        if self.tabs:
+            chrome_options.add_argument("--disable-background-timer-throttling")
+            chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+            chrome_options.add_argument("--disable-renderer-backgrounding")
+
         # Sử dụng webdriver-manager nếu có
         if WEBDRIVER_MANAGER_AVAILABLE:
             driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
         else:
             driver = webdriver.Chrome(options=chrome_options)
 
-        # Tải cookies
-        if self.cookies_file and os.path.exists(self.cookies_file):
-            self._load_cookies_to_driver(driver)
+        # Giới hạn thời gian tải trang và chạy script để một trang lỗi không giữ luồng mãi
+        if self.page_load_timeout:
+            driver.set_page_load_timeout(self.page_load_timeout)
+        if self.script_timeout:
+            driver.set_script_timeout(self.script_timeout)
 
-        # Lưu driver
-        if worker_id is None:
-            self.driver = driver
-        else:
-            self.worker_drivers[worker_id] = driver
+        self._install_video_hook(driver)
+        return driver
 
+    def _attach_chrome(self, page_load_strategy=None):
+        """Kết nối tới Chrome đang chạy qua cổng remote debugging (--attach) và mở một tab riêng"""
+        _require_selenium()
+        chrome_options = Options()
+        chrome_options.debugger_address = self.attach
+        if page_load_strategy:
+            chrome_options.page_load_strategy = page_load_strategy
+
+        driver = webdriver.Chrome(options=chrome_options)
+        with self._drivers_lock:
+            self._attached_tabs[driver] = []
+        # Không dùng tab của người vận hành; script theo dõi video được đăng ký cho tab mới
+        self._open_tab(driver)
+
+        if self.page_load_timeout:
+            driver.set_page_load_timeout(self.page_load_timeout)
+        if self.script_timeout:
+            driver.set_script_timeout(self.script_timeout)
+
+        self._install_video_hook(driver)
         return driver
 
+    def _open_tab(self, driver):
+        """Mở tab mới và chuyển sang tab đó; ghi nhận để chỉ đóng tab của mình khi dùng --attach"""
+        driver.switch_to.new_window('tab')
+        handle = driver.current_window_handle
+        with self._drivers_lock:
+            if driver in self._attached_tabs:
+                self._attached_tabs[driver].append(handle)
+        return handle
+
+    def _close_attached_tabs(self, driver):
+        """Đóng các tab do driver mở trong Chrome đang chạy sẵn, qua endpoint HTTP của DevTools
+
+        Không đi qua chromedriver nên vẫn đóng được khi driver đã bị dừng hoặc đang treo.
+        ID tab của chromedriver chính là ID target của DevTools.
+        """
+        with self._drivers_lock:
+            handles = self._attached_tabs.pop(driver, [])
+        if not handles:
+            return
+
+        import urllib.request
+
+        for handle in handles:
+            try:
+                urllib.request.urlopen(f"http://{self.attach}/json/close/{handle}", timeout=5).close()
+            except Exception as e:
+                self._debug_log(f"Không đóng được tab {handle}: {e}")
+
+    def _ensure_profile_template(self):
+        """Tạo profile mẫu (hoặc tạo lại khi file cookies mới hơn): nạp cookies và cache của trang chủ"""
+        template = self.profile_template
+        with self._profile_lock:
+            if template.is_fresh(self.cookies_file):
+                return
+
+            self._log(f"Đang tạo profile Chrome mẫu tại {template.path}...")
+            template.reset()
+            driver = self._create_chrome(user_data_dir=template.path)
+            try:
+                if self.cookies_file and os.path.exists(self.cookies_file):
+                    self._load_cookies_to_driver(driver)
+                # Tải lại trang chủ khi đã đăng nhập để cache các bundle JS/CSS
+                driver.get(self.site.base_url)
+                self._sleep(3)
+            finally:
+                # Đóng bình thường để Chrome ghi cookies và cache xuống đĩa
+                driver.quit()
+            template.mark_ready()
+
+    def _discard_profile(self, driver):
+        """Xóa bản sao profile của một trình duyệt đã đóng"""
+        with self._drivers_lock:
+            profile_dir = self._profile_clones.pop(driver, None)
+        if profile_dir:
+            self.profile_template.discard(profile_dir)
+
+    def _install_video_hook(self, driver):
+        """Đăng ký script theo dõi ID video cho mọi tài liệu mới của tab hiện tại (qua CDP)"""
+        if not self.video_hook or not hasattr(driver, 'execute_cdp_cmd'):
+            return False
+        try:
+            script = video_hook_script(self.site)
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': script})
+        except Exception as e:
+            self._debug_log(f"Không đăng ký được script theo dõi video: {e}")
+            return False
+        self._hooked_drivers.add(driver)
+        return True
+
+    def _read_video_hook(self, driver):
+        """Đọc ID video mà script theo dõi đã ghi nhận ({'id', 'method'}) hoặc None"""
+        found = driver.execute_script("return window.__havamathVideoId || null;")
+        return found if found and found.get('id') else None
+
+    def _wait_for_video_hook(self, driver, timeout):
+        """Chờ script theo dõi ghi nhận ID video, tối đa timeout giây; None nếu chưa có"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                found = self._read_video_hook(driver)
+            except TimeoutException:
+                found = None
+            except Exception as e:
+                self._debug_log(f"Không đọc được kết quả script theo dõi video: {e}")
+                return None
+            if found:
+                return found
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self._cancel_event.wait(min(0.1, remaining)):
+                raise ExtractionCancelled()
+
+    def _quit_worker_driver(self, worker_id):
+        """Đóng và gỡ driver của một worker"""
+        with self._drivers_lock:
+            driver = self.worker_drivers.pop(worker_id, None)
+            self._recycle_requested.discard(worker_id)
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            self._discard_profile(driver)
+            self._close_attached_tabs(driver)
+
+    def _on_lecture_timeout(self, worker_id, url):
+        """Watchdog: buộc dừng trình duyệt của worker bị quá hạn; worker sẽ tạo trình duyệt mới"""
+        with self._drivers_lock:
+            driver = self.worker_drivers.pop(worker_id, None)
+            self._recycle_requested.discard(worker_id)
+        self._log(f"  Quá hạn {self.watchdog.timeout}s khi xử lý {url}, đang thay trình duyệt của {worker_id}")
+        if driver is not None:
+            kill_driver(driver)
+            self._discard_profile(driver)
+            self._close_attached_tabs(driver)
+
+    def _worker_driver_items(self):
+        """Bản sao danh sách (worker_id, driver) an toàn giữa các luồng"""
+        with self._drivers_lock:
+            return list(self.worker_drivers.items())
+
+    def _live_driver_items(self):
+        """Mọi trình duyệt đang chạy: của các worker và trình duyệt chính dùng để tìm bài giảng"""
+        items = self._worker_driver_items()
+        driver = self.driver
+        if driver is not None and all(driver is not other for _, other in items):
+            items.append((self.MAIN_DRIVER_ID, driver))
+        return items
+
+    def _enforce_memory_budget(self, worker_id):
+        """Áp dụng giới hạn bộ nhớ giữa các bài giảng: tái tạo trình duyệt lớn nhất hoặc giảm worker"""
+        if self.memory_monitor.budget_bytes is None and self.adaptive is None:
+            return
+
+        usage = {}
+        if self.memory_monitor.budget_bytes is not None:
+            usage = self.memory_monitor.sample(self._live_driver_items())
+        budget = self.memory_monitor.budget_bytes
+
+        # Trình duyệt chính được tính vào tổng nhưng không bị tái tạo: nó có thể vẫn đang tìm bài giảng
+        worker_usage = {worker_id: rss for worker_id, rss in usage.items() if worker_id != self.MAIN_DRIVER_ID}
+        if self.memory_monitor.over_budget(usage) and worker_usage:
+            total_mb = sum(usage.values()) / (1024 * 1024)
+            largest = max(worker_usage, key=worker_usage.get)
+
+            # Chỉ worker sở hữu driver mới được đóng nó, các worker khác đánh dấu để tái tạo sau
+            with self._drivers_lock:
+                self._recycle_requested.add(largest)
+
+            # Nếu ngay cả các trình duyệt nhỏ nhất cũng không vừa giới hạn thì giảm số worker
+            smallest = min(worker_usage.values())
+            if smallest:
+                max_fit = max(1, int((budget - usage.get(self.MAIN_DRIVER_ID, 0)) // smallest))
+                if max_fit < self.limiter.limit:
+                    self._log(f"  Bộ nhớ {total_mb:.0f} MB vượt giới hạn, giảm số worker còn {max_fit}")
+                    self.limiter.set_limit(max_fit)
+
+            self._debug_log(f"Bộ nhớ {total_mb:.0f} MB vượt giới hạn, tái tạo trình duyệt {largest}")
+
+        with self._drivers_lock:
+            recycle = worker_id in self._recycle_requested
+
+        # Worker vượt giới hạn số lượng cũng trả lại trình duyệt trước khi tạm dừng
+        if recycle or self.limiter.over_limit():
+            self._quit_worker_driver(worker_id)
+
     def _load_cookies_to_requests(self):
         """Tải cookies vào requests session"""
         try:
@@ -142,6 +1962,111 @@ class HavamathExtractor:
             self._log(f"Lỗi khi tải cookies cho requests: {e}")
             return False
 
+    # Dấu hiệu đã bị đăng xuất: URL trang đăng nhập (theo hồ sơ trang), hoặc form mật khẩu
+    # trên trang không có nội dung bài giảng
+    LOGIN_FORM_PATTERN = re.compile(r'<input[^>]+type=["\']password["\']|<form[^>]+action=["\'][^"\']*(login|dang-nhap)',
+                                    re.IGNORECASE)
+    AUTH_COOKIE_PATTERN = re.compile(r'session|token|auth|remember', re.IGNORECASE)
+
+    def _cookie_expiry_status(self):
+        """(cookie đăng nhập đã hết hạn, cookie sẽ hết hạn trong 24 giờ tới) theo file cookies"""
+        try:
+            with open(self.cookies_file, 'r') as f:
+                cookies = json.load(f)
+        except (OSError, ValueError):
+            return [], []
+
+        now = time.time()
+        expired, expiring = [], []
+        for cookie in cookies:
+            expires = cookie.get('expirationDate', cookie.get('expiry'))
+            if expires is None or cookie.get('session') or not self.AUTH_COOKIE_PATTERN.search(cookie.get('name', '')):
+                continue
+            if expires <= now:
+                expired.append(cookie['name'])
+            elif expires - now < 86400:
+                expiring.append(cookie['name'])
+        return expired, expiring
+
+    def _logged_out_reason(self, url, html=None):
+        """Lý do cho thấy trang đang ở trạng thái chưa đăng nhập, None nếu không có dấu hiệu"""
+        if url and self.site.login_url_pattern.search(urlparse(url).path):
+            return f"chuyển hướng tới trang đăng nhập {url}"
+        if html and self.LOGIN_FORM_PATTERN.search(html) and self.site.lecture_marker not in html and 'youtu' not in html:
+            return "trang hiển thị form đăng nhập"
+        return None
+
+    def preflight_auth(self, probe_url):
+        """Kiểm tra nhanh trạng thái đăng nhập (hạn cookies và một yêu cầu HTTP); False nếu đã bị đăng xuất"""
+        if self.replay or not self.auth_check:
+            return True
+
+        # Chrome chạy sẵn giữ phiên đăng nhập riêng; trang bài giảng vẫn được kiểm tra trong _check_auth
+        if self.attach and not (self.cookies_file and os.path.exists(self.cookies_file)):
+            return True
+
+        if self.cookies_file and os.path.exists(self.cookies_file):
+            expired, expiring = self._cookie_expiry_status()
+            if expired:
+                return self._auth_failed(probe_url, f"cookie đăng nhập đã hết hạn: {', '.join(expired)}")
+            if expiring:
+                self._log(f"Cảnh báo: cookie đăng nhập sẽ hết hạn trong 24 giờ: {', '.join(expiring)}")
+
+        if not (BS4_AVAILABLE and self.session):
+            return True
+
+        try:
+            response = self.session.get(probe_url, timeout=15)
+        except Exception as e:
+            self._log(f"Cảnh báo: không kiểm tra được đăng nhập ({e}), tiếp tục")
+            return True
+
+        reason = self._logged_out_reason(response.url, response.text)
+        if reason is None and response.status_code in (401, 403):
+            reason = f"HTTP {response.status_code}"
+        if reason:
+            return self._auth_failed(probe_url, reason)
+
+        # Yêu cầu kiểm tra đã tải trang khóa học: các bước tìm bài giảng dùng lại HTML này
+        if response.status_code == 200:
+            page = self._course_page(probe_url)
+            with page.lock:
+                if not page.raw_loaded:
+                    page.raw, page.raw_loaded = response.text, True
+                    if self.page_store is not None:
+                        self.page_store.record(probe_url, 'raw', response.text)
+
+        self._debug_log(f"Kiểm tra đăng nhập: OK ({probe_url})")
+        return True
+
+    def _auth_failed(self, url, reason):
+        self.auth_lost = True
+        self.events.emit('auth_failed', url=url, reason=reason)
+        self._log(f"Lỗi: chưa đăng nhập ({reason}). Hãy xuất lại cookies rồi chạy lại, "
+                  f"hoặc dùng --skip-auth-check để bỏ qua kiểm tra")
+        return False
+
+    def _check_auth(self, driver, lecture_url, html=None, page_url=None):
+        """Dừng cả lần chạy ngay khi một trang bài giảng cho thấy đã bị đăng xuất
+
+        page_url là URL cuối cùng của trang khi tải không qua trình duyệt (driver là None).
+        """
+        if self.replay or not self.auth_check:
+            return
+        reason = self._logged_out_reason(page_url or driver.current_url, html)
+        if reason is None:
+            return
+
+        with self._auth_lock:
+            first = not self.auth_lost
+            self.auth_lost = True
+            self.interrupted = True
+        if first:
+            self.events.emit('auth_lost', url=lecture_url, reason=reason)
+            self._log(f"Lỗi: mất đăng nhập tại {lecture_url} ({reason}), dừng lần chạy và giữ kết quả đã có")
+            self.cancel()
+        raise AuthenticationLost(reason)
+
     def _clean_cookies(self, cookies):
         """Dọn dẹp cookies để tránh lỗi khi thêm vào Selenium"""
         cleaned_cookies = []
@@ -164,8 +2089,7 @@ class HavamathExtractor:
     def _load_cookies_to_driver(self, driver):
         """Tải cookies vào Selenium WebDriver"""
         # Truy cập domain trước
-        domain = 'havamath.vn'
-        driver.get(f"https://{domain}")
+        driver.get(self.site.base_url)
         time.sleep(2)  # Cho phép trang tải
 
         try:
@@ -208,22 +2132,150 @@ class HavamathExtractor:
         """Trả về thời gian hiện tại theo định dạng ISO 8601"""
         return datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
+    def _static_lecture_links(self, soup, course_url):
+        """Các liên kết bài giảng (phần tử, tiêu đề, URL đầy đủ) theo thứ tự trong tài liệu"""
+        links = []
+        for link in soup.select(self.site.lecture_selector):
+            title = link.get_text(strip=True)
+            if not title:
+                title_elem = link.find('span')
+                title = title_elem.get_text(strip=True) if title_elem else ''
+            # Bỏ qua các nút "Vào học"
+            if title and not self.site.skip_title(title):
+                url = urljoin(course_url, link['href'])
+                self.lecture_hints[canonical_lecture_url(url)] = self._link_type_hints(link)
+                links.append((link, title, url))
+        return links
+
+    @staticmethod
+    def _link_type_hints(link):
+        """Class, biểu tượng và nhãn của một liên kết bài giảng (cùng phần tử cha), dùng để đoán loại bài"""
+        hints = []
+        link_text = link.get_text(" ", strip=True)
+        for elem in [link.parent, link] + link.find_all(True):
+            if elem is None:
+                continue
+            hints.extend(elem.get('class') or [])
+            for attr in ('data-type', 'data-lesson-type', 'aria-label', 'alt', 'src'):
+                if elem.get(attr):
+                    hints.append(elem[attr])
+            # Nhãn nhỏ cạnh tiêu đề ("Quiz", "PDF"), không lấy phần tử chứa chính tiêu đề
+            if elem.name in ('span', 'small', 'i') and elem is not link:
+                text = elem.get_text(" ", strip=True)
+                if text and text != link_text:
+                    hints.append(text)
+        return ' '.join(hints)
+
+    def _is_static_chapter_title(self, elem):
+        """Phần tử có phải tiêu đề chương không (không chứa liên kết bài giảng, văn bản ngắn)"""
+        if elem.name in self.site.chapter_heading_tags:
+            pass
+        elif elem.name == 'div' and self.site.chapter_class_pattern.search(' '.join(elem.get('class') or [])):
+            pass
+        else:
+            return False
+
+        if elem.select_one(self.site.lecture_selector):
+            return False
+        text = elem.get_text(" ", strip=True)
+        return bool(text) and len(text) < 200
+
+    def _chapters_by_section(self, links):
+        """Phương pháp 1: nhóm bài giảng theo container chương gần nhất có tiêu đề riêng"""
+        result = []
+        headings = {}  # id(container) -> tiêu đề chương (hoặc None)
+        for link, title, url in links:
+            chapter = None
+            for parent in link.parents:
+                if parent.name in ('body', '[document]'):
+                    break
+                if not self.site.chapter_class_pattern.search(' '.join(parent.get('class') or [])):
+                    continue
+                if id(parent) not in headings:
+                    heading = next((elem for elem in parent.find_all(True) if self._is_static_chapter_title(elem)), None)
+                    headings[id(parent)] = heading.get_text(" ", strip=True) if heading is not None else None
+                chapter = headings[id(parent)]
+                if chapter is not None:
+                    break
+            if chapter is None:
+                return []
+            result.append({"title": title, "url": url, "chapter": chapter})
+        return result
+
+    def _chapters_by_position(self, soup, links):
+        """Phương pháp 2: gán bài giảng cho tiêu đề chương đứng gần nhất phía trước trong tài liệu"""
+        link_info = {id(link): (title, url) for link, title, url in links}
+        result = []
+        current_chapter = None
+        for elem in soup.find_all(True):
+            if id(elem) in link_info:
+                title, url = link_info[id(elem)]
+                result.append({"title": title, "url": url, "chapter": current_chapter})
+            elif self._is_static_chapter_title(elem):
+                current_chapter = elem.get_text(" ", strip=True)
+
+        # Không có tiêu đề nào đứng trước bài giảng thì coi như thất bại
+        if any(lecture["chapter"] is None for lecture in result):
+            return []
+        return result
+
+    def _chapters_by_title(self, links):
+        """Phương pháp 3: phân chương theo mẫu tiêu đề bài giảng (Chương 1, Phần 2, 1. ...)"""
+        result = []
+        current_chapter = None
+        for link, title, url in links:
+            if self.site.chapter_title_pattern.search(title.lower()):
+                current_chapter = title
+            result.append({"title": title, "url": url, "chapter": current_chapter or "Chưa phân loại"})
+        return result
+
+    def _extract_chapters_static(self, course_url, on_link=None):
+        """Trích xuất chương từ HTML tĩnh (không cần trình duyệt), trả về [] nếu không tìm thấy bài giảng
+
+        on_link(title, url) được gọi cho từng bài giảng ngay khi tìm thấy, trước khi phân chương.
+        """
+        if not (self.replay or (BS4_AVAILABLE and self.session)):
+            return []
+
+        soup = self._course_html(course_url).soup()
+        if soup is None:
+            return []
+
+        links = self._static_lecture_links(soup, course_url)
+        if not links:
+            return []
+        if on_link is not None:
+            for link, title, url in links:
+                on_link(title, url)
+
+        all_lectures = self._chapters_by_section(links) or self._chapters_by_position(soup, links) or \
+            self._chapters_by_title(links)
+
+        chapter_dict = {}
+        for lecture in all_lectures:
+            chapter_dict.setdefault(lecture["chapter"], {"title": lecture["chapter"], "lectures": []})
+            chapter_dict[lecture["chapter"]]["lectures"].append({"title": lecture["title"], "url": lecture["url"]})
+        self.chapters = list(chapter_dict.values())
+        return all_lectures
+
     def _extract_chapters(self, course_url):
         """Trích xuất thông tin các chương từ trang khóa học"""
         self._log("Đang trích xuất thông tin chương...")
 
-        driver = self._init_driver()
-        driver.get(course_url)
-        time.sleep(5)  # Đợi trang tải đầy đủ
+        # Thử phân tích HTML tĩnh trước, chỉ mở Chrome khi không tìm thấy bài giảng
+        all_lectures = self._extract_chapters_static(course_url)
+        if all_lectures:
+            self._debug_log(f"Phân tích HTML tĩnh: {len(all_lectures)} bài giảng, {len(self.chapters)} chương")
+            return all_lectures
+
+        driver = self._render_course_page(course_url)
 
         # Tìm các phần tử có thể là chương
         chapters = []
 
         try:
             # Phương pháp 1: Tìm các thẻ heading (h1, h2, h3, h4, h5) hoặc div có class chứa chapter, section, module
-            possible_chapter_elements = driver.find_elements(By.CSS_SELECTOR,
-                                                             "h1, h2, h3, h4, h5, div.chapter, div.section, div.module, div[class*='chapter'], " +
-                                                             "div[class*='section'], div[class*='module'], div[class*='course-section']")
+            possible_chapter_elements = driver.find_elements(By.CSS_SELECTOR, self.site.chapter_heading_selector)
 
             current_chapter = {"title": "Chương không xác định", "lectures": []}
 
@@ -234,11 +2286,9 @@ class HavamathExtractor:
 
                 # Kiểm tra xem đây có phải là tiêu đề chương không
                 is_chapter_title = (
-                        tag_name in ['h1', 'h2', 'h3', 'h4', 'h5'] or
-                        'chapter' in classes.lower() or
-                        'section' in classes.lower() or
-                        'module' in classes.lower() or
-                        bool(re.search(r'chương|phần|module|section|chapter', text.lower()))
+                        tag_name in self.site.chapter_heading_tags or
+                        bool(self.site.chapter_class_pattern.search(classes)) or
+                        bool(self.site.chapter_text_pattern.search(text.lower()))
                 )
 
                 if is_chapter_title and text and len(text) < 200:  # Một tiêu đề chương thường ngắn
@@ -258,12 +2308,12 @@ class HavamathExtractor:
 
             # Tìm các bài giảng và phân bổ vào chương
             all_lectures = []
-            lecture_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/learn/']")
+            lecture_elements = driver.find_elements(By.CSS_SELECTOR, self.site.lecture_selector)
 
             chapter_idx = 0
             for elem in lecture_elements:
                 href = elem.get_attribute('href')
-                if href and '/learn/' in href:
+                if self.site.is_lecture_link(href):
                     title = elem.text.strip()
                     if not title:
                         title_elem = elem.find_elements(By.TAG_NAME, 'span')
@@ -271,7 +2321,7 @@ class HavamathExtractor:
                             title = title_elem[0].text.strip()
 
                     # Bỏ qua các bài giảng "Vào học"
-                    if title and title != "Vào học":
+                    if title and not self.site.skip_title(title):
                         # Kiểm tra xem bài giảng này thuộc về chương nào
                         # Phương pháp đơn giản: gán bài giảng cho chương hiện tại
                         chapter_idx = min(chapter_idx, len(chapters) - 1)
@@ -295,20 +2345,20 @@ class HavamathExtractor:
                     chapter_data = driver.execute_script("""
                         // Hàm để tìm các phần tử có thể là chương
                         function findChapters() {
-                            // Tìm các phần tử có thể là container của chương
-                            const possibleContainers = Array.from(document.querySelectorAll(
-                                'div.course-content, div.curriculum, div.syllabus, div[class*="chapter"], ' +
-                                'div[class*="section"], div[class*="module"], div[class*="curriculum"]'
-                            ));
+                            // Tìm các phần tử có thể là bài giảng
+                            const possibleLectures = Array.from(document.querySelectorAll(arguments[0]));
 
-                            // Tìm các phần tử có thể là tiêu đề chương
-                            const possibleHeadings = Array.from(document.querySelectorAll(
-                                'h1, h2, h3, h4, h5, div.chapter-heading, div.section-heading, ' +
-                                'div[class*="chapter-title"], div[class*="section-title"]'
-                            ));
+                            // Container của chương (selector từ hồ sơ trang): chọn container trong cùng chứa
+                            // mọi bài giảng để tiêu đề ngoài danh sách (tên khóa học...) không thành chương
+                            const possibleContainers = arguments[2] ?
+                                Array.from(document.querySelectorAll(arguments[2])) : [];
+                            const scope = possibleContainers.filter(
+                                container => possibleLectures.every(lecture => container.contains(lecture))
+                            ).pop() || document;
 
-                            // Tìm các phần tử có thể là bài giảng
-                            const possibleLectures = Array.from(document.querySelectorAll('a[href*="/learn/"]'));
+                            // Tìm các phần tử có thể là tiêu đề chương
+                            const possibleHeadings = Array.from(scope.querySelectorAll(arguments[3]));
+                            const chapterTitlePattern = new RegExp(arguments[4]);
 
                             // Phân tích cấu trúc để xác định chương và bài giảng
                             const chapters = [];
@@ -343,9 +2393,19 @@ class HavamathExtractor:
                                 const title = lecture.textContent.trim();
                                 const url = lecture.href;
 
-                                if (title && title !== "Vào học") {
+                                if (title && arguments[1].indexOf(title) === -1) {
                                     chapterIdx = Math.min(chapterIdx, chapters.length - 1);
 
+                                    // Bài giảng có tiêu đề dạng chương (Chương 1, Phần 2, 1. ...) mở chương mới
+                                    if (chapterTitlePattern.test(title.toLowerCase()) &&
+                                            title !== chapters[chapterIdx].title) {
+                                        const next = chapters[chapterIdx + 1];
+                                        if (!next || next.title !== title) {
+                                            chapters.splice(chapterIdx + 1, 0, { title: title, lectures: [] });
+                                        }
+                                        chapterIdx++;
+                                    }
+
                                     chapters[chapterIdx].lectures.push({
                                         title: title,
                                         url: url
@@ -368,7 +2428,8 @@ class HavamathExtractor:
                         }
 
                         return findChapters();
-                    """)
+                    """, self.site.lecture_selector, sorted(self.site.skip_titles), self.site.chapter_container_selector,
+                        self.site.chapter_script_heading_selector, self.site.chapter_title_pattern.pattern)
 
                     if chapter_data and 'allLectures' in chapter_data and chapter_data['allLectures']:
                         all_lectures = chapter_data['allLectures']
@@ -380,11 +2441,11 @@ class HavamathExtractor:
             if not all_lectures:
                 # Lấy tất cả bài giảng
                 lectures = []
-                lecture_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/learn/']")
+                lecture_elements = driver.find_elements(By.CSS_SELECTOR, self.site.lecture_selector)
 
                 for elem in lecture_elements:
                     href = elem.get_attribute('href')
-                    if href and '/learn/' in href:
+                    if self.site.is_lecture_link(href):
                         title = elem.text.strip()
                         if not title:
                             title_elem = elem.find_elements(By.TAG_NAME, 'span')
@@ -392,7 +2453,7 @@ class HavamathExtractor:
                                 title = title_elem[0].text.strip()
 
                         # Bỏ qua các bài giảng "Vào học"
-                        if title and title != "Vào học":
+                        if title and not self.site.skip_title(title):
                             lectures.append({
                                 "title": title,
                                 "url": href
@@ -407,7 +2468,7 @@ class HavamathExtractor:
                         title = lecture["title"]
 
                         # Kiểm tra xem đây có phải là tiêu đề chương mới không
-                        is_chapter_title = bool(re.search(r'^(chương|phần|module|bài)\s+\d+|^\d+\.\s+', title.lower()))
+                        is_chapter_title = bool(self.site.chapter_title_pattern.search(title.lower()))
 
                         if is_chapter_title:
                             current_chapter = title
@@ -485,29 +2546,21 @@ class HavamathExtractor:
             # Phương pháp 1: Thử dùng requests nếu có BeautifulSoup
             lectures = []
 
-            if BS4_AVAILABLE and self.session:
+            if self.replay or (BS4_AVAILABLE and self.session):
                 self._log("Đang thử lấy danh sách bài giảng bằng requests...")
 
-                response = self.session.get(course_url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-
+                soup = self._course_html(course_url).soup()
+                if soup is not None:
                     # Tìm các liên kết bài giảng
-                    lecture_links = soup.select('a[href*="/learn/"]')
+                    lecture_links = soup.select(self.site.lecture_selector)
 
                     if lecture_links:
                         position = 1
                         for link in lecture_links:
                             href = link.get('href', '')
-                            if '/learn/' in href:
+                            if self.site.is_lecture_link(href):
                                 # Đảm bảo URL đầy đủ
-                                if not href.startswith('http'):
-                                    if href.startswith('/'):
-                                        lecture_url = f"https://havamath.vn{href}"
-                                    else:
-                                        lecture_url = f"https://havamath.vn/{href}"
-                                else:
-                                    lecture_url = href
+                                lecture_url = self.site.absolute_url(href)
 
                                 # Lấy tiêu đề từ text của link hoặc các phần tử lân cận
                                 title = link.get_text(strip=True)
@@ -516,7 +2569,7 @@ class HavamathExtractor:
                                     title = title_elem.get_text(strip=True) if title_elem else f"Bài giảng {position}"
 
                                 # Bỏ qua các bài giảng "Vào học"
-                                if title == "Vào học":
+                                if self.site.skip_title(title):
                                     continue
 
                                 # Thêm vào danh sách
@@ -535,26 +2588,16 @@ class HavamathExtractor:
             # Phương pháp 2: Nếu không tìm thấy bằng requests, dùng Selenium
             if not lectures:
                 self._log("Đang sử dụng Selenium để lấy danh sách bài giảng...")
-                driver = self._init_driver()
-
-                driver.get(course_url)
-                time.sleep(5)  # Đợi trang tải đầy đủ
-
-                # Đợi các phần tử bài giảng xuất hiện
-                try:
-                    WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/learn/']"))
-                    )
-                except:
-                    self._log("Hết thời gian chờ các phần tử bài giảng")
+                # Trang đã render khi phân chương được dùng lại, không tải và chờ lần nữa
+                driver = self._render_course_page(course_url)
 
                 # Tìm lại các liên kết bài giảng
-                lecture_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/learn/']")
+                lecture_elements = driver.find_elements(By.CSS_SELECTOR, self.site.lecture_selector)
 
                 position = 1
                 for elem in lecture_elements:
                     href = elem.get_attribute('href')
-                    if href and '/learn/' in href:
+                    if self.site.is_lecture_link(href):
                         title = elem.text.strip()
                         if not title:
                             # Tìm tiêu đề trong các phần tử con
@@ -565,7 +2608,7 @@ class HavamathExtractor:
                                 title = f"Bài giảng {position}"
 
                         # Bỏ qua các bài giảng "Vào học"
-                        if title == "Vào học":
+                        if self.site.skip_title(title):
                             continue
 
                         # Thêm vào danh sách
@@ -602,13 +2645,12 @@ class HavamathExtractor:
     def _classify_lectures_by_title(self, lectures):
         """Phân loại bài giảng vào chương dựa trên tiêu đề"""
         current_chapter = "Chưa phân loại"
-        chapter_pattern = re.compile(r'^(chương|phần|module|unit|section|bài)\s+\d+|^\d+\.\s+', re.IGNORECASE)
 
         for lecture in lectures:
             title = lecture.get("Lecture Title", "")
 
             # Kiểm tra xem đây có phải là tiêu đề chương mới không
-            if chapter_pattern.search(title):
+            if self.site.chapter_title_pattern.search(title.lower()):
                 current_chapter = title
 
             lecture["Chapter"] = current_chapter
@@ -617,209 +2659,651 @@ class HavamathExtractor:
         """Trích xuất URL YouTube từ trang bài giảng"""
         driver = self._init_driver(worker_id)
 
+        self._local.method = None
+        self._local.timings = {}
+        self._local.error = None
+
         try:
-            driver.get(lecture_url)
-            time.sleep(self.wait_time)  # Đợi trang tải với thời gian chờ cấu hình
+            started = time.monotonic()
+            try:
+                driver.get(lecture_url)
+            except TimeoutException:
+                # Trang tải quá lâu: dừng tải và quét phần đã có
+                self._debug_log(f"Hết thời gian tải trang {lecture_url}, quét nội dung đã tải")
+                driver.execute_script("window.stop();")
+            self._check_auth(driver, lecture_url)
+
+            # Có script theo dõi: trả về ngay khi ID xuất hiện, thời gian chờ chỉ là giới hạn trên
+            found = None
+            if driver in self._hooked_drivers:
+                found = self._wait_for_video_hook(driver, self.wait_time)
+            else:
+                self._sleep(self.wait_time)  # Đợi trang tải với thời gian chờ cấu hình
+            self._record_dom(lecture_url, driver)
+            loaded = time.monotonic()
 
-            # Phương pháp 1: Tìm iframe YouTube
-            youtube_iframes = driver.find_elements(By.CSS_SELECTOR, "iframe[src*='youtube']")
-            for iframe in youtube_iframes:
+            if found:
+                youtube_url = self._found_youtube_id(found['id'], f"hook:{found['method']}")
+            else:
+                youtube_url = self._scan_youtube_url(driver)
+                if youtube_url is None:
+                    # Trang không có video: kiểm tra có phải trang yêu cầu đăng nhập không
+                    self._check_auth(driver, lecture_url, driver.page_source)
+            self._local.timings = {"load_s": round(loaded - started, 3),
+                                   "scan_s": round(time.monotonic() - loaded, 3)}
+            return youtube_url
+
+        except ExtractionCancelled:
+            return None
+        except Exception as e:
+            self._local.error = str(e)
+            self._log(f"Lỗi khi trích xuất URL YouTube từ {lecture_url}: {e}")
+            if self.debug:
+                traceback.print_exc()
+            return None
+        finally:
+            # Nếu không sử dụng lại driver, đóng driver
+            if not self.reuse_driver and worker_id is not None:
+                self._quit_worker_driver(worker_id)
+
+    def _scan_youtube_url(self, driver):
+        """Tìm URL YouTube trong trang hiện tại của driver (trang đã tải xong)"""
+        self._local.method = None
+        site = self.site
+        # Phương pháp 1: Tìm iframe YouTube
+        if site.uses('iframe'):
+            for iframe in driver.find_elements(By.CSS_SELECTOR, site.iframe_selector):
                 src = iframe.get_attribute("src")
-                if src and 'youtube.com' in src:
-                    youtube_id = self._extract_youtube_id(src)
-                    if youtube_id:
-                        return f"https://youtu.be/{youtube_id}"
-
-            # Phương pháp 2: Tìm div có thuộc tính data-youtube-id
-            youtube_divs = driver.find_elements(By.CSS_SELECTOR, "[data-youtube-id]")
-            for div in youtube_divs:
-                youtube_id = div.get_attribute("data-youtube-id")
+                youtube_id = self._extract_youtube_id(src) if src else None
+                if youtube_id:
+                    return self._found_youtube_id(youtube_id, 'iframe')
+
+        # Phương pháp 2: Tìm div có thuộc tính data-youtube-id
+        if site.uses('data-youtube-id'):
+            for div in driver.find_elements(By.CSS_SELECTOR, f"[{site.data_attribute}]"):
+                youtube_id = div.get_attribute(site.data_attribute)
                 if youtube_id:
-                    return f"https://youtu.be/{youtube_id}"
+                    return self._found_youtube_id(youtube_id, 'data-youtube-id')
 
-            # Phương pháp 3: Tìm liên kết YouTube
-            youtube_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='youtube.com'], a[href*='youtu.be']")
-            for link in youtube_links:
+        # Phương pháp 3: Tìm liên kết YouTube
+        if site.uses('link'):
+            for link in driver.find_elements(By.CSS_SELECTOR, site.link_selector):
                 href = link.get_attribute("href")
-                if href and ('youtube.com' in href or 'youtu.be' in href):
-                    youtube_id = self._extract_youtube_id(href)
-                    if youtube_id:
-                        return f"https://youtu.be/{youtube_id}"
-
-            # Phương pháp 4: Tìm trong nguồn trang
-            page_source = driver.page_source
-
-            # Kiểm tra xem có từ khóa YouTube không
-            if "youtube.com/embed" in page_source or "youtu.be" in page_source:
-                patterns = [
-                    r'https://youtu\.be/([a-zA-Z0-9_-]{11})',
-                    r'https://www\.youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})',
-                    r'https://www\.youtube\.com/embed/([a-zA-Z0-9_-]{11})',
-                    r'youtube\.com/embed/([a-zA-Z0-9_-]{11})',
-                    r'youtube_id["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-                    r'youtubeId["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-                    r'videoId["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-                    r'video-id="([a-zA-Z0-9_-]{11})"',
-                    r'data-video-id="([a-zA-Z0-9_-]{11})"',
-                    r'youtube\.com/v/([a-zA-Z0-9_-]{11})',
-                    r'youtube\.com/vi/([a-zA-Z0-9_-]{11})',
-                    r'/embed/([a-zA-Z0-9_-]{11})',
-                    r'youtu\.be/([a-zA-Z0-9_-]{11})',
-                    r'data-youtube-id="([a-zA-Z0-9_-]{11})"',
-                ]
-
-                for pattern in patterns:
-                    matches = re.findall(pattern, page_source)
-                    if matches:
-                        youtube_id = matches[0]
-                        return f"https://youtu.be/{youtube_id}"
-
-            # Phương pháp 5: Tìm bằng JavaScript
-            try:
-                youtube_elements = driver.execute_script("""
-                    // Tìm tất cả phần tử có thuộc tính chứa youtube
-                    var elements = Array.from(document.querySelectorAll('*')).filter(
-                        el => {
-                            for (var i = 0; i < el.attributes.length; i++) {
-                                var attr = el.attributes[i];
-                                if (attr.value && (
-                                    attr.value.includes('youtube.com') || 
-                                    attr.value.includes('youtu.be') || 
-                                    attr.value.match(/[a-zA-Z0-9_-]{11}/)
-                                )) {
-                                    return true;
-                                }
-                            }
+                youtube_id = self._extract_youtube_id(href) if href else None
+                if youtube_id:
+                    return self._found_youtube_id(youtube_id, 'link')
 
-                            // Kiểm tra cả các phần tử iframe 
-                            if (el.tagName === 'IFRAME' && el.src && 
-                                (el.src.includes('youtube.com') || el.src.includes('youtu.be'))) {
+        # Phương pháp 4: Tìm trong nguồn trang (chỉ chạy regex khi có từ khóa YouTube)
+        if site.uses('page-source'):
+            youtube_id = site.video_id_from_page(driver.page_source)
+            if youtube_id:
+                return self._found_youtube_id(youtube_id, 'page-source')
+
+        if not site.uses('javascript'):
+            return None
+
+        # Phương pháp 5: Tìm bằng JavaScript
+        try:
+            youtube_elements = driver.execute_script("""
+                // Tìm tất cả phần tử có thuộc tính chứa youtube hoặc chuỗi giống ID video (mẫu từ hồ sơ trang)
+                var idPattern = new RegExp(arguments[0]);
+                var elements = Array.from(document.querySelectorAll('*')).filter(
+                    el => {
+                        for (var i = 0; i < el.attributes.length; i++) {
+                            var attr = el.attributes[i];
+                            if (attr.value && (
+                                attr.value.includes('youtube.com') || 
+                                attr.value.includes('youtu.be') || 
+                                idPattern.test(attr.value)
+                            )) {
                                 return true;
                             }
-
-                            return false;
                         }
-                    );
 
-                    var result = {};
+                        // Kiểm tra cả các phần tử iframe 
+                        if (el.tagName === 'IFRAME' && el.src && 
+                            (el.src.includes('youtube.com') || el.src.includes('youtu.be'))) {
+                            return true;
+                        }
 
-                    // Lấy thông tin từ các phần tử
-                    if (elements.length > 0) {
-                        result.elements = elements.map(e => {
-                            var info = { tagName: e.tagName };
+                        return false;
+                    }
+                );
 
-                            // Lấy src nếu là iframe
-                            if (e.tagName === 'IFRAME' && e.src) {
-                                info.src = e.src;
-                            }
+                var result = {};
 
-                            // Lấy các thuộc tính khác liên quan đến YouTube
-                            for (var i = 0; i < e.attributes.length; i++) {
-                                var attr = e.attributes[i];
-                                if (attr.value && (
-                                    attr.value.includes('youtube.com') || 
-                                    attr.value.includes('youtu.be') || 
-                                    attr.value.match(/[a-zA-Z0-9_-]{11}/)
-                                )) {
-                                    info[attr.name] = attr.value;
-                                }
-                            }
+                // Lấy thông tin từ các phần tử
+                if (elements.length > 0) {
+                    result.elements = elements.map(e => {
+                        var info = { tagName: e.tagName };
 
-                            return info;
-                        });
-                    }
+                        // Lấy src nếu là iframe
+                        if (e.tagName === 'IFRAME' && e.src) {
+                            info.src = e.src;
+                        }
 
-                    return result;
-                """)
-
-                if youtube_elements and 'elements' in youtube_elements:
-                    for element in youtube_elements['elements']:
-                        # Kiểm tra các thuộc tính
-                        for key, value in element.items():
-                            if key != 'tagName':
-                                youtube_id = self._extract_youtube_id(value)
-                                if youtube_id:
-                                    return f"https://youtu.be/{youtube_id}"
-            except Exception as e:
-                if self.debug:
-                    self._debug_log(f"Lỗi khi chạy JavaScript để tìm YouTube: {e}")
+                        // Lấy các thuộc tính khác liên quan đến YouTube
+                        for (var i = 0; i < e.attributes.length; i++) {
+                            var attr = e.attributes[i];
+                            if (attr.value && (
+                                attr.value.includes('youtube.com') || 
+                                attr.value.includes('youtu.be') || 
+                                idPattern.test(attr.value)
+                            )) {
+                                info[attr.name] = attr.value;
+                            }
+                        }
 
-            return None
+                        return info;
+                    });
+                }
 
+                return result;
+            """, site.video_id_source)
+
+            if youtube_elements and 'elements' in youtube_elements:
+                for element in youtube_elements['elements']:
+                    # Kiểm tra các thuộc tính
+                    for key, value in element.items():
+                        if key != 'tagName':
+                            youtube_id = self._extract_youtube_id(value)
+                            if youtube_id:
+                                return self._found_youtube_id(youtube_id, 'javascript')
         except Exception as e:
-            self._log(f"Lỗi khi trích xuất URL YouTube từ {lecture_url}: {e}")
             if self.debug:
-                traceback.print_exc()
-            return None
-        finally:
-            # Nếu không sử dụng lại driver, đóng driver
-            if not self.reuse_driver and worker_id is not None:
-                if worker_id in self.worker_drivers:
-                    self.worker_drivers[worker_id].quit()
-                    del self.worker_drivers[worker_id]
+                self._debug_log(f"Lỗi khi chạy JavaScript để tìm YouTube: {e}")
+
+        return None
+
+    def _found_youtube_id(self, youtube_id, method):
+        """Ghi nhận phương pháp đã tìm thấy ID (cho nhật ký sự kiện) và trả về URL YouTube"""
+        self._local.method = method
+        return self.site.video_url(youtube_id)
 
     def _extract_youtube_id(self, url):
         """Trích xuất ID YouTube từ URL"""
         if not url:
             return None
 
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})',
-            r'youtube_id["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-            r'youtubeId["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-            r'videoId["\s:=]+["\']([a-zA-Z0-9_-]{11})',
-            r'video-id="([a-zA-Z0-9_-]{11})"',
-            r'data-video-id="([a-zA-Z0-9_-]{11})"',
-            r'youtube\.com/v/([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/vi/([a-zA-Z0-9_-]{11})',
-            r'youtu\.be/([a-zA-Z0-9_-]{11})',
-            r'data-youtube-id="([a-zA-Z0-9_-]{11})"',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+        youtube_id = self.site.video_id_from_url(url)
+        if youtube_id:
+            return youtube_id
 
         # Nếu không khớp với pattern nào, kiểm tra xem URL có phải là ID YouTube không
-        if re.match(r'^[a-zA-Z0-9_-]{11}$', url):
+        if self.site.is_video_id(url):
             return url
 
         return None
 
     def process_lecture(self, lecture, index, total):
         """Xử lý một bài giảng"""
+        browsed = False
         try:
-            worker_id = f"worker-{index}"
+            # Mỗi luồng giữ một driver riêng, nên số trình duyệt không vượt quá --threads
+            worker_id = threading.current_thread().name
             lecture_url = lecture.get('Lecture Link')
             title = lecture.get('Lecture Title', f"Bài giảng {index + 1}")
 
             if not lecture_url:
+                self.events.emit('lecture_skipped', index=index, title=title, url=None, reason='no_link')
+                return lecture
+
+            # Không bắt đầu bài giảng mới khi đã bị hủy
+            if self._cancel_event.is_set():
                 return lecture
 
             self._log(f"[{index + 1}/{total}] Đang xử lý: {title}")
 
             # Nếu đã có Video URL và không phải rỗng, bỏ qua
-            if lecture.get('Video URL') and lecture.get('Video URL').startswith('https://youtu.be/'):
+            if self.site.is_video_url(lecture.get('Video URL')):
                 self._log(f"  Đã có URL YouTube: {lecture.get('Video URL')}")
+                self.events.emit('lecture_skipped', index=index, title=title, url=lecture_url, reason='has_video')
                 return lecture
 
-            youtube_url = self.extract_youtube_url(lecture_url, worker_id)
+            # Bài không có video không chiếm trình duyệt: bỏ qua, hoặc chỉ kiểm tra HTML qua HTTP
+            reason = self._non_video_reason(lecture)
+            if reason and self.non_video == 'skip':
+                return self._skip_non_video(lecture, index, reason)
+            http_only = bool(reason) and self.non_video == 'http'
+
+            # Thời gian bài giảng tính từ lúc có chỗ: thời gian chờ trong limiter không được đưa vào
+            # độ trễ của bộ điều khiển tự điều chỉnh, nếu không giảm worker sẽ làm độ trễ tăng thêm
+            queued = time.monotonic()
+            self.limiter.acquire()
+            started = time.monotonic()
+            browsed = not http_only
+            self.events.emit('lecture_start', index=index, title=title, url=lecture_url, worker=worker_id,
+                             wait_s=round(started - queued, 3))
+
+            self.watchdog.begin(worker_id, lecture_url)
+            try:
+                if http_only:
+                    youtube_url = self._http_youtube_url(lecture_url)
+                else:
+                    youtube_url = self.extract_youtube_url(lecture_url, worker_id)
+            finally:
+                timed_out = self.watchdog.end(worker_id)
+                self.limiter.release()
 
-            if youtube_url:
-                lecture['Video URL'] = youtube_url
-                self._log(f"  Đã tìm thấy URL YouTube: {youtube_url}")
-            else:
+            # Bài giảng bị ngắt giữa chừng giữ nguyên dữ liệu cũ để lần chạy sau xử lý lại
+            if self._cancel_event.is_set():
+                return lecture
+
+            if self.adaptive is not None:
+                outcome = 'timeout' if timed_out else ('error' if getattr(self._local, 'error', None) else 'ok')
+                self.adaptive.record(time.monotonic() - started, outcome)
+
+            if timed_out:
                 lecture['Video URL'] = ""
-                self._log("  Không tìm thấy URL YouTube")
+                lecture['Extract Status'] = 'timeout'
+                self.events.emit('lecture_timeout', index=index, title=title, url=lecture_url, worker=worker_id,
+                                 duration_s=round(time.monotonic() - started, 3))
+                return lecture
+
+            error = getattr(self._local, 'error', None)
+            if http_only and not youtube_url and not error:
+                return self._skip_non_video(lecture, index, reason)
 
+            self._apply_youtube_url(lecture, youtube_url, error)
+            if error and not youtube_url:
+                # Trang không tải/quét được: báo lỗi, không coi là "không có video"
+                self.events.emit('lecture_error', index=index, url=lecture_url, worker=worker_id, error=error,
+                                 duration_s=round(time.monotonic() - started, 3))
+                return lecture
+            self.events.emit('lecture_finish', index=index, title=title, url=lecture_url, worker=worker_id,
+                             video_url=youtube_url or "", found=bool(youtube_url),
+                             method=getattr(self._local, 'method', None),
+                             duration_s=round(time.monotonic() - started, 3),
+                             **getattr(self._local, 'timings', {}))
             return lecture
         except Exception as e:
+            lecture['Extract Status'] = 'error'
+            self.events.emit('lecture_error', index=index, url=lecture.get('Lecture Link'), error=str(e))
             self._log(f"Lỗi khi xử lý bài giảng: {e}")
             if self.debug:
                 traceback.print_exc()
             # Trả về lecture gốc nếu có lỗi
             return lecture
+        finally:
+            # Giới hạn bộ nhớ áp dụng sau mọi bài giảng đã mở trình duyệt, kể cả khi quá hạn hoặc lỗi
+            if browsed and not self._cancel_event.is_set():
+                try:
+                    self._enforce_memory_budget(worker_id)
+                except Exception as e:
+                    self._debug_log(f"Lỗi khi áp dụng giới hạn bộ nhớ: {e}")
+
+    def _apply_youtube_url(self, lecture, youtube_url, error=None):
+        """Ghi URL YouTube (hoặc chuỗi rỗng) vào bài giảng
+
+        Chỉ lần quét sạch lỗi mà không thấy video mới là not_found và được ghi vào cache;
+        có lỗi (trình duyệt hỏng, mất phiên...) thì đánh dấu error để lần sau thử lại.
+        """
+        if youtube_url:
+            lecture['Video URL'] = youtube_url
+            lecture['Extract Status'] = 'found'
+            self._log(f"  Đã tìm thấy URL YouTube: {youtube_url}")
+            if self.no_video_cache is not None:
+                self.no_video_cache.discard(lecture['Lecture Link'])
+        elif error:
+            lecture['Video URL'] = ""
+            lecture['Extract Status'] = 'error'
+        else:
+            lecture['Video URL'] = ""
+            lecture['Extract Status'] = 'not_found'
+            self._log("  Không tìm thấy URL YouTube")
+            if self.no_video_cache is not None:
+                self.no_video_cache.add(lecture['Lecture Link'], lecture.get('Lecture Title'))
+
+    def _non_video_reason(self, lecture):
+        """Lý do đoán bài giảng không có video ('cache', 'title', 'hint'), None nếu là bài video bình thường"""
+        url = lecture.get('Lecture Link')
+        if self.no_video_cache is not None and url in self.no_video_cache:
+            return 'cache'
+        hints = ' '.join([self.lecture_hints.get(canonical_lecture_url(url), ''),
+                          lecture.get('Task Link') or '', urlparse(url).path])
+        return self.site.non_video_reason(lecture.get('Lecture Title', ''), hints)
+
+    def _http_youtube_url(self, lecture_url):
+        """Tìm ID video trong HTML thô của trang bài giảng (--non-video http), không dùng trình duyệt"""
+        self._local.method = None
+        self._local.timings = {}
+        self._local.error = None
+        try:
+            started = time.monotonic()
+            if self.replay:
+                page_url, html = lecture_url, self.page_store.load(lecture_url, 'raw')
+            elif BS4_AVAILABLE and self.session:
+                response = self.session.get(lecture_url, timeout=self.page_load_timeout)
+                page_url, html = response.url, response.text
+                if response.status_code == 200 and self.page_store is not None:
+                    self.page_store.record(lecture_url, 'raw', html)
+            else:
+                return None
+            self._check_auth(None, lecture_url, html, page_url=page_url)
+
+            youtube_id = self.site.video_id_from_page(html) if html else None
+            self._local.timings = {"load_s": round(time.monotonic() - started, 3)}
+            return self._found_youtube_id(youtube_id, 'http') if youtube_id else None
+        except ExtractionCancelled:
+            return None
+        except Exception as e:
+            self._local.error = str(e)
+            self._log(f"Lỗi khi kiểm tra {lecture_url} qua HTTP: {e}")
+            return None
+
+    def _skip_non_video(self, lecture, index, reason):
+        """Đánh dấu bài giảng là không có video mà không mở trong trình duyệt"""
+        lecture['Video URL'] = ""
+        lecture['Extract Status'] = 'skipped'
+        self._log(f"  Bỏ qua: không phải bài video ({reason})")
+        self.events.emit('lecture_skipped', index=index, title=lecture.get('Lecture Title'),
+                         url=lecture['Lecture Link'], reason=reason)
+        return lecture
+
+    def _handle_non_video(self, lecture, index, reason):
+        """Bài không có video ở chế độ tab: kiểm tra HTML qua HTTP (--non-video http) hoặc bỏ qua, không chiếm tab"""
+        if self.non_video == 'http':
+            started = time.monotonic()
+            lecture_url = lecture['Lecture Link']
+            youtube_url = self._http_youtube_url(lecture_url)
+            error = self._local.error
+            if youtube_url or error:
+                self._apply_youtube_url(lecture, youtube_url, error)
+                if error:
+                    self.events.emit('lecture_error', index=index, url=lecture_url, error=error)
+                else:
+                    self.events.emit('lecture_finish', index=index, title=lecture.get('Lecture Title'),
+                                     url=lecture_url, worker='http', video_url=youtube_url, found=True,
+                                     method='http', duration_s=round(time.monotonic() - started, 3))
+                return lecture
+        return self._skip_non_video(lecture, index, reason)
+
+    def _needs_video(self, lecture):
+        """Bài giảng có link và chưa có URL YouTube"""
+        return bool(lecture.get('Lecture Link')) and not (
+            self.site.is_video_url(lecture.get('Video URL')))
+
+    def update_lecture_data_with_videos(self, lecture_data):
+        """Cập nhật URL YouTube bằng chế độ nhiều tab hoặc nhiều luồng tùy cấu hình"""
+        if self.task_queue is not None:
+            return self.update_lecture_data_with_videos_distributed(lecture_data)
+        if self.tabs:
+            return self.update_lecture_data_with_videos_tabs(lecture_data)
+        return self.update_lecture_data_with_videos_multithreaded(lecture_data)
+
+    def update_lecture_data_with_videos_tabs(self, lecture_data):
+        """Cập nhật dữ liệu bài giảng với URL YouTube dùng nhiều tab trong một trình duyệt
+
+        Trình duyệt chạy với page load strategy 'none' nên lệnh điều hướng trả về ngay;
+        các tab tải trang song song, thời gian chờ của mỗi tab tính từ lúc trang có DOM
+        và tab quá --lecture-timeout được ghi là timeout.
+        Tất cả các tab dùng chung cookies và bộ nhớ đệm HTTP.
+        """
+        if not lecture_data or 'data' not in lecture_data:
+            self._log("Lỗi: Dữ liệu bài giảng không hợp lệ")
+            return lecture_data
+
+        lectures = lecture_data['data']
+        total = len(lectures)
+        self._log(f"Đang trích xuất URL YouTube cho {total} bài giảng với {self.tabs} tab...")
+
+        pending = deque()
+        for i, lecture in enumerate(lectures):
+            if not lecture.get('Lecture Link'):
+                continue
+            if not self._needs_video(lecture):
+                self._log(f"[{i + 1}/{total}] Đã có URL YouTube: {lecture.get('Video URL')}")
+                continue
+            reason = self._non_video_reason(lecture)
+            if reason and self.non_video != 'browse':
+                self._handle_non_video(lecture, i, reason)
+                continue
+            pending.append(i)
+
+        if not pending:
+            return lecture_data
+
+        driver = self._init_driver('tabs', page_load_strategy='none')
+        self.memory_monitor.start(self._live_driver_items)
+
+        try:
+            handles = [driver.current_window_handle]
+            while len(handles) < min(self.tabs, len(pending)):
+                handles.append(self._open_tab(driver))
+                # Script theo dõi được đăng ký theo từng tab
+                if driver in self._hooked_drivers:
+                    self._install_video_hook(driver)
+
+            # handle -> [index, thời điểm mở trang, thời điểm được quét (None khi trang chưa tải xong)]
+            in_flight = {}
+            completed = 0
+            hooked = driver in self._hooked_drivers
+            self.events.emit('run_start', total=len(pending), mode='tabs', workers=len(handles))
+
+            def finish_error(index, started, error):
+                nonlocal completed
+                completed += 1
+                lecture = lectures[index]
+                self.events.emit('lecture_error', index=index, url=lecture['Lecture Link'], error=error,
+                                 duration_s=round(time.monotonic() - started, 3))
+                self._log(f"Lỗi khi trích xuất URL YouTube từ {lecture['Lecture Link']}: {error}")
+                self._apply_youtube_url(lecture, None, error)
+                if self.adaptive is not None:
+                    self.adaptive.record(time.monotonic() - started, 'error')
+
+            def dispatch(handle):
+                index = pending.popleft()
+                lecture = lectures[index]
+                self._log(f"[{index + 1}/{total}] Đang xử lý: {lecture.get('Lecture Title', f'Bài giảng {index + 1}')}")
+                self.events.emit('lecture_start', index=index, title=lecture.get('Lecture Title'),
+                                 url=lecture['Lecture Link'], worker=handle)
+                started = time.monotonic()
+                try:
+                    driver.switch_to.window(handle)
+                    driver.get(lecture['Lecture Link'])
+                except Exception as e:
+                    # Không mở được trang thì không quét tab (vẫn còn trang cũ): ghi lỗi để lần sau thử lại
+                    finish_error(index, started, f"Không mở được trang: {e}")
+                    return
+                in_flight[handle] = [index, started, None]
+
+            def refill():
+                # Với --adaptive, số tab đang tải do bộ điều khiển quyết định (tối đa số tab đã mở)
+                for handle in handles:
+                    while pending and handle not in in_flight and not self._cancel_event.is_set():
+                        if self.adaptive is not None and len(in_flight) >= self.limiter.limit:
+                            return
+                        dispatch(handle)
+
+            refill()
+            while in_flight:
+                try:
+                    handle, found = self._next_ready_tab(driver, in_flight, hooked)
+                except KeyboardInterrupt:
+                    self._handle_interrupt(completed, len(pending) + len(in_flight) + completed)
+                    break
+                # Bị hủy: các bài đang tải giữ nguyên dữ liệu cũ để lần chạy sau xử lý lại
+                if handle is None:
+                    break
+                index, started, _ = in_flight.pop(handle)
+                completed += 1
+
+                youtube_url = None
+                error = None
+                lecture = lectures[index]
+                if found == 'timeout':
+                    try:
+                        driver.switch_to.window(handle)
+                        driver.execute_script("window.stop();")
+                    except Exception as e:
+                        self._debug_log(f"Không dừng được tab quá hạn: {e}")
+                    lecture['Video URL'] = ""
+                    lecture['Extract Status'] = 'timeout'
+                    self._log(f"  Quá hạn {self.watchdog.timeout}s khi xử lý {lecture['Lecture Link']}")
+                    self.events.emit('lecture_timeout', index=index, title=lecture.get('Lecture Title'),
+                                     url=lecture['Lecture Link'], worker=handle,
+                                     duration_s=round(time.monotonic() - started, 3))
+                    if self.adaptive is not None:
+                        self.adaptive.record(time.monotonic() - started, 'timeout')
+                    refill()
+                    continue
+
+                try:
+                    driver.switch_to.window(handle)
+                    self._check_auth(driver, lecture['Lecture Link'])
+                    self._record_dom(lecture['Lecture Link'], driver)
+                    if found:
+                        youtube_url = self._found_youtube_id(found['id'], f"hook:{found['method']}")
+                    else:
+                        youtube_url = self._scan_youtube_url(driver)
+                    self.events.emit('lecture_finish', index=index, title=lecture.get('Lecture Title'),
+                                     url=lecture['Lecture Link'], worker=handle, video_url=youtube_url or "",
+                                     found=bool(youtube_url), method=self._local.method,
+                                     duration_s=round(time.monotonic() - started, 3))
+                except AuthenticationLost:
+                    break
+                except Exception as e:
+                    if self._cancel_event.is_set():
+                        break
+                    error = str(e)
+                    self.events.emit('lecture_error', index=index, url=lecture['Lecture Link'], error=error,
+                                     duration_s=round(time.monotonic() - started, 3))
+                    self._log(f"Lỗi khi trích xuất URL YouTube từ {lecture['Lecture Link']}: {e}")
+                    if self.debug:
+                        traceback.print_exc()
+
+                self._apply_youtube_url(lecture, youtube_url, error)
+                if self.adaptive is not None:
+                    self.adaptive.record(time.monotonic() - started, 'error' if error else 'ok')
+                refill()
+        finally:
+            self.memory_monitor.stop()
+            self._log(self.memory_monitor.summary())
+            self.events.emit('run_finish', total=total)
+
+        lecture_data['data'] = lectures
+        return lecture_data
+
+    def _page_loaded(self, driver):
+        """Trang trong tab hiện tại đã có DOM (readyState 'interactive' hoặc 'complete') chưa
+
+        Với page load strategy 'none' lệnh get() trả về ngay, nên thời gian chờ chỉ được tính từ đây;
+        driver không trả về trạng thái (khi phát lại) thì coi như đã tải xong.
+        """
+        state = driver.execute_script("return document.readyState;")
+        return state is None or state in ('interactive', 'complete')
+
+    def _next_ready_tab(self, driver, in_flight, hooked):
+        """Chờ đến khi một tab cần xử lý; trả về (tab, kết quả)
+
+        Kết quả là ID video từ script theo dõi, None khi hết thời gian chờ sau khi trang tải xong,
+        hoặc 'timeout' khi tab vượt quá --lecture-timeout. Trả về (None, None) nếu bị hủy.
+        """
+        wait_time = 0 if self.replay else self.wait_time
+        while True:
+            now = time.monotonic()
+            for handle, state in in_flight.items():
+                _, started, ready_at = state
+                if self.watchdog.timeout and now - started >= self.watchdog.timeout:
+                    return handle, 'timeout'
+                # Tab đã tải xong và không có script theo dõi thì chỉ còn chờ đến hạn, không cần đổi tab
+                if hooked or ready_at is None:
+                    try:
+                        driver.switch_to.window(handle)
+                        found = self._read_video_hook(driver) if hooked else None
+                        if found:
+                            return handle, found
+                        if ready_at is None and self._page_loaded(driver):
+                            state[2] = ready_at = now + wait_time
+                    except Exception as e:
+                        self._debug_log(f"Không đọc được trạng thái tab: {e}")
+                if ready_at is not None and ready_at <= now:
+                    return handle, None
+
+            if self._cancel_event.wait(0.1):
+                return None, None
+
+    def update_lecture_data_with_videos_distributed(self, lecture_data, poll_interval=5):
+        """Coordinator: đẩy bài giảng vào hàng đợi và chờ các worker hoàn thành"""
+        if not lecture_data or 'data' not in lecture_data:
+            self._log("Lỗi: Dữ liệu bài giảng không hợp lệ")
+            return lecture_data
+
+        # Mỗi lần chạy một job riêng, kể cả khi hai lần chạy có cùng export_id
+        job_id = f"{lecture_data.get('export_id') or 'job'}-{uuid.uuid4().hex[:8]}"
+        total = len(lecture_data['data'])
+        self.task_queue.create_job(job_id, lecture_data)
+        self._log(f"Đã đẩy {total} bài giảng vào hàng đợi (job {job_id}), đang chờ worker...")
+
+        last_done = -1
+        while True:
+            counts = self.task_queue.progress(job_id)
+            finished = counts['done'] + counts['failed']
+            if finished != last_done:
+                self._log(f"  Tiến độ: {finished}/{total} (đang xử lý {counts['leased']}, "
+                          f"thất bại {counts['failed']})")
+                last_done = finished
+            if finished >= total:
+                break
+            try:
+                time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                # Các worker vẫn tiếp tục; coordinator chỉ lưu những kết quả đã có
+                self._handle_interrupt(finished, total)
+                break
+
+        return self.task_queue.results(job_id)
+
+    def run_queue_worker(self, idle_timeout=60, poll_interval=2):
+        """Worker: nhận bài giảng từ hàng đợi, xử lý và gửi kết quả cho đến khi rảnh quá lâu"""
+        self._begin_run()
+        node = f"{os.uname().nodename if hasattr(os, 'uname') else 'node'}-{os.getpid()}"
+        processed = [0]
+        counter_lock = threading.Lock()
+        job_totals = {}  # job_id -> số bài giảng của job, để hiển thị [vị trí/tổng]
+
+        def worker_loop():
+            worker_id = f"{node}-{threading.current_thread().name}"
+            idle_since = time.monotonic()
+
+            while not self._cancel_event.is_set():
+                task = self.task_queue.lease(worker_id, self.lease_timeout)
+                if task is None:
+                    if time.monotonic() - idle_since >= idle_timeout and not self.task_queue.has_open_tasks():
+                        return
+                    self._cancel_event.wait(poll_interval)
+                    continue
+
+                task_id, job_id, position, lecture = task
+                if job_id not in job_totals:
+                    job_totals[job_id] = sum(self.task_queue.progress(job_id).values())
+                updated_lecture = self.process_lecture(lecture, position, job_totals[job_id])
+                if self._cancel_event.is_set():
+                    # Tác vụ dở dang sẽ được giao lại khi hết hạn thuê
+                    return
+                if not self.task_queue.complete(task_id, worker_id, updated_lecture):
+                    self._log(f"  Hợp đồng thuê tác vụ #{task_id} đã hết hạn, kết quả bị bỏ qua")
+                with counter_lock:
+                    processed[0] += 1
+                idle_since = time.monotonic()
+
+        self._log(f"Worker {node} đang chờ tác vụ với {self.max_workers} luồng...")
+        self.memory_monitor.start(self._live_driver_items)
+        try:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker')
+            try:
+                for future in [executor.submit(worker_loop) for _ in range(self.max_workers)]:
+                    future.result()
+            except KeyboardInterrupt:
+                self._handle_interrupt(processed[0], processed[0])
+            finally:
+                executor.shutdown(wait=not self.interrupted, cancel_futures=True)
+        finally:
+            self.memory_monitor.stop()
+            self._log(self.memory_monitor.summary())
+
+        self._log(f"Worker {node} đã xử lý {processed[0]} bài giảng")
+        return True
 
     def update_lecture_data_with_videos_multithreaded(self, lecture_data):
         """Cập nhật dữ liệu bài giảng với URL YouTube sử dụng đa luồng"""
@@ -831,8 +3315,15 @@ class HavamathExtractor:
         total = len(lectures)
         self._log(f"Đang trích xuất URL YouTube cho {total} bài giảng với {self.max_workers} luồng...")
 
-        # Sử dụng ThreadPoolExecutor cho đa luồng
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        # Lấy mẫu bộ nhớ trình duyệt trong suốt quá trình chạy
+        self.memory_monitor.start(self._live_driver_items)
+        self.events.emit('run_start', total=total, mode='threads', workers=self.max_workers)
+
+        # Sử dụng ThreadPoolExecutor cho đa luồng; không dùng khối with để có thể
+        # thoát ngay khi bị hủy thay vì chờ các bài giảng còn lại
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker')
+        completed = 0
+        try:
             # Đặt futures cho từng công việc
             future_to_index = {
                 executor.submit(self.process_lecture, lecture, i, total): i
@@ -849,13 +3340,224 @@ class HavamathExtractor:
                     lectures[index] = updated_lecture
                 except Exception as e:
                     self._log(f"Lỗi khi xử lý bài giảng #{index + 1}: {e}")
+                completed += 1
+        except KeyboardInterrupt:
+            self._handle_interrupt(completed, total)
+        finally:
+            executor.shutdown(wait=not self.interrupted, cancel_futures=True)
+
+        self.memory_monitor.stop()
+        self._log(self.memory_monitor.summary())
+        if self.adaptive is not None:
+            self._log(self.adaptive.summary())
+        self.events.emit('run_finish', total=total)
 
         # Cập nhật lại dữ liệu
         lecture_data['data'] = lectures
 
         return lecture_data
 
-    def simplify_lecture_data(self, lecture_data):
+    def _discover_lectures(self, course_url, emit):
+        """Tìm bài giảng, gọi emit(title, url) cho từng bài; trả về chương của các bài theo thứ tự đã emit
+
+        HTML tĩnh đưa từng bài ra ngay khi tìm thấy, trước khi phân chương. Nếu không có,
+        Chrome đưa các liên kết bài giảng ra ngay trong lúc trang khóa học đang render; các bài
+        chỉ tìm thấy sau khi phân tích xong được đưa ra cuối cùng.
+        """
+        all_lectures = self._extract_chapters_static(course_url, on_link=emit)
+        if all_lectures:
+            return [lecture["chapter"] for lecture in all_lectures]
+
+        emitted = []  # URL các bài đã đưa ra, theo thứ tự
+        seen = set()
+
+        def emit_once(title, url):
+            if url not in seen:
+                seen.add(url)
+                emitted.append(url)
+                emit(title, url)
+
+        self._render_course_page(course_url, on_link=emit_once)
+        lecture_data = self.scrape_lecture_list(course_url)
+        chapters = {}
+        for row in (lecture_data.get('data', []) if lecture_data else []):
+            chapters.setdefault(row['Lecture Link'], row['Chapter'])
+            emit_once(row['Lecture Title'], row['Lecture Link'])
+        return [chapters.get(url, "Chưa phân loại") for url in emitted]
+
+    def process_course_pipelined(self, course_url):
+        """Tìm bài giảng và trích xuất video cùng lúc: mỗi bài được giao cho worker ngay khi tìm thấy
+
+        Chương của các bài được gán lại sau khi việc phân chương hoàn tất.
+        """
+        course_id = self.extract_course_id(course_url)
+        if not course_id:
+            self._log(f"Lỗi: Định dạng URL khóa học không hợp lệ: {course_url}")
+            return None
+
+        result = {
+            "data": [],
+            "table": "Lecture List",
+            "schema_version": "1.0",
+            "export_id": f"{course_id}-{int(time.time())}",
+            "export_created_at": self.get_iso_time()
+        }
+        if self.shard is not None:
+            result['shard'] = f"{self.shard[0]}/{self.shard[1]}"
+
+        work = queue.Queue()
+        discovered = []  # Tất cả bài giảng đã tìm thấy, theo thứ tự
+        selected = []  # Các bài giảng thuộc lần chạy này
+
+        def emit(title, url):
+            position = len(discovered) + 1
+            row = {
+                "Position": position,
+                "Lecture Link": url,
+                "Lecture Title": title,
+                "Extract Date": self.get_iso_time(),
+                "Task Link": "",
+                "Origin URL": course_url,
+                "Lecture List Limit": self.limit if self.limit is not None else 100,
+                "Chapter": "Chưa phân loại"
+            }
+            discovered.append(row)
+            if self._in_selection(position, url):
+                selected.append(row)
+                self.events.emit('lecture_discovered', index=position - 1, title=title, url=url)
+                work.put(row)
+
+        def produce():
+            try:
+                chapters = self._discover_lectures(course_url, emit)
+                for row, chapter in zip(discovered, chapters):
+                    row['Chapter'] = chapter
+                self._log(f"Đã tìm thấy {len(discovered)} bài giảng từ {len(self.chapters)} chương")
+            except ExtractionCancelled:
+                pass
+            except Exception as e:
+                self._log(f"Lỗi khi tìm bài giảng: {e}")
+                if self.debug:
+                    traceback.print_exc()
+            finally:
+                work.put(None)
+
+        self._log(f"Đang tìm bài giảng và trích xuất URL YouTube song song với {self.max_workers} luồng...")
+        self.memory_monitor.start(self._live_driver_items)
+        self.events.emit('run_start', total=0, mode='pipeline', workers=self.max_workers)
+
+        producer = threading.Thread(target=produce, name='discovery', daemon=True)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker')
+        futures = {}
+        completed = 0
+        try:
+            producer.start()
+            while True:
+                try:
+                    row = work.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if row is None:
+                    break
+                # Tổng số bài chưa biết cho đến khi tìm xong
+                futures[executor.submit(self.process_lecture, row, row['Position'] - 1, '?')] = row
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self._log(f"Lỗi khi xử lý bài giảng #{futures[future]['Position']}: {e}")
+                completed += 1
+        except KeyboardInterrupt:
+            self._handle_interrupt(completed, len(selected))
+        finally:
+            executor.shutdown(wait=not self.interrupted, cancel_futures=True)
+            if not self.interrupted:
+                producer.join()
+
+        self.memory_monitor.stop()
+        self._log(self.memory_monitor.summary())
+        if self.adaptive is not None:
+            self._log(self.adaptive.summary())
+        self.events.emit('run_finish', total=len(selected))
+
+        result['data'] = list(selected)
+        return result
+
+    def iter_lectures(self, records, max_in_flight=None):
+        """Trích xuất video cho các bản ghi bài giảng, yield LectureResult ngay khi mỗi bài xong
+
+        records có thể là danh sách hoặc iterator bất kỳ và chỉ được đọc khi còn chỗ: tối đa
+        max_in_flight bài (mặc định 2 x số luồng) được giao cùng lúc, nên bên dùng đọc chậm thì
+        việc trích xuất cũng chậm theo. Dừng đọc (break hoặc close()) sẽ bỏ các bài chưa bắt đầu,
+        dừng các bài đang chạy ở điểm kiểm tra hủy kế tiếp và chờ chúng kết thúc; cancel() còn
+        dừng ngay các trình duyệt. Luôn dùng nhiều luồng, kể cả khi cấu hình --tabs.
+        """
+        max_in_flight = max(1, max_in_flight or 2 * self.max_workers)
+        records = iter(records)
+        end = object()
+        self._begin_run()
+
+        self.memory_monitor.start(self._live_driver_items)
+        self.events.emit('run_start', total=0, mode='iter', workers=self.max_workers)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker')
+        in_flight = {}
+        completed = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight and not self.cancelled:
+                    record = next(records, end)
+                    if record is end:
+                        exhausted = True
+                        break
+                    if record is None:
+                        continue
+                    index = record.get('Position', completed + len(in_flight) + 1) - 1
+                    in_flight[executor.submit(self.process_lecture, record, index, '?')] = record
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        self._log(f"Lỗi khi xử lý bài giảng #{record.get('Position')}: {e}")
+                    completed += 1
+                    yield self._lecture_result(record)
+        finally:
+            if in_flight:
+                # Bên dùng dừng đọc giữa chừng: không để worker chạy tiếp sau khi generator đã đóng
+                self._cancel_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.memory_monitor.stop()
+            self.events.emit('run_finish', total=completed)
+
+    def iter_course(self, course_url, max_in_flight=None):
+        """Lấy danh sách bài giảng của khóa học (theo --offset/--limit/--shard) rồi yield như iter_lectures"""
+        self._begin_run()
+        self._drop_course_page(course_url)
+        if not self.preflight_auth(course_url):
+            return
+        lecture_data = self._select_lectures(self.scrape_lecture_list(course_url))
+        if not lecture_data or not lecture_data.get('data'):
+            self._log("Không thể lấy danh sách bài giảng, hủy bỏ")
+            return
+        yield from self.iter_lectures(lecture_data['data'], max_in_flight)
+
+    def _lecture_result(self, record):
+        """Đóng gói một bản ghi bài giảng thành LectureResult"""
+        video_url = record.get('Video URL') or ''
+        status = record.get('Extract Status') or ('found' if video_url else 'pending')
+        return LectureResult(record.get('Position'), record.get('Lecture Title', ''),
+                             record.get('Chapter', 'Chưa phân loại'), record.get('Lecture Link'),
+                             video_url, status, record)
+
+    def simplify_lecture_data(self, lecture_data, with_position=False):
         """Chuyển đổi dữ liệu sang định dạng đơn giản (chỉ có title, videoUrl và chapter)"""
         if not lecture_data or 'data' not in lecture_data:
             self._log("Lỗi: Dữ liệu bài giảng không hợp lệ")
@@ -873,7 +3575,7 @@ class HavamathExtractor:
             chapter = lecture.get('Chapter', 'Chưa phân loại')
 
             # Bỏ qua các bài học có tiêu đề "Vào học"
-            if title == "Vào học":
+            if self.site.skip_title(title):
                 continue
 
             # Tạo một định danh duy nhất cho bài học
@@ -886,17 +3588,140 @@ class HavamathExtractor:
                     "videoUrl": video_url,
                     "chapter": chapter
                 })
+                # Kết quả một phần (shard) giữ vị trí gốc và liên kết bài giảng để gộp lại đúng thứ tự
+                if with_position:
+                    simplified_lectures[-1]["position"] = lecture.get('Position')
+                    simplified_lectures[-1]["link"] = lecture.get('Lecture Link', '')
                 added_lectures.add(lecture_id)
 
         # Tạo dữ liệu đầu ra
         output_data = {
             "lectures": simplified_lectures
         }
+        if with_position and 'shard' in lecture_data:
+            output_data['shard'] = lecture_data['shard']
+
+        return output_data
+
+    @property
+    def partial_run(self):
+        """Lần chạy chỉ xử lý một phần khóa học (--limit/--offset/--shard)"""
+        return self.limit is not None or self.offset > 0 or self.shard is not None
+
+    def _selection_suffix(self):
+        """Hậu tố tên file đầu ra mặc định cho lần chạy một phần"""
+        if self.shard is not None:
+            return f".shard-{self.shard[0]}-of-{self.shard[1]}"
+        if self.partial_run:
+            return f".offset-{self.offset}" + (f"-limit-{self.limit}" if self.limit is not None else "")
+        return ""
+
+    def _in_selection(self, ordinal, lecture_url):
+        """Bài giảng thứ ordinal (tính từ 1) có thuộc lần chạy này không"""
+        if ordinal <= self.offset:
+            return False
+        if self.limit is not None and ordinal > self.offset + self.limit:
+            return False
+        return self.shard is None or lecture_shard(lecture_url, self.shard[1]) == self.shard[0]
+
+    def _select_lectures(self, lecture_data):
+        """Chọn các bài giảng của lần chạy này theo --offset/--limit (thứ tự Position) rồi theo --shard"""
+        if not self.partial_run or not lecture_data or 'data' not in lecture_data:
+            return lecture_data
+
+        lectures = sorted(lecture_data['data'], key=lambda lecture: lecture.get('Position', 0))
+        # Bản sao: bản ghi của bên gọi (ví dụ danh sách bài giảng đã lưu) không bị thay đổi
+        lectures = [dict(lecture) for i, lecture in enumerate(lectures)
+                    if self._in_selection(i + 1, lecture.get('Lecture Link'))]
+        if self.limit is not None:
+            for lecture in lectures:
+                lecture['Lecture List Limit'] = self.limit
+
+        selected = dict(lecture_data, data=lectures)
+        if self.shard is not None:
+            selected['shard'] = f"{self.shard[0]}/{self.shard[1]}"
+        self._log(f"Chọn {len(lectures)}/{len(lecture_data['data'])} bài giảng "
+                  f"(offset {self.offset}, limit {self.limit}, shard {selected.get('shard', '-')})")
+        return selected
+
+    def _write_index(self, lecture_data, course_id, course_url=None):
+        """Ghi dữ liệu đầy đủ của khóa học vào chỉ mục nếu được bật"""
+        if self.lecture_index is None or not lecture_data:
+            return
+        try:
+            # Lần chạy một phần chỉ cập nhật các bài giảng của nó, giữ nguyên phần còn lại của khóa học
+            count = self.lecture_index.write_course(course_id, lecture_data, course_url, replace=not self.partial_run)
+            self._log(f"Đã ghi {count} bài giảng của {course_id} vào chỉ mục {self.lecture_index.path}")
+        except sqlite3.Error as e:
+            self._log(f"Lỗi khi ghi chỉ mục: {e}")
+
+    def _course_id_for_data(self, lecture_data, json_file=None):
+        """Xác định ID khóa học từ Origin URL của bài giảng, hoặc từ tên file"""
+        for lecture in lecture_data.get('data', []):
+            course_id = self.extract_course_id(lecture.get('Origin URL') or '')
+            if course_id:
+                return course_id
+        if json_file:
+            stem = os.path.splitext(os.path.basename(json_file))[0]
+            return re.sub(r'_(videos|lectures|data)$', '', stem)
+        return 'course'
+
+    def _prepare_output(self, lecture_data):
+        """Đơn giản hóa dữ liệu (nếu cần) và bổ sung thông tin video trước khi lưu"""
+        if self.simplified_output:
+            output_data = self.simplify_lecture_data(lecture_data, with_position=self.partial_run)
+        else:
+            output_data = lecture_data
+
+        if self.enricher is not None:
+            self._log("Đang bổ sung thông tin video YouTube...")
+            stats = self.enricher.enrich_data(output_data, self.site)
+            self._log("  Tình trạng video: " + (", ".join(f"{k}: {v}" for k, v in stats.items()) or "không có video"))
+            unavailable = stats.get('dead', 0) + stats.get('private', 0)
+            if unavailable:
+                self._log(f"  Cảnh báo: {unavailable} video đã bị xóa hoặc ở chế độ riêng tư")
 
         return output_data
 
+    def expand_simplified_data(self, simplified_data):
+        """Chuyển dữ liệu dạng đơn giản ({"lectures": [...]}) về định dạng đầy đủ"""
+        old_format_data = {
+            "data": [],
+            "table": "Lecture List",
+            "schema_version": "1.0",
+            "export_id": f"import-{int(time.time())}",
+            "export_created_at": self.get_iso_time()
+        }
+
+        for i, lecture in enumerate(simplified_data.get('lectures', [])):
+            old_format_data['data'].append({
+                "Position": lecture.get('position', i + 1),
+                "Lecture Link": lecture.get('link') or f"{self.site.base_url}/unknown/link/{i + 1}",
+                "Lecture Title": lecture.get('title', f"Bài giảng {i + 1}"),
+                "Extract Date": self.get_iso_time(),
+                "Task Link": "",
+                "Origin URL": "",
+                "Lecture List Limit": 100,
+                "Video URL": lecture.get('videoUrl', ''),
+                "Chapter": lecture.get('chapter', 'Chưa phân loại')
+            })
+
+        return old_format_data
+
     def process_full_workflow(self, course_url, output_file=None, skip_videos=False):
         """Thực hiện toàn bộ quy trình từ URL khóa học đến trích xuất video"""
+        self._begin_run()
+        self._drop_course_page(course_url)
+        if not skip_videos and not self.preflight_auth(course_url):
+            return False
+
+        # Tìm bài giảng và trích xuất video cùng lúc (không áp dụng cho chế độ tab và hàng đợi)
+        if self.pipeline and not skip_videos:
+            if self.tabs or self.task_queue is not None:
+                self._log("Chế độ pipeline chỉ dùng với nhiều luồng, chạy tuần tự")
+            else:
+                return self._finish_course(course_url, self.process_course_pipelined(course_url), output_file)
+
         # Bước 1: Lấy danh sách bài giảng
         lecture_data = self.scrape_lecture_list(course_url)
 
@@ -904,16 +3729,16 @@ class HavamathExtractor:
             self._log("Không thể lấy danh sách bài giảng, hủy bỏ")
             return False
 
+        lecture_data = self._select_lectures(lecture_data)
+
         # Nếu chỉ lấy danh sách, không trích xuất video
         if skip_videos:
-            if self.simplified_output:
-                output_data = self.simplify_lecture_data(lecture_data)
-            else:
-                output_data = lecture_data
+            self._write_index(lecture_data, self.extract_course_id(course_url) or 'course', course_url)
+            output_data = self._prepare_output(lecture_data)
 
             if output_file is None:
                 course_id = self.extract_course_id(course_url) or 'course'
-                output_file = f"{course_id}_lectures.json"
+                output_file = f"{course_id}_lectures{self._selection_suffix()}.json"
 
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, ensure_ascii=False, indent=2)
@@ -922,86 +3747,84 @@ class HavamathExtractor:
             return True
 
         # Bước 2: Trích xuất URL YouTube
-        updated_data = self.update_lecture_data_with_videos_multithreaded(lecture_data)
+        updated_data = self.update_lecture_data_with_videos(lecture_data)
+        return self._finish_course(course_url, updated_data, output_file)
 
-        # Bước 3: Chuyển đổi sang định dạng đơn giản nếu cần
-        if self.simplified_output:
-            result_data = self.simplify_lecture_data(updated_data)
-        else:
-            result_data = updated_data
+    def _finish_course(self, course_url, updated_data, output_file=None):
+        """Ghi chỉ mục, chuyển đổi định dạng và lưu kết quả của một khóa học"""
+        if not updated_data or not updated_data.get('data'):
+            self._log("Không thể lấy danh sách bài giảng, hủy bỏ")
+            return False
+
+        # Bước 3: Ghi chỉ mục và chuyển đổi sang định dạng đơn giản nếu cần
+        self._write_index(updated_data, self.extract_course_id(course_url) or 'course', course_url)
+        result_data = self._prepare_output(updated_data)
 
         # Bước 4: Lưu kết quả
         if output_file is None:
             course_id = self.extract_course_id(course_url) or 'course'
-            output_file = f"{course_id}_videos.json"
+            output_file = f"{course_id}_videos{self._selection_suffix()}.json"
 
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(result_data, f, ensure_ascii=False, indent=2)
 
-        self._log(f"Đã lưu dữ liệu thành công vào {output_file}")
+        if self.interrupted:
+            self._log(f"Đã lưu kết quả một phần vào {output_file}")
+        else:
+            self._log(f"Đã lưu dữ liệu thành công vào {output_file}")
         return True
 
     def process_existing_json(self, json_file, output_file=None, skip_videos=False):
         """Xử lý file JSON đã có sẵn"""
+        self._begin_run()
         try:
             with open(json_file, 'r', encoding='utf-8') as f:
                 lecture_data = json.load(f)
 
             # Kiểm tra xem đây là định dạng đơn giản hay không
             if 'lectures' in lecture_data:
-                # Chuyển đổi sang định dạng cũ
-                old_format_data = {
-                    "data": [],
-                    "table": "Lecture List",
-                    "schema_version": "1.0",
-                    "export_id": f"import-{int(time.time())}",
-                    "export_created_at": self.get_iso_time()
-                }
+                lecture_data = self.expand_simplified_data(lecture_data)
 
-                for i, lecture in enumerate(lecture_data['lectures']):
-                    old_format_data['data'].append({
-                        "Position": i + 1,
-                        "Lecture Link": f"https://havamath.vn/unknown/link/{i + 1}",
-                        "Lecture Title": lecture.get('title', f"Bài giảng {i + 1}"),
-                        "Extract Date": self.get_iso_time(),
-                        "Task Link": "",
-                        "Origin URL": "",
-                        "Lecture List Limit": 100,
-                        "Video URL": lecture.get('videoUrl', ''),
-                        "Chapter": lecture.get('chapter', 'Chưa phân loại')
-                    })
-
-                lecture_data = old_format_data
+            # Lần chạy một phần không ghi đè file đầu vào
+            lecture_data = self._select_lectures(lecture_data)
+            default_path = json_file
+            if self.partial_run:
+                stem, ext = os.path.splitext(json_file)
+                default_path = f"{stem}{self._selection_suffix()}{ext or '.json'}"
 
             # Nếu chỉ cần file mà không cần trích xuất video
             if skip_videos:
-                if self.simplified_output:
-                    output_data = self.simplify_lecture_data(lecture_data)
-                else:
-                    output_data = lecture_data
+                self._write_index(lecture_data, self._course_id_for_data(lecture_data, json_file))
+                output_data = self._prepare_output(lecture_data)
 
-                save_path = output_file if output_file else json_file
+                save_path = output_file if output_file else default_path
                 with open(save_path, 'w', encoding='utf-8') as f:
                     json.dump(output_data, f, ensure_ascii=False, indent=2)
 
                 self._log(f"Đã xử lý {json_file} không trích xuất video và lưu vào {save_path}")
                 return True
 
+            # Kiểm tra đăng nhập bằng bài giảng đầu tiên cần trích xuất
+            probe = next((lecture for lecture in lecture_data.get('data', []) if self._needs_video(lecture)), None)
+            if probe is not None and not self.preflight_auth(probe['Lecture Link']):
+                return False
+
             # Cập nhật với URL YouTube
-            updated_data = self.update_lecture_data_with_videos_multithreaded(lecture_data)
+            updated_data = self.update_lecture_data_with_videos(lecture_data)
 
-            # Chuyển đổi sang định dạng đơn giản nếu cần
-            if self.simplified_output:
-                result_data = self.simplify_lecture_data(updated_data)
-            else:
-                result_data = updated_data
+            # Ghi chỉ mục và chuyển đổi sang định dạng đơn giản nếu cần
+            self._write_index(updated_data, self._course_id_for_data(updated_data, json_file))
+            result_data = self._prepare_output(updated_data)
 
             # Lưu kết quả
-            save_path = output_file if output_file else json_file
+            save_path = output_file if output_file else default_path
             with open(save_path, 'w', encoding='utf-8') as f:
                 json.dump(result_data, f, ensure_ascii=False, indent=2)
 
-            self._log(f"Đã xử lý {json_file} và lưu vào {save_path}")
+            if self.interrupted:
+                self._log(f"Đã lưu kết quả một phần của {json_file} vào {save_path}")
+            else:
+                self._log(f"Đã xử lý {json_file} và lưu vào {save_path}")
             return True
 
         except Exception as e:
@@ -1010,33 +3833,748 @@ class HavamathExtractor:
                 traceback.print_exc()
             return False
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Thoát vì lỗi hoặc Ctrl-C: dừng các bài đang chạy trước khi đóng trình duyệt
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+        return False
+
     def close(self):
         """Đóng tất cả các trình duyệt và dọn dẹp tài nguyên"""
         if self.driver:
             self.driver.quit()
+            self._discard_profile(self.driver)
+            self._close_attached_tabs(self.driver)
             self.driver = None
 
         # Đóng các worker drivers
-        for worker_id, driver in list(self.worker_drivers.items()):
+        for worker_id, driver in self._worker_driver_items():
             try:
                 driver.quit()
             except:
                 pass
+            self._discard_profile(driver)
+            self._close_attached_tabs(driver)
+
+        with self._drivers_lock:
+            self.worker_drivers.clear()
 
-        self.worker_drivers.clear()
+        if self.no_video_cache is not None:
+            self.no_video_cache.save()
+        self.watchdog.stop()
+        self.events.close()
 
 
-def main():
+class VideoMetadataEnricher:
+    """Lấy thông tin video YouTube (tiêu đề, kênh, ảnh, thời lượng, tình trạng) theo lô
+
+    Gọi song song tới một endpoint kiểu oEmbed qua một session có connection pool,
+    kết quả được lưu vào cache JSON theo ID video. Endpoint có thể thay bằng một
+    dịch vụ cục bộ trả về cùng định dạng (có thể kèm trường "duration").
+    """
+
+    DEFAULT_ENDPOINT = 'https://www.youtube.com/oembed'
+
+    def __init__(self, endpoint=None, cache_file=None, max_workers=8, timeout=10, cache_ttl_days=30):
+        self.endpoint = endpoint or self.DEFAULT_ENDPOINT
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl_days * 86400
+        self.cache = {}
+        self._session = None
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+
+    @property
+    def session(self):
+        if self._session is None:
+            _require_bs4()
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        return self._session
+
+    def _fetch(self, video_id):
+        """Gọi endpoint cho một video, trả về metadata (không ném lỗi)"""
+        try:
+            response = self.session.get(self.endpoint, timeout=self.timeout, params={
+                'url': f"https://www.youtube.com/watch?v={video_id}",
+                'format': 'json',
+            })
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+        if response.status_code == 200:
+            try:
+                info = response.json()
+            except ValueError:
+                return {"status": "error", "error": "Phản hồi không phải JSON"}
+            return {
+                "status": "available",
+                "title": info.get('title'),
+                "author": info.get('author_name'),
+                "thumbnail": info.get('thumbnail_url'),
+                "duration": info.get('duration'),
+            }
+        # oEmbed trả 401/403 cho video riêng tư hoặc bị chặn nhúng, 400/404 cho video không tồn tại
+        if response.status_code in (401, 403):
+            return {"status": "private"}
+        if response.status_code in (400, 404):
+            return {"status": "dead"}
+        return {"status": "error", "error": f"HTTP {response.status_code}"}
+
+    def resolve(self, video_ids):
+        """Trả về dict video_id -> metadata, chỉ gọi mạng cho ID chưa có trong cache"""
+        now = time.time()
+        missing = [vid for vid in dict.fromkeys(video_ids)
+                   if vid not in self.cache or now - self.cache[vid].get('fetched_at', 0) > self.cache_ttl]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='enrich') as executor:
+                for video_id, metadata in zip(missing, executor.map(self._fetch, missing)):
+                    # Lỗi tạm thời không có fetched_at và không được ghi ra file, lần sau sẽ thử lại
+                    if metadata['status'] != 'error':
+                        metadata['fetched_at'] = now
+                    self.cache[video_id] = metadata
+            self._save_cache()
+
+        return {vid: self.cache.get(vid) for vid in video_ids}
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        cache = {vid: meta for vid, meta in self.cache.items() if meta.get('status') != 'error'}
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_file)
+
+    def enrich_data(self, data, site=None):
+        """Gắn metadata vào từng bài giảng (trường "video" hoặc "Video Metadata"), trả về thống kê
+
+        URL video được nhận theo url_template của hồ sơ trang site (mặc định: hồ sơ havamath).
+        """
+        site = site or load_site_profile()
+        if isinstance(data.get('lectures'), list):
+            lectures, url_field, meta_field = data['lectures'], 'videoUrl', 'video'
+        else:
+            lectures, url_field, meta_field = data.get('data', []), 'Video URL', 'Video Metadata'
+
+        ids = {}
+        for lecture in lectures:
+            video_id = site.video_id_from_video_url(lecture.get(url_field))
+            if video_id:
+                ids[id(lecture)] = video_id
+
+        metadata = self.resolve(list(ids.values()))
+        stats = {}
+        for lecture in lectures:
+            video_id = ids.get(id(lecture))
+            if video_id is None:
+                continue
+            meta = {k: v for k, v in (metadata.get(video_id) or {}).items() if k != 'fetched_at'}
+            lecture[meta_field] = dict(meta, id=video_id)
+            stats[meta.get('status')] = stats.get(meta.get('status'), 0) + 1
+
+        return stats
+
+
+class ExtractionJob:
+    """Một yêu cầu trích xuất gửi tới chế độ serve"""
+
+    def __init__(self, job_id, course_url=None, lecture_data=None):
+        self.job_id = job_id
+        self.course_url = course_url
+        self.lecture_data = lecture_data
+        self.status = 'queued'
+        self.error = None
+        self.total = 0
+        self.results = []  # Kết quả theo thứ tự hoàn thành
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cond = threading.Condition()
+
+    def add_result(self, result):
+        with self.cond:
+            self.results.append(result)
+            self.cond.notify_all()
+
+    def finish(self, status, error=None):
+        with self.cond:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.cond.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        with self.cond:
+            return {
+                "id": self.job_id,
+                "status": self.status,
+                "course_url": self.course_url,
+                "total": self.total,
+                "completed": len(self.results),
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class ExtractionService:
+    """Tiến trình chạy lâu dài giữ sẵn nhóm trình duyệt đã đăng nhập và nhận job qua HTTP
+
+    API (JSON):
+        POST /jobs                 {"course_url": "..."} hoặc {"data": [bài giảng...]}
+        GET  /jobs                 danh sách job
+        GET  /jobs/<id>            trạng thái job
+        GET  /jobs/<id>/results    kết quả dạng NDJSON, phát từng dòng khi bài giảng hoàn thành
+        GET  /health               503 khi phiên đăng nhập đã mất, cho đến job tiếp theo
+    """
+
+    MAX_FINISHED_JOBS = 100
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._discovery_lock = threading.Lock()  # Driver chính chỉ phục vụ một khóa học tại một thời điểm
+        self._next_id = 1
+        self.executor = ThreadPoolExecutor(max_workers=extractor.max_workers, thread_name_prefix='worker')
+
+    def warm_up(self):
+        """Khởi động sẵn một trình duyệt đã nạp cookies cho mỗi luồng worker"""
+        barrier = threading.Barrier(self.extractor.max_workers)
+
+        def warm():
+            # Barrier buộc mỗi tác vụ chạy trên một luồng khác nhau
+            barrier.wait()
+            self.extractor._init_driver(threading.current_thread().name)
+
+        futures = [self.executor.submit(warm) for _ in range(self.extractor.max_workers)]
+        for future in futures:
+            future.result()
+        self.extractor._log(f"Đã khởi động sẵn {len(futures)} trình duyệt")
+
+    def submit(self, payload):
+        """Tạo job từ yêu cầu JSON và chạy nền"""
+        course_url = payload.get('course_url')
+        lecture_data = None
+        if not course_url:
+            if isinstance(payload.get('data'), list):
+                lecture_data = {k: v for k, v in payload.items() if k != 'data'}
+                lecture_data['data'] = payload['data']
+            else:
+                raise ValueError("Cần 'course_url' hoặc danh sách bài giảng trong 'data'")
+
+        with self._jobs_lock:
+            job = ExtractionJob(f"job-{self._next_id}", course_url, lecture_data)
+            self._next_id += 1
+            self.jobs[job.job_id] = job
+            self._prune_jobs()
+
+        threading.Thread(target=self._run_job, args=(job,), name=f"{job.job_id}", daemon=True).start()
+        return job
+
+    def _prune_jobs(self):
+        finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+            del self.jobs[job.job_id]
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._jobs_lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def _run_job(self, job):
+        extractor = self.extractor
+        try:
+            with self._jobs_lock:
+                # Trạng thái hủy/mất đăng nhập chỉ được xóa khi không còn job nào khác đang chạy
+                if not any(other.status == 'running' for other in self.jobs.values()):
+                    extractor._begin_run()
+                job.status = 'running'
+            lecture_data = job.lecture_data
+            if job.course_url:
+                with self._discovery_lock:
+                    extractor._drop_course_page(job.course_url)
+                    lecture_data = extractor.scrape_lecture_list(job.course_url)
+                if not lecture_data or not lecture_data.get('data'):
+                    job.finish('failed', "Không thể lấy danh sách bài giảng")
+                    return
+
+            lectures = lecture_data['data']
+            job.total = len(lectures)
+            futures = {
+                self.executor.submit(extractor.process_lecture, lecture, i, job.total): i
+                for i, lecture in enumerate(lectures)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    lecture = future.result()
+                except Exception as e:
+                    lecture = lectures[index]
+                    extractor._log(f"Lỗi khi xử lý bài giảng #{index + 1}: {e}")
+                job.add_result(self._format_result(index, lecture))
+
+            if extractor.auth_lost:
+                job.finish('failed', "Mất đăng nhập: hãy cập nhật file cookies")
+            else:
+                job.finish('done')
+        except Exception as e:
+            extractor._log(f"Lỗi khi chạy {job.job_id}: {e}")
+            if extractor.debug:
+                traceback.print_exc()
+            job.finish('failed', str(e))
+
+    def _format_result(self, index, lecture):
+        if self.extractor.simplified_output:
+            return {
+                "position": index + 1,
+                "title": lecture.get('Lecture Title', ''),
+                "videoUrl": lecture.get('Video URL', ''),
+                "chapter": lecture.get('Chapter', 'Chưa phân loại'),
+            }
+        return dict(lecture, position=index + 1)
+
+    def stream_results(self, job, write):
+        """Gửi từng kết quả ngay khi có cho đến khi job kết thúc"""
+        sent = 0
+        while True:
+            with job.cond:
+                while sent >= len(job.results) and not job.finished:
+                    job.cond.wait()
+                pending = job.results[sent:]
+                finished = job.finished
+            for result in pending:
+                write(json.dumps(result, ensure_ascii=False) + "\n")
+            sent += len(pending)
+            if finished and sent >= len(job.results):
+                return
+
+    def serve_forever(self, host, port):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                service.extractor._debug_log(f"{self.address_string()} {format % args}")
+
+            def _send_json(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = [p for p in urlparse(self.path).path.split('/') if p]
+                if parts == ['health']:
+                    if service.extractor.auth_lost:
+                        return self._send_json(503, {"status": "auth_lost",
+                                                     "workers": service.extractor.max_workers})
+                    return self._send_json(200, {"status": "ok", "workers": service.extractor.max_workers})
+                if parts == ['jobs']:
+                    return self._send_json(200, {"jobs": service.list_jobs()})
+                if len(parts) in (2, 3) and parts[0] == 'jobs':
+                    job = service.get(parts[1])
+                    if job is None:
+                        return self._send_json(404, {"error": "Không tìm thấy job"})
+                    if len(parts) == 2:
+                        return self._send_json(200, job.to_dict())
+                    if parts[2] == 'results':
+                        return self._stream(job)
+                self._send_json(404, {"error": "Không tìm thấy"})
+
+            def _stream(self, job):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def write(line):
+                    data = line.encode('utf-8')
+                    self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                    self.wfile.flush()
+
+                try:
+                    service.stream_results(job, write)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_POST(self):
+                if urlparse(self.path).path.rstrip('/') != '/jobs':
+                    return self._send_json(404, {"error": "Không tìm thấy"})
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                    job = service.submit(payload)
+                except (ValueError, AttributeError) as e:
+                    return self._send_json(400, {"error": str(e)})
+                self._send_json(202, job.to_dict())
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        self.extractor._log(f"Đang phục vụ API tại http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Các lệnh xử lý file JSON không cần trình duyệt, chạy dạng: <script> convert in.json --to full
+OFFLINE_COMMANDS = ('convert', 'merge', 'dedupe', 'validate', 'query')
+
+
+def _read_json_file(path):
+    """Đọc JSON từ file hoặc stdin ('-')"""
+    if path == '-':
+        return json.load(sys.stdin)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json_file(data, path=None):
+    """Ghi JSON ra file hoặc stdout (khi không có đường dẫn hoặc '-')"""
+    if not path or path == '-':
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _data_format(data):
+    """'simplified', 'full' hoặc None nếu không nhận dạng được"""
+    if isinstance(data, dict):
+        if isinstance(data.get('lectures'), list):
+            return 'simplified'
+        if isinstance(data.get('data'), list):
+            return 'full'
+    return None
+
+
+def _convert_data(extractor, data, target):
+    """Chuyển dữ liệu sang định dạng đích ('simplified' hoặc 'full')"""
+    source = _data_format(data)
+    if source == target:
+        return data
+    if target == 'simplified':
+        return extractor.simplify_lecture_data(data)
+    return extractor.expand_simplified_data(data)
+
+
+def _merge_shards(extractor, datasets, target):
+    """Gộp kết quả các shard theo vị trí gốc của bài giảng thành một file theo định dạng hiện có"""
+    shards = sorted({data['shard'] for data in datasets if 'shard' in data})
+    counts = {int(shard.split('/')[1]) for shard in shards}
+    if len(counts) == 1 and len(shards) < counts.pop():
+        print(f"Cảnh báo: chỉ có {len(shards)} shard ({', '.join(shards)})", file=sys.stderr)
+
+    full = [_convert_data(extractor, data, 'full') for data in datasets]
+    seen = set()
+    lectures = []
+    for lecture in sorted((lecture for data in full for lecture in data['data']),
+                          key=lambda lecture: lecture.get('Position', 0)):
+        # Cùng một shard được gộp hai lần thì chỉ giữ một bản
+        position = lecture.get('Position')
+        if position in seen:
+            continue
+        seen.add(position)
+        lectures.append(lecture)
+
+    merged = {k: v for k, v in full[0].items() if k != 'shard'}
+    merged['data'] = lectures
+    return _convert_data(extractor, merged, target)
+
+
+def _dedupe_key(lecture, key):
+    """Khóa so trùng cho một bài giảng ở cả hai định dạng"""
+    title = lecture.get('title', lecture.get('Lecture Title', ''))
+    video_url = lecture.get('videoUrl', lecture.get('Video URL', ''))
+    if key == 'video':
+        # Bài chưa có URL không được coi là trùng nhau
+        return video_url or id(lecture)
+    if key == 'link':
+        return lecture.get('Lecture Link') or id(lecture)
+    return title, video_url
+
+
+def _dedupe_data(data, key):
+    field = 'lectures' if _data_format(data) == 'simplified' else 'data'
+    seen = set()
+    kept = []
+    for lecture in data[field]:
+        lecture_key = _dedupe_key(lecture, key)
+        if lecture_key in seen:
+            continue
+        seen.add(lecture_key)
+        kept.append(lecture)
+
+    if field == 'data':
+        for i, lecture in enumerate(kept):
+            lecture['Position'] = i + 1
+
+    return dict(data, **{field: kept}), len(data[field]) - len(kept)
+
+
+def _validate_data(data, site, require_video=False):
+    """Kiểm tra cấu trúc file đầu ra, trả về (danh sách lỗi, số bài, số bài thiếu URL)"""
+    data_format = _data_format(data)
+    if data_format is None:
+        return ["Không có danh sách 'lectures' hoặc 'data'"], 0, 0
+
+    if data_format == 'simplified':
+        lectures = data['lectures']
+        required = ('title', 'videoUrl', 'chapter')
+        url_field = 'videoUrl'
+    else:
+        lectures = data['data']
+        required = ('Lecture Title', 'Lecture Link')
+        url_field = 'Video URL'
+
+    errors = []
+    missing = 0
+    for i, lecture in enumerate(lectures):
+        if not isinstance(lecture, dict):
+            errors.append(f"Bài #{i + 1}: không phải object")
+            continue
+        for field in required:
+            if not isinstance(lecture.get(field), str):
+                errors.append(f"Bài #{i + 1}: thiếu trường '{field}'")
+        video_url = lecture.get(url_field) or ''
+        if not video_url:
+            missing += 1
+            if require_video:
+                errors.append(f"Bài #{i + 1}: chưa có URL video")
+        elif not site.is_video_url(video_url):
+            errors.append(f"Bài #{i + 1}: URL video không hợp lệ: {video_url}")
+
+    return errors, len(lectures), missing
+
+
+def _run_query_command(extractor, args):
+    """Các lệnh tra cứu chỉ mục bài giảng; in kết quả dạng cột phân tách bằng tab"""
+    if args.action != 'import' and not os.path.exists(args.index):
+        print(f"Lỗi: không tìm thấy chỉ mục {args.index}", file=sys.stderr)
+        return 1
+
+    index = LectureIndex(args.index, extractor.site)
+    try:
+        if args.action == 'courses':
+            for course_id, count, missing, updated_at in index.courses():
+                print(f"{course_id}\t{count}\t{missing or 0}\t{updated_at}")
+
+        elif args.action == 'video':
+            video_id = index.video_id(args.video)
+            rows = index.find_video(video_id) if video_id else []
+            for course_id, position, title, chapter in rows:
+                print(f"{course_id}\t{position}\t{title}\t{chapter}")
+            return 0 if rows else 1
+
+        elif args.action == 'reused':
+            for video_id, count, courses in index.reused_videos(args.min_courses):
+                print(f"{video_id}\t{count}\t{courses}")
+
+        elif args.action == 'missing':
+            for course_id, position, title, chapter, status in index.missing_videos(args.course):
+                print(f"{course_id}\t{position}\t{title}\t{chapter}\t{status}")
+
+        elif args.action == 'export':
+            lecture_data = index.export_course(args.course)
+            if lecture_data is None:
+                print(f"Lỗi: không có khóa học {args.course} trong chỉ mục", file=sys.stderr)
+                return 1
+            _write_json_file(lecture_data if args.full else extractor.simplify_lecture_data(lecture_data),
+                             args.output)
+
+        elif args.action == 'import':
+            for path in args.inputs:
+                data = _read_json_file(path)
+                if _data_format(data) is None:
+                    print(f"Bỏ qua {path}: không phải file đầu ra hợp lệ", file=sys.stderr)
+                    continue
+                lecture_data = _convert_data(extractor, data, 'full')
+                course_id = extractor._course_id_for_data(lecture_data, path)
+                count = index.write_course(course_id, lecture_data)
+                print(f"{course_id}\t{count}\t{path}")
+
+        return 0
+    finally:
+        index.close()
+
+
+def run_offline_command(argv):
+    """Chạy các lệnh xử lý JSON không cần trình duyệt"""
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     description='Xử lý file JSON đầu ra không cần trình duyệt')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Chuyển đổi giữa định dạng đầy đủ và đơn giản')
+    convert_parser.add_argument('input', help="File JSON đầu vào ('-' để đọc từ stdin)")
+    convert_parser.add_argument('--to', choices=['simplified', 'full'], required=True, help='Định dạng đích')
+    convert_parser.add_argument('-o', '--output', help='File đầu ra (mặc định: stdout)')
+
+    merge_parser = subparsers.add_parser('merge', help='Gộp nhiều file đầu ra thành một')
+    merge_parser.add_argument('inputs', nargs='+', help='Các file JSON đầu vào')
+    merge_parser.add_argument('--to', choices=['simplified', 'full'],
+                              help='Định dạng đích (mặc định: định dạng của file đầu tiên)')
+    merge_parser.add_argument('--dedupe', action='store_true', help='Loại bỏ bài giảng trùng sau khi gộp')
+    merge_parser.add_argument('-o', '--output', help='File đầu ra (mặc định: stdout)')
+
+    dedupe_parser = subparsers.add_parser('dedupe', help='Loại bỏ bài giảng trùng lặp')
+    dedupe_parser.add_argument('input', help="File JSON đầu vào ('-' để đọc từ stdin)")
+    dedupe_parser.add_argument('--key', choices=['title-video', 'video', 'link'], default='title-video',
+                               help='Tiêu chí so trùng')
+    dedupe_parser.add_argument('-o', '--output', help='File đầu ra (mặc định: stdout)')
+
+    validate_parser = subparsers.add_parser('validate', help='Kiểm tra cấu trúc các file đầu ra')
+    validate_parser.add_argument('inputs', nargs='+', help='Các file JSON cần kiểm tra')
+    validate_parser.add_argument('--require-video', action='store_true',
+                                 help='Coi bài giảng chưa có URL video là lỗi')
+    validate_parser.add_argument('--site-profile', metavar='NAME|FILE',
+                                 help='Hồ sơ trang có url_template dùng để kiểm tra URL video (mặc định: havamath)')
+
+    query_parser = subparsers.add_parser('query', help='Tra cứu chỉ mục bài giảng SQLite của nhiều khóa học')
+    query_parser.add_argument('index', help='File chỉ mục SQLite (tạo bởi --index)')
+    query_actions = query_parser.add_subparsers(dest='action', required=True)
+    query_actions.add_parser('courses', help='Liệt kê khóa học, số bài và số bài thiếu URL')
+    video_parser = query_actions.add_parser('video', help='Các khóa học/bài giảng dùng một video')
+    video_parser.add_argument('video', help='ID hoặc URL YouTube')
+    reused_parser = query_actions.add_parser('reused', help='Video được dùng lại ở nhiều khóa học')
+    reused_parser.add_argument('--min-courses', type=int, default=2)
+    missing_parser = query_actions.add_parser('missing', help='Bài giảng chưa có URL video')
+    missing_parser.add_argument('--course', help='Chỉ xét một khóa học')
+    export_parser = query_actions.add_parser('export', help='Xuất một khóa học ra định dạng JSON hiện có')
+    export_parser.add_argument('course', help='ID khóa học')
+    export_parser.add_argument('--full', action='store_true', help='Xuất định dạng đầy đủ thay vì đơn giản')
+    export_parser.add_argument('-o', '--output', help='File đầu ra (mặc định: stdout)')
+    import_parser = query_actions.add_parser('import', help='Nạp các file đầu ra có sẵn vào chỉ mục')
+    import_parser.add_argument('inputs', nargs='+', help='Các file JSON (<course_id>_videos.json...)')
+
+    args = parser.parse_args(argv)
+    try:
+        extractor = HavamathExtractor(verbose=False, site_profile=getattr(args, 'site_profile', None))
+    except SiteProfileError as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 2
+
+    if args.command == 'query':
+        return _run_query_command(extractor, args)
+
+    try:
+        if args.command == 'convert':
+            data = _read_json_file(args.input)
+            if _data_format(data) is None:
+                print(f"Lỗi: {args.input} không phải file đầu ra hợp lệ", file=sys.stderr)
+                return 1
+            _write_json_file(_convert_data(extractor, data, args.to), args.output)
+
+        elif args.command == 'merge':
+            datasets = [_read_json_file(path) for path in args.inputs]
+            for path, data in zip(args.inputs, datasets):
+                if _data_format(data) is None:
+                    print(f"Lỗi: {path} không phải file đầu ra hợp lệ", file=sys.stderr)
+                    return 1
+
+            target = args.to or _data_format(datasets[0])
+            # Liên kết giả dựng từ thứ tự trong từng file sẽ trùng nhau giữa các file
+            if target == 'full':
+                for path, data in zip(args.inputs, datasets):
+                    if _data_format(data) == 'simplified' and \
+                            not all(lecture.get('link') for lecture in data['lectures']):
+                        print(f"Lỗi: {path} ở định dạng đơn giản không có liên kết bài giảng, "
+                              f"không thể gộp thành định dạng đầy đủ", file=sys.stderr)
+                        return 1
+            if any('shard' in data for data in datasets):
+                merged = _merge_shards(extractor, datasets, target)
+            else:
+                datasets = [_convert_data(extractor, data, target) for data in datasets]
+                field = 'lectures' if target == 'simplified' else 'data'
+                merged = dict(datasets[0], **{field: [lecture for data in datasets for lecture in data[field]]})
+                if target == 'full':
+                    for i, lecture in enumerate(merged['data']):
+                        lecture['Position'] = i + 1
+            if args.dedupe:
+                merged, _ = _dedupe_data(merged, 'title-video')
+            _write_json_file(merged, args.output)
+
+        elif args.command == 'dedupe':
+            data = _read_json_file(args.input)
+            if _data_format(data) is None:
+                print(f"Lỗi: {args.input} không phải file đầu ra hợp lệ", file=sys.stderr)
+                return 1
+            deduped, removed = _dedupe_data(data, args.key)
+            _write_json_file(deduped, args.output)
+            print(f"Đã loại bỏ {removed} bài giảng trùng", file=sys.stderr)
+
+        elif args.command == 'validate':
+            failed = False
+            for path in args.inputs:
+                try:
+                    data = _read_json_file(path)
+                except (OSError, ValueError) as e:
+                    print(f"LỖI {path}: {e}")
+                    failed = True
+                    continue
+
+                errors, count, missing = _validate_data(data, extractor.site, args.require_video)
+                if errors:
+                    failed = True
+                    print(f"LỖI {path}: {len(errors)} lỗi")
+                    for error in errors:
+                        print(f"  {error}")
+                else:
+                    print(f"OK {path}: {count} bài giảng, {missing} chưa có URL video")
+            return 1 if failed else 0
+
+        return 0
+
+    except (OSError, ValueError) as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in OFFLINE_COMMANDS:
+        return run_offline_command(argv)
+
     parser = argparse.ArgumentParser(description='Công cụ trích xuất URL YouTube từ Havamath')
 
     # Nhóm tùy chọn đầu vào
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--url', help='URL khóa học để xử lý')
     group.add_argument('--json', help='File JSON hiện có để xử lý')
+    group.add_argument('--serve', metavar='HOST:PORT',
+                       help='Chạy dịch vụ lâu dài với nhóm trình duyệt khởi động sẵn và API HTTP cục bộ')
+    group.add_argument('--worker', metavar='QUEUE',
+                       help='Chạy worker nhận bài giảng từ hàng đợi dùng chung (vd: sqlite:///mnt/shared/queue.db)')
 
     # Các tùy chọn khác
     parser.add_argument('--cookies', help='Đường dẫn đến file cookies JSON')
     parser.add_argument('--output', help='Đường dẫn file đầu ra')
+    parser.add_argument('--skip-auth-check', action='store_true',
+                        help='Không kiểm tra đăng nhập trước khi chạy và không dừng khi gặp trang đăng nhập')
     parser.add_argument('--no-headless', action='store_true', help='Hiển thị trình duyệt khi chạy')
     parser.add_argument('--skip-videos', action='store_true',
                         help='Chỉ lấy danh sách bài giảng, không trích xuất URL video')
@@ -1045,41 +4583,164 @@ def main():
     parser.add_argument('--wait-time', type=int, default=10, help='Thời gian chờ trang tải (giây)')
     parser.add_argument('--threads', type=int, default=4, help='Số luồng xử lý đồng thời')
     parser.add_argument('--full-output', action='store_true', help='Xuất đầy đủ thông tin, không đơn giản hóa')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Tự điều chỉnh số worker (bắt đầu từ --threads) theo độ trễ, lỗi, tải CPU và bộ nhớ')
+    parser.add_argument('--min-threads', type=int, default=1, help='Số worker tối thiểu khi dùng --adaptive')
+    parser.add_argument('--max-threads', type=int,
+                        help='Số worker tối đa khi dùng --adaptive (mặc định: số lõi CPU)')
+    parser.add_argument('--profile-template', metavar='DIR',
+                        help='Profile Chrome mẫu (đăng nhập sẵn, có cache) được sao chép cho từng trình duyệt; '
+                             'tự tạo khi chưa có hoặc khi file cookies mới hơn')
+    parser.add_argument('--site-profile', metavar='NAME|FILE',
+                        help='Hồ sơ trang (selector, mẫu ID video) theo tên trong site_profiles/ hoặc file JSON '
+                             '(mặc định: havamath)')
+    parser.add_argument('--attach', metavar='HOST:PORT',
+                        help='Dùng Chrome đang chạy (--remote-debugging-port) thay vì khởi động trình duyệt mới; '
+                             'chỉ mở và đóng tab của lần chạy này')
     parser.add_argument('--reuse-browser', action='store_true',
                         help='Tái sử dụng trình duyệt cho các luồng (giảm tài nguyên)')
-
-    args = parser.parse_args()
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help='Giới hạn tổng bộ nhớ (MB) cho các trình duyệt; vượt quá sẽ tái tạo trình duyệt lớn nhất')
+    parser.add_argument('--tabs', type=int, default=0,
+                        help='Dùng một trình duyệt với N tab chạy song song thay cho nhiều trình duyệt (--threads)')
+    parser.add_argument('--no-video-hook', action='store_true',
+                        help='Không chèn script theo dõi ID video vào trang, luôn chờ hết --wait-time rồi quét DOM')
+    parser.add_argument('--non-video', choices=['browse', 'http', 'skip'], default='browse',
+                        help='Bài có vẻ không có video (bài tập, trắc nghiệm, tài liệu hoặc có trong --no-video-cache): '
+                             'mở bằng trình duyệt như thường, chỉ tìm ID trong HTML qua HTTP, hoặc bỏ qua')
+    parser.add_argument('--no-video-cache', metavar='FILE',
+                        help='File cache các bài giảng đã kiểm tra mà không có video')
+    parser.add_argument('--page-load-timeout', type=int, default=30,
+                        help='Thời gian tối đa cho một lần tải trang (giây), quá hạn sẽ quét phần đã tải')
+    parser.add_argument('--script-timeout', type=int, default=20,
+                        help='Thời gian tối đa cho một đoạn JavaScript (giây)')
+    parser.add_argument('--lecture-timeout', type=int, default=120,
+                        help='Hạn chót cho mỗi bài giảng (giây); quá hạn sẽ thay trình duyệt và ghi nhận timeout')
+    parser.add_argument('--enrich', action='store_true',
+                        help='Bổ sung tiêu đề, kênh, ảnh, thời lượng và tình trạng của video YouTube')
+    parser.add_argument('--oembed-endpoint', default=VideoMetadataEnricher.DEFAULT_ENDPOINT,
+                        help='Endpoint kiểu oEmbed dùng để lấy thông tin video')
+    parser.add_argument('--metadata-cache', default='youtube_metadata_cache.json',
+                        help='File cache thông tin video theo ID')
+    parser.add_argument('--enrich-workers', type=int, default=8, help='Số yêu cầu lấy thông tin video đồng thời')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Bắt đầu trích xuất video ngay khi tìm thấy từng bài giảng, gán chương sau')
+    parser.add_argument('--limit', type=int, help='Chỉ xử lý tối đa N bài giảng (tính từ --offset)')
+    parser.add_argument('--offset', type=int, default=0, help='Bỏ qua N bài giảng đầu tiên')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help='Chỉ xử lý shard I trong N shard (chia theo hash URL bài giảng); gộp lại bằng lệnh merge')
+    parser.add_argument('--index', metavar='DB',
+                        help='Ghi kết quả vào chỉ mục SQLite dùng chung cho nhiều khóa học (tra cứu bằng lệnh query)')
+    parser.add_argument('--events', metavar='FILE',
+                        help="Ghi sự kiện JSON (bắt đầu/kết thúc/lỗi của từng bài giảng) vào file, '-' cho stdout")
+    parser.add_argument('--progress', action='store_true',
+                        help='Hiển thị dòng tiến độ với tốc độ (bài/giây) và thời gian còn lại')
+    parser.add_argument('--queue', metavar='QUEUE',
+                        help='Chạy coordinator: đẩy bài giảng vào hàng đợi dùng chung cho các worker')
+    parser.add_argument('--lease-timeout', type=int, default=300,
+                        help='Thời hạn thuê tác vụ (giây) trước khi được giao lại cho worker khác')
+    parser.add_argument('--idle-timeout', type=int, default=60,
+                        help='Worker thoát sau khi hàng đợi trống trong khoảng thời gian này (giây)')
+    store_group = parser.add_mutually_exclusive_group()
+    store_group.add_argument('--record', metavar='DIR',
+                             help='Ghi lại HTML và DOM của các trang đã tải vào thư mục kho')
+    store_group.add_argument('--replay', metavar='DIR',
+                             help='Phát lại các trang đã ghi, không dùng mạng và Chrome')
+
+    args = parser.parse_args(argv)
+    # Khi sự kiện ghi ra stdout ('--events -'), thông báo trạng thái chuyển sang stderr
+    status_out = sys.stderr if args.events == '-' else sys.stdout
+
+    # SIGTERM (bộ lập lịch thu hồi tác vụ) được xử lý giống Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
     try:
+        queue_uri = args.worker or args.queue
+        task_queue = open_task_queue(queue_uri) if queue_uri else None
+
+        # Chế độ tự điều chỉnh: tạo đủ luồng cho mức tối đa, bắt đầu với --threads worker hoạt động
+        max_threads = args.threads
+        if args.adaptive:
+            max_threads = args.max_threads or max(args.threads, os.cpu_count() or 1)
+
+        # Hồ sơ trang được đọc một lần, dùng chung cho trình trích xuất và chỉ mục bài giảng
+        site = load_site_profile(args.site_profile)
         extractor = HavamathExtractor(
             cookies_file=args.cookies,
             headless=not args.no_headless,
             verbose=not args.quiet,
             wait_time=args.wait_time,
             debug=args.debug,
-            max_workers=args.threads,
+            max_workers=max_threads,
             simplified_output=not args.full_output,
-            reuse_driver=args.reuse_browser
+            reuse_driver=args.reuse_browser or bool(args.serve),
+            memory_budget_mb=args.memory_budget,
+            tabs=args.tabs,
+            record_dir=args.record,
+            replay_dir=args.replay,
+            task_queue=task_queue,
+            lease_timeout=args.lease_timeout,
+            events_file=args.events,
+            progress=args.progress,
+            page_load_timeout=args.page_load_timeout,
+            script_timeout=args.script_timeout,
+            lecture_timeout=args.lecture_timeout,
+            enricher=VideoMetadataEnricher(args.oembed_endpoint, args.metadata_cache,
+                                           args.enrich_workers) if args.enrich else None,
+            lecture_index=LectureIndex(args.index, site) if args.index else None,
+            video_hook=not args.no_video_hook,
+            limit=args.limit,
+            offset=args.offset,
+            shard=args.shard,
+            pipeline=args.pipeline,
+            adaptive=args.adaptive,
+            min_workers=args.min_threads,
+            start_workers=min(args.threads, max_threads),
+            auth_check=not args.skip_auth_check,
+            profile_template=args.profile_template,
+            site_profile=site,
+            non_video=args.non_video,
+            no_video_cache=NoVideoCache(args.no_video_cache) if args.no_video_cache else None,
+            attach=args.attach
         )
 
-        if args.url:
+        if args.serve:
+            host, _, port = args.serve.rpartition(':')
+            service = ExtractionService(extractor)
+            if not args.replay:
+                service.warm_up()
+            service.serve_forever(host or '127.0.0.1', int(port))
+            return 0
+        elif args.worker:
+            success = extractor.run_queue_worker(idle_timeout=args.idle_timeout)
+        elif args.url:
             success = extractor.process_full_workflow(args.url, args.output, args.skip_videos)
         elif args.json:
             success = extractor.process_existing_json(args.json, args.output, args.skip_videos)
 
+        extractor.events.flush()
+        if extractor.auth_lost:
+            print("Dừng vì chưa đăng nhập: hãy cập nhật file cookies", file=status_out)
+            return 3
+        if extractor.interrupted:
+            print("\nĐã hủy bởi người dùng, kết quả đã hoàn thành được lưu lại", file=status_out)
+            return 130
         if success:
-            print("Hoàn thành tác vụ thành công!")
+            print("Hoàn thành tác vụ thành công!", file=status_out)
         else:
-            print("Thất bại khi thực hiện tác vụ.")
+            print("Thất bại khi thực hiện tác vụ.", file=status_out)
             return 1
 
         return 0
 
     except KeyboardInterrupt:
-        print("\nĐã hủy bởi người dùng")
+        print("\nĐã hủy bởi người dùng", file=status_out)
         return 130
+    except SiteProfileError as e:
+        print(f"Lỗi: {e}", file=status_out)
+        return 2
     except Exception as e:
-        print(f"Lỗi không mong đợi: {e}")
+        print(f"Lỗi không mong đợi: {e}", file=status_out)
         if args.debug:
             traceback.print_exc()
         return 1
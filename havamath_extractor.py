@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API Python của công cụ trích xuất Havamath
+------------------------------------------
+Mô tả: Nạp havamath-youtube-extractor-final.py (tên file có dấu gạch ngang nên không
+import trực tiếp được) và cung cấp các lớp của nó dưới dạng một module thông thường.
+
+Ví dụ:
+    from havamath_extractor import HavamathExtractor
+
+    with HavamathExtractor(cookies_file='cookies.json', verbose=False) as extractor:
+        for result in extractor.iter_course('https://havamath.vn/courses/toan-6'):
+            print(result.position, result.title, result.video_url)
+"""
+
+import importlib.util
+import os
+import sys
+
+_MODULE_NAME = 'havamath_youtube_extractor_final'
+_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'havamath-youtube-extractor-final.py')
+
+if _MODULE_NAME in sys.modules:
+    _module = sys.modules[_MODULE_NAME]
+else:
+    _spec = importlib.util.spec_from_file_location(_MODULE_NAME, _SCRIPT)
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_MODULE_NAME] = _module
+    _spec.loader.exec_module(_module)
+
+HavamathExtractor = _module.HavamathExtractor
+LectureResult = _module.LectureResult
+ExtractionCancelled = _module.ExtractionCancelled
+AuthenticationLost = _module.AuthenticationLost
+LectureIndex = _module.LectureIndex
+VideoMetadataEnricher = _module.VideoMetadataEnricher
+
+__all__ = ['HavamathExtractor', 'LectureResult', 'ExtractionCancelled', 'AuthenticationLost',
+           'LectureIndex', 'VideoMetadataEnricher']
+
+
+def __getattr__(name):
+    """Các tên khác của script vẫn truy cập được qua module này"""
+    try:
+        return getattr(_module, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
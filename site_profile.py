@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hồ sơ trang khóa học (site profile) dùng chung cho các công cụ trích xuất
+------------------------------------------
+Mô tả: Đọc file JSON khai báo URL gốc, selector, quy tắc bỏ qua và mẫu ID video
+của một trang, biên dịch một lần thành các bộ so khớp dùng lại cho mọi trang.
+Hồ sơ mặc định nằm trong thư mục site_profiles/ cạnh file này.
+"""
+
+import json
+import os
+import re
+from urllib.parse import urljoin, urlparse
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_profiles')
+DEFAULT_PROFILE = 'havamath'
+
+# Các phương pháp tìm video theo thứ tự chạy; hồ sơ chỉ bật những phương pháp hợp với trang
+VIDEO_METHODS = ('iframe', 'data-youtube-id', 'link', 'page-source', 'javascript')
+
+
+class SiteProfileError(ValueError):
+    """File hồ sơ không đọc được hoặc khai báo không hợp lệ"""
+
+
+class SiteProfile:
+    """Hồ sơ đã biên dịch: selector, tập tiêu đề bỏ qua và các regex đã compile sẵn"""
+
+    def __init__(self, config, source=None):
+        self.source = source
+        self.name = config['name']
+        self.base_url = config['base_url'].rstrip('/')
+        self.domain = urlparse(self.base_url).netloc
+
+        lecture = config['lecture']
+        self.lecture_selector = lecture['selector']
+        self.lecture_marker = lecture['path_marker']
+        self.skip_titles = frozenset(lecture.get('skip_titles', []))
+
+        # Dấu hiệu bài không có video (bài tập, trắc nghiệm, tài liệu): mẫu tiêu đề và mẫu cho
+        # class/biểu tượng/nhãn/URL của liên kết; không khai báo thì không bài nào bị coi là không có video
+        lecture_types = config.get('lecture_types', {})
+        self.non_video_title_pattern = re.compile(lecture_types.get('non_video_title_pattern', r'(?!)'), re.IGNORECASE)
+        self.non_video_hint_pattern = re.compile(lecture_types.get('non_video_hint_pattern', r'(?!)'), re.IGNORECASE)
+
+        chapters = config['chapters']
+        self.chapter_heading_selector = chapters['heading_selector']
+        self.chapter_heading_tags = tuple(chapters['heading_tags'])
+        self.chapter_class_pattern = re.compile(chapters['class_pattern'], re.IGNORECASE)
+        self.chapter_text_pattern = re.compile(chapters['text_pattern'], re.IGNORECASE)
+        self.chapter_title_pattern = re.compile(chapters['title_pattern'])
+        # Dùng cho phương pháp phân tích bằng JavaScript: các regex phải viết theo cú pháp chung của Python và JS
+        self.chapter_container_selector = chapters.get('container_selector')
+        self.chapter_script_heading_selector = chapters.get('script_heading_selector', self.chapter_heading_selector)
+
+        self.login_url_pattern = re.compile(config.get('auth', {}).get('login_url_pattern', r'(?!)'),
+                                            re.IGNORECASE)
+
+        video = config['video']
+        self.video_methods = tuple(video['methods'])
+        unknown = set(self.video_methods) - set(VIDEO_METHODS)
+        if unknown:
+            raise SiteProfileError(f"Phương pháp tìm video không hỗ trợ: {', '.join(sorted(unknown))}")
+        self.video_url_template = video['url_template']
+        # URL video chuẩn hóa: tiền tố và regex kiểm tra đều dựng từ url_template
+        prefix, placeholder, suffix = self.video_url_template.partition('{id}')
+        if not placeholder:
+            raise SiteProfileError("url_template phải chứa {id}")
+        self.video_url_prefix = prefix
+        self.video_id_source = video.get('id_pattern', r'[a-zA-Z0-9_-]{11}')
+        self.video_id_pattern = re.compile(f"^(?:{self.video_id_source})$")
+        self.video_url_pattern = re.compile(f"^{re.escape(prefix)}({self.video_id_source}){re.escape(suffix)}$")
+        # URL video đầy đủ (phải đúng host) để lấy ID khi ghi chỉ mục hoặc tra cứu
+        self.video_link_pattern = re.compile(video.get('link_pattern', r'(?!)'))
+        self.iframe_selector = video.get('iframe_selector')
+        self.data_attribute = video.get('data_attribute')
+        self.link_selector = video.get('link_selector')
+        self.page_source_markers = tuple(video.get('page_source_markers', []))
+        self.url_id_patterns = [re.compile(pattern) for pattern in video['url_id_patterns']]
+        self.page_id_patterns = [re.compile(pattern) for pattern in video.get('page_id_patterns', [])]
+        # Script theo dõi video trong trình duyệt: mẫu src (cú pháp chung Python/JS) và các thuộc tính chứa ID
+        self.hook_src_pattern = video.get('src_pattern', r'(?!)')
+        self.hook_id_attributes = tuple(video.get('id_attributes', [self.data_attribute] if self.data_attribute else []))
+
+    def uses(self, method):
+        """Phương pháp tìm video có được bật cho trang này không"""
+        return method in self.video_methods
+
+    def absolute_url(self, href):
+        """URL đầy đủ của một liên kết tương đối trên trang"""
+        return urljoin(self.base_url + '/', href)
+
+    def is_lecture_link(self, href):
+        return bool(href) and self.lecture_marker in href
+
+    def skip_title(self, title):
+        """Tiêu đề của nút/liên kết không phải bài giảng (ví dụ "Vào học")"""
+        return title in self.skip_titles
+
+    def non_video_reason(self, title, hints=''):
+        """'title'/'hint' nếu bài giảng có vẻ không có video, None nếu không có dấu hiệu nào"""
+        if title and self.non_video_title_pattern.search(title):
+            return 'title'
+        if hints and self.non_video_hint_pattern.search(hints):
+            return 'hint'
+        return None
+
+    def video_id_from_url(self, text):
+        """ID video đầu tiên khớp với các mẫu URL/thuộc tính, theo thứ tự ưu tiên"""
+        for pattern in self.url_id_patterns:
+            match = pattern.search(text)
+            if match:
+                return match.group(1)
+        return None
+
+    def video_id_from_page(self, page_source):
+        """ID video trong mã nguồn trang; bỏ qua ngay khi trang không có từ khóa nào"""
+        if self.page_source_markers and not any(marker in page_source for marker in self.page_source_markers):
+            return None
+        for pattern in self.page_id_patterns:
+            match = pattern.search(page_source)
+            if match:
+                return match.group(1)
+        return None
+
+    def video_url(self, video_id):
+        return self.video_url_template.format(id=video_id)
+
+    def is_video_url(self, url):
+        """URL có đúng dạng url_template (URL video chuẩn hóa mà trình trích xuất ghi ra) không"""
+        return bool(url) and self.video_url_pattern.match(url) is not None
+
+    def video_id_from_video_url(self, url):
+        """ID video của một URL dạng url_template, None nếu không khớp"""
+        match = self.video_url_pattern.match(url or '')
+        return match.group(1) if match else None
+
+    def is_video_id(self, value):
+        """Chuỗi có đúng là một ID video (theo id_pattern) không"""
+        return bool(value) and self.video_id_pattern.match(value) is not None
+
+    def video_id_from_link(self, value):
+        """ID video từ chính ID, URL dạng url_template hoặc URL video đầy đủ khớp link_pattern"""
+        value = (value or '').strip()
+        if self.is_video_id(value):
+            return value
+        youtube_id = self.video_id_from_video_url(value)
+        if youtube_id:
+            return youtube_id
+        match = self.video_link_pattern.match(value)
+        return match.group(1) if match else None
+
+
+def load_site_profile(name_or_path=None):
+    """Đọc hồ sơ theo tên (trong site_profiles/) hoặc theo đường dẫn file JSON"""
+    value = name_or_path or DEFAULT_PROFILE
+    if value.endswith('.json') or os.sep in value:
+        path = value
+    else:
+        path = os.path.join(PROFILE_DIR, f"{value}.json")
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return SiteProfile(config, path)
+    except SiteProfileError:
+        raise
+    except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+        raise SiteProfileError(f"Không đọc được hồ sơ trang {path}: {e}")
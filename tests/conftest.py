@@ -0,0 +1,35 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def extractor_module():
+    import havamath_extractor
+    return havamath_extractor
+
+
+@pytest.fixture(scope='session')
+def workflow_module():
+    """havamath-course-workflow.py has a hyphenated name, so it is loaded from its path"""
+    spec = importlib.util.spec_from_file_location('havamath_course_workflow',
+                                                  os.path.join(ROOT, 'havamath-course-workflow.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def benchmark_module():
+    """havamath-heuristics-benchmark.py is loaded from its path for the same reason"""
+    spec = importlib.util.spec_from_file_location('havamath_heuristics_benchmark',
+                                                  os.path.join(ROOT, 'havamath-heuristics-benchmark.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
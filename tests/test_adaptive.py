@@ -0,0 +1,65 @@
+import sys
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def controller(extractor_module, monkeypatch):
+    module = sys.modules['havamath_youtube_extractor_final']
+    monkeypatch.setattr(module, 'host_load', lambda: None)
+    monkeypatch.setattr(module, 'available_memory_fraction', lambda: None)
+    limiter = extractor_module.ConcurrencyLimiter(4)
+    events = []
+
+    class Events:
+        def emit(self, event, **fields):
+            events.append((event, fields))
+
+    controller = extractor_module.AdaptiveConcurrency(limiter, 2, 6, events=Events(), min_interval=0)
+    controller.emitted = events
+    return controller
+
+
+def test_errors_decrease_and_stable_rounds_increase(controller):
+    limiter = controller.limiter
+    limiter._waiting = 3  # Còn bài giảng đang chờ worker
+
+    for outcome in ('ok', 'error', 'timeout', 'ok'):
+        controller.record(1.0, outcome)
+    assert limiter.limit == 3
+    assert 'lỗi/timeout 50%' in controller.emitted[-1][1]['reason']
+
+    for _ in range(4):
+        controller.record(1.0, 'ok')
+    assert limiter.limit == 4
+    assert controller.adjustments == 2
+
+    # Không còn bài giảng chờ: giữ nguyên
+    limiter._waiting = 0
+    for _ in range(4):
+        controller.record(1.0, 'ok')
+    assert limiter.limit == 4
+
+
+def test_latency_spike_decreases_down_to_min_workers(controller):
+    limiter = controller.limiter
+    controller._decide([(1.0, 'ok')] * 4, 1.0)
+    for _ in range(3):
+        controller._decide([(5.0, 'ok')] * 4, 1.0)
+    assert limiter.limit == controller.min_workers
+    assert controller.emitted[-1][1]['median_latency_s'] == 5.0
+
+
+def test_raising_limit_wakes_waiting_worker(extractor_module):
+    limiter = extractor_module.ConcurrencyLimiter(1)
+    limiter.acquire()
+    started = threading.Event()
+    worker = threading.Thread(target=lambda: (limiter.acquire(), started.set()))
+    worker.start()
+    assert not started.wait(0.2)
+    assert limiter.waiting == 1
+
+    limiter.set_limit(2)
+    assert started.wait(2)
+    worker.join()
@@ -0,0 +1,119 @@
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def devtools():
+    """Endpoint HTTP của DevTools giả lập, ghi lại các tab được yêu cầu đóng"""
+    closed = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if not self.path.startswith('/json/close/'):
+                self.send_error(404)
+                return
+            closed.append(self.path[len('/json/close/'):])
+            body = b'Target is closing'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}", closed
+    server.shutdown()
+    server.server_close()
+
+
+class AttachedDriver:
+    """Driver gắn vào Chrome có sẵn: tab 'operator' là của người vận hành"""
+    ids = itertools.count(1)
+
+    def __init__(self):
+        self.current_window_handle = 'operator'
+        self.quit_calls = 0
+        driver = self
+
+        class SwitchTo:
+            def new_window(self, kind):
+                driver.current_window_handle = f"TAB{next(driver.ids)}"
+
+        self.switch_to = SwitchTo()
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def attach(extractor, driver, tabs=1):
+    extractor._attached_tabs[driver] = []
+    return [extractor._open_tab(driver) for _ in range(tabs)]
+
+
+def test_close_only_closes_own_tabs(extractor_module, devtools):
+    address, closed = devtools
+    extractor = extractor_module.HavamathExtractor(verbose=False, attach=address)
+    main, worker = AttachedDriver(), AttachedDriver()
+    main_tabs = attach(extractor, main)
+    worker_tabs = attach(extractor, worker, tabs=2)
+    extractor.driver = main
+    extractor.worker_drivers['worker_0'] = worker
+
+    extractor.close()
+
+    assert sorted(closed) == sorted(main_tabs + worker_tabs)
+    assert 'operator' not in closed
+    assert main.quit_calls == 1 and worker.quit_calls == 1
+    assert extractor._attached_tabs == {}
+
+
+def test_timeout_closes_tab_of_stuck_worker(extractor_module, devtools):
+    address, closed = devtools
+    extractor = extractor_module.HavamathExtractor(verbose=False, attach=address)
+    try:
+        stuck, other = AttachedDriver(), AttachedDriver()
+        [stuck_tab] = attach(extractor, stuck)
+        attach(extractor, other)
+        extractor.worker_drivers.update({'worker_0': stuck, 'worker_1': other})
+
+        extractor._on_lecture_timeout('worker_0', 'https://havamath.vn/learn/tap-hop')
+
+        assert closed == [stuck_tab]
+        assert list(extractor.worker_drivers) == ['worker_1']
+    finally:
+        extractor.close()
+
+
+def test_unreachable_devtools_does_not_raise(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False, attach='127.0.0.1:9')
+    driver = AttachedDriver()
+    attach(extractor, driver)
+    extractor.driver = driver
+    extractor.close()
+    assert driver.quit_calls == 1
+
+
+def test_tabs_of_launched_browsers_are_not_tracked(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False)
+    try:
+        extractor._open_tab(AttachedDriver())
+        assert extractor._attached_tabs == {}
+    finally:
+        extractor.close()
+
+
+def test_attach_without_cookies_skips_preflight(extractor_module, devtools):
+    address, _ = devtools
+    extractor = extractor_module.HavamathExtractor(verbose=False, attach=address)
+    try:
+        assert extractor.preflight_auth('http://127.0.0.1:9/courses/toan-6')
+        assert not extractor.auth_lost
+    finally:
+        extractor.close()
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+COURSE_HTML = '<html><body><a href="/learn/tap-hop">Tập hợp</a></body></html>'
+LOGIN_HTML = '<form action="/dang-nhap"><input type="password" name="password"></form>'
+
+
+@pytest.fixture
+def site():
+    """Trang cục bộ: khóa học đọc được, chuyển hướng tới trang đăng nhập, hoặc bị từ chối"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            requests.append(self.path)
+            if self.path == '/courses/het-phien':
+                self.send_response(302)
+                self.send_header('Location', '/dang-nhap')
+                self.end_headers()
+                return
+            status, body = {'/courses/cam': (403, 'Forbidden'), '/dang-nhap': (200, LOGIN_HTML)}.get(
+                self.path, (200, COURSE_HTML))
+            body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def write_cookies(path, **expiry_offsets):
+    now = time.time()
+    cookies = [{"name": name, "value": "x", "domain": "127.0.0.1", "path": "/", "expirationDate": now + offset}
+               for name, offset in expiry_offsets.items()]
+    cookies.append({"name": "auth_session", "value": "x", "session": True, "expirationDate": now - 60})
+    with open(path, 'w') as f:
+        json.dump(cookies, f)
+    return str(path)
+
+
+def make_extractor(extractor_module, cookies_file):
+    extractor = extractor_module.HavamathExtractor(cookies_file=cookies_file, verbose=False)
+    events = []
+    extractor.events.emit = lambda event, **fields: events.append((event, fields))
+    return extractor, events
+
+
+def test_cookie_expiry_status_only_checks_auth_cookies(extractor_module, tmp_path):
+    cookies_file = write_cookies(tmp_path / 'cookies.json', session_token=-60, remember_me=3600, _ga=-60,
+                                 auth_refresh=7 * 86400)
+    extractor, _ = make_extractor(extractor_module, cookies_file)
+    try:
+        assert extractor._cookie_expiry_status() == (['session_token'], ['remember_me'])
+    finally:
+        extractor.close()
+
+
+def test_preflight_rejects_expired_cookies_without_request(extractor_module, site, tmp_path):
+    base, requests = site
+    extractor, events = make_extractor(extractor_module, write_cookies(tmp_path / 'cookies.json', session_token=-60))
+    try:
+        assert not extractor.preflight_auth(base + '/courses/toan-6')
+        assert extractor.auth_lost
+        assert events == [('auth_failed', {'url': base + '/courses/toan-6',
+                                           'reason': 'cookie đăng nhập đã hết hạn: session_token'})]
+        assert requests == []
+    finally:
+        extractor.close()
+
+
+@pytest.mark.parametrize('path, reason', [
+    ('/courses/het-phien', 'chuyển hướng tới trang đăng nhập'),
+    ('/courses/cam', 'HTTP 403'),
+])
+def test_preflight_detects_logged_out_session(extractor_module, site, tmp_path, path, reason):
+    base, _ = site
+    extractor, events = make_extractor(extractor_module, write_cookies(tmp_path / 'cookies.json', session_token=3 * 86400))
+    try:
+        assert not extractor.preflight_auth(base + path)
+        [(event, fields)] = events
+        assert event == 'auth_failed' and fields['reason'].startswith(reason)
+    finally:
+        extractor.close()
+
+
+def test_preflight_reuses_course_page(extractor_module, site, tmp_path):
+    base, requests = site
+    extractor, events = make_extractor(extractor_module, write_cookies(tmp_path / 'cookies.json', session_token=3 * 86400))
+    try:
+        assert extractor.preflight_auth(base + '/courses/toan-6')
+        assert events == [] and not extractor.auth_lost
+        # Các bước tìm bài giảng dùng lại HTML đã tải khi kiểm tra
+        page = extractor._course_page(base + '/courses/toan-6')
+        assert page.raw_loaded and page.raw == COURSE_HTML
+        assert requests == ['/courses/toan-6']
+    finally:
+        extractor.close()
+
+
+def test_preflight_skipped_when_disabled(extractor_module, site, tmp_path):
+    base, requests = site
+    extractor = extractor_module.HavamathExtractor(cookies_file=write_cookies(tmp_path / 'cookies.json', session_token=-60),
+                                                   verbose=False, auth_check=False)
+    try:
+        assert extractor.preflight_auth(base + '/courses/toan-6')
+        assert requests == []
+    finally:
+        extractor.close()
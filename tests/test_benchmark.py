@@ -0,0 +1,20 @@
+import json
+
+
+def test_heuristics_keep_precision_and_recall(benchmark_module, tmp_path, capsys):
+    report_file = str(tmp_path / 'report.json')
+    assert benchmark_module.main(['--repeat', '1', '--json', report_file]) == 0
+    assert 'Phân chương' in capsys.readouterr().out
+
+    with open(report_file, encoding='utf-8') as f:
+        report = json.load(f)
+
+    # Không phương pháp nào được đoán sai: thiếu thì được, sai thì không
+    for section in ('video', 'chapters'):
+        for name, result in report[section].items():
+            assert result['precision'] == 1.0, (name, result['misses'])
+
+    # Mức đã đạt trên bộ trang mẫu; thay đổi làm giảm mức này là hồi quy
+    assert report['video']['extract_youtube_url']['correct'] >= 7
+    chapters = report['chapters']['_extract_chapters']
+    assert chapters['correct'] == chapters['relevant']
@@ -0,0 +1,51 @@
+import json
+import os
+import signal
+import threading
+import time
+
+VIDEO_URL = 'https://youtu.be/6MIQlvqDnLU'
+
+
+def test_interrupt_saves_completed_lectures(extractor_module, tmp_path):
+    source = tmp_path / 'lectures.json'
+    lectures = [{"Position": i, "Lecture Title": f"Bài {i}", "Chapter": "Chương 1",
+                 "Lecture Link": f"https://havamath.vn/learn/{i}", "Video URL": ""} for i in range(1, 5)]
+    source.write_text(json.dumps({"export_id": "toan-6-1", "data": lectures}, ensure_ascii=False), encoding='utf-8')
+    output = tmp_path / 'out.json'
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, max_workers=2, auth_check=False,
+                                                   simplified_output=False)
+    events = []
+    extractor.events.emit = lambda event, **fields: events.append(event)
+
+    def extract(url, worker_id=None):
+        extractor._local.error = None
+        extractor._local.method = 'iframe'
+        if url.endswith('/1'):
+            return VIDEO_URL
+        # Các bài khác đang tải trang khi người dùng nhấn Ctrl-C; như extract_youtube_url, bị hủy thì trả về None
+        try:
+            extractor._sleep(30)
+        except extractor_module.ExtractionCancelled:
+            return None
+        return VIDEO_URL
+
+    extractor.extract_youtube_url = extract
+    # Ctrl-C thật: tín hiệu SIGINT gửi tới tiến trình trong lúc luồng chính đang chờ các worker
+    timer = threading.Timer(0.3, os.kill, args=(os.getpid(), signal.SIGINT))
+    try:
+        timer.start()
+        started = time.monotonic()
+        assert extractor.process_existing_json(str(source), str(output))
+        assert time.monotonic() - started < 5
+    finally:
+        timer.cancel()
+        extractor.close()
+
+    assert extractor.interrupted and 'run_cancelled' in events
+    with open(output, encoding='utf-8') as f:
+        saved = {lecture['Position']: lecture for lecture in json.load(f)['data']}
+    assert saved[1]['Video URL'] == VIDEO_URL
+    # Bài bị ngắt giữa chừng giữ nguyên dữ liệu cũ để lần chạy sau xử lý lại
+    assert all(saved[i]['Video URL'] == '' and 'Extract Status' not in saved[i] for i in (2, 3, 4))
@@ -0,0 +1,84 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'corpus')
+
+with open(os.path.join(CORPUS, 'chapters', 'section-containers.html'), encoding='utf-8') as f:
+    COURSE_HTML = f.read()
+
+
+@pytest.fixture
+def site():
+    """Trang khóa học cục bộ, đếm số yêu cầu"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            requests.append(self.path)
+            body = COURSE_HTML.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/courses/toan-6", requests
+    server.shutdown()
+    server.server_close()
+
+
+def no_browser(*args, **kwargs):
+    raise AssertionError("trang khóa học có HTML tĩnh, không cần mở trình duyệt")
+
+
+def test_course_html_fetched_once_per_run(extractor_module, site, tmp_path):
+    course_url, requests = site
+    extractor = extractor_module.HavamathExtractor(verbose=False)
+    extractor._render_course_page = no_browser
+    try:
+        # Yêu cầu kiểm tra đăng nhập cũng là yêu cầu duy nhất tới trang khóa học
+        assert extractor.preflight_auth(course_url)
+        data = extractor.scrape_lecture_list(course_url)
+        assert [row['Lecture Title'] for row in data['data']] == [
+            'Tập hợp', 'Phép cộng và phép trừ', 'Số nguyên âm', 'Thứ tự trong tập hợp số nguyên']
+        assert extractor._extract_chapters(course_url)
+        assert requests == ['/courses/toan-6']
+
+        # Lần chạy mới tải lại trang
+        assert extractor.process_full_workflow(course_url, str(tmp_path / 'lectures.json'), skip_videos=True)
+        assert requests == ['/courses/toan-6'] * 2
+    finally:
+        extractor.close()
+
+
+def test_course_page_rendered_once(extractor_module, tmp_path):
+    course_url = 'https://havamath.vn/courses/toan-6'
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    # HTML thô chưa có bài giảng (trang render bằng JavaScript)
+    store.record(course_url, 'raw', '<html><body><div id="app"></div></body></html>')
+    store.record(course_url, 'dom', COURSE_HTML)
+    loads = []
+
+    class CountingDriver(extractor_module.ReplayDriver):
+        def get(self, url):
+            loads.append(url)
+            super().get(url)
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, replay_dir=str(tmp_path / 'store'))
+    try:
+        extractor._init_driver = lambda worker_id=None: CountingDriver(store)
+        lectures = extractor._extract_chapters(course_url)
+        assert [lecture['title'] for lecture in lectures][:2] == ['Tập hợp', 'Phép cộng và phép trừ']
+        assert extractor.scrape_lecture_list(course_url)['data']
+        assert loads == [course_url]
+    finally:
+        extractor.close()
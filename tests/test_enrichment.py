@@ -0,0 +1,78 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+AVAILABLE, PRIVATE, DEAD, BROKEN = '6MIQlvqDnLU', 'PRIVATE0001', 'DEADVIDEO01', 'BROKEN00001'
+
+
+@pytest.fixture
+def endpoint():
+    """Dịch vụ cục bộ trả lời theo định dạng oEmbed, đếm số yêu cầu cho mỗi video"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            video_url = parse_qs(urlparse(self.path).query)['url'][0]
+            video_id = parse_qs(urlparse(video_url).query)['v'][0]
+            requests.append(video_id)
+            status = {PRIVATE: 403, DEAD: 404, BROKEN: 500}.get(video_id, 200)
+            body = json.dumps({"title": "Tập hợp", "author_name": "Havamath", "duration": 754}).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/oembed", requests
+    server.shutdown()
+    server.server_close()
+
+
+def simplified(*video_ids):
+    return {"lectures": [{"title": f"Bài {i}", "videoUrl": f"https://youtu.be/{video_id}" if video_id else ""}
+                         for i, video_id in enumerate(video_ids, 1)]}
+
+
+def test_enrich_batches_and_classifies(extractor_module, endpoint, tmp_path):
+    url, requests = endpoint
+    cache_file = str(tmp_path / 'metadata.json')
+    enricher = extractor_module.VideoMetadataEnricher(url, cache_file, max_workers=4)
+    data = simplified(AVAILABLE, PRIVATE, DEAD, BROKEN, AVAILABLE, None)
+
+    stats = enricher.enrich_data(data)
+
+    assert stats == {'available': 2, 'private': 1, 'dead': 1, 'error': 1}
+    # Mỗi video chỉ được hỏi một lần dù xuất hiện nhiều lần
+    assert sorted(requests) == sorted([AVAILABLE, PRIVATE, DEAD, BROKEN])
+    lectures = data['lectures']
+    assert lectures[0]['video'] == {"status": "available", "title": "Tập hợp", "author": "Havamath",
+                                    "thumbnail": None, "duration": 754, "id": AVAILABLE}
+    assert 'video' not in lectures[5]
+
+    with open(cache_file, encoding='utf-8') as f:
+        assert set(json.load(f)) == {AVAILABLE, PRIVATE, DEAD}
+
+
+def test_cached_videos_are_not_fetched_again(extractor_module, endpoint, tmp_path):
+    url, requests = endpoint
+    cache_file = str(tmp_path / 'metadata.json')
+    extractor_module.VideoMetadataEnricher(url, cache_file).enrich_data(simplified(AVAILABLE, BROKEN))
+    requests.clear()
+
+    data = {"data": [{"Lecture Title": "Tập hợp", "Video URL": f"https://youtu.be/{AVAILABLE}"},
+                     {"Lecture Title": "Lỗi", "Video URL": f"https://youtu.be/{BROKEN}"}]}
+    stats = extractor_module.VideoMetadataEnricher(url, cache_file).enrich_data(data)
+
+    # Lỗi tạm thời không được lưu vào cache nên được thử lại
+    assert requests == [BROKEN]
+    assert stats == {'available': 1, 'error': 1}
+    assert data['data'][0]['Video Metadata']['status'] == 'available'
@@ -0,0 +1,59 @@
+import json
+
+
+def read_events(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_events_written_as_json_lines(extractor_module, tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    events = extractor_module.EventLog(path)
+    events.emit('run_start', total=2, mode='threads', workers=1)
+    events.emit('lecture_finish', index=0, title='Tập hợp', found=True)
+    events.emit('run_finish', total=2)
+    events.close()
+
+    records = read_events(path)
+    assert [record['event'] for record in records] == ['run_start', 'lecture_finish', 'run_finish']
+    assert records[1]['title'] == 'Tập hợp' and records[1]['found'] is True
+    assert all(isinstance(record['ts'], float) for record in records)
+
+
+class BrokenFile:
+    def write(self, text):
+        raise OSError(28, 'No space left on device')
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_failing_file_sink_is_disabled_once(extractor_module, tmp_path, capsys):
+    events = extractor_module.EventLog(str(tmp_path / 'events.jsonl'))
+    events.emit('run_start', total=1)
+    events.flush()
+    events._file = BrokenFile()
+    events.emit('lecture_start', index=0)
+    events.emit('lecture_finish', index=0)
+    events.console('vẫn in ra console')
+    events.close()
+
+    captured = capsys.readouterr()
+    assert captured.err.count('No space left on device') == 1
+    assert 'vẫn in ra console' in captured.out
+    assert [record['event'] for record in read_events(str(tmp_path / 'events.jsonl'))] == ['run_start']
+
+
+def test_first_event_error_is_reported_once(extractor_module, tmp_path, capsys):
+    path = str(tmp_path / 'events.jsonl')
+    events = extractor_module.EventLog(path)
+    events.emit('lecture_error', error=object())
+    events.emit('lecture_error', error=object())
+    events.emit('run_finish', total=0)
+    events.close()
+
+    assert capsys.readouterr().err.count('Lỗi khi ghi sự kiện') == 1
+    assert [record['event'] for record in read_events(path)] == ['run_finish']
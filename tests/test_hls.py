@@ -0,0 +1,130 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2"
+https://cdn.example.com/720p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+1080p/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:10
+#EXTINF:9.5,
+seg0.ts
+#EXTINF:10.0,
+seg1.ts
+#EXTINF:4.25,
+seg2.ts
+#EXT-X-ENDLIST
+"""
+
+
+@pytest.fixture
+def resolver(workflow_module):
+    workflow_module._require_requests()
+    return workflow_module.HLSResolver(workflow_module.requests.Session())
+
+
+def test_parse_master(resolver):
+    variants = resolver.parse_master(MASTER, 'https://havamath.vn/hls/lesson/master.m3u8')
+
+    assert [v['uri'] for v in variants] == [
+        'https://havamath.vn/hls/lesson/360p/index.m3u8',
+        'https://cdn.example.com/720p/index.m3u8',
+        'https://havamath.vn/hls/lesson/1080p/index.m3u8',
+    ]
+    assert variants[0] == {
+        "uri": 'https://havamath.vn/hls/lesson/360p/index.m3u8',
+        "bandwidth": 800000,
+        "resolution": '640x360',
+        "height": 360,
+        "codecs": 'avc1.4d401e,mp4a.40.2',
+    }
+    assert variants[2]['codecs'] is None
+
+
+def test_parse_master_of_media_playlist(resolver):
+    assert resolver.parse_master(MEDIA, 'https://havamath.vn/hls/lesson/index.m3u8') == []
+
+
+def test_parse_media(resolver):
+    assert resolver.parse_media(MEDIA) == (3, 23.75, True)
+    assert resolver.parse_media(MEDIA.replace('#EXT-X-ENDLIST\n', '')) == (3, 23.75, False)
+
+
+def test_select_variant(resolver):
+    variants = resolver.parse_master(MASTER, 'https://havamath.vn/hls/master.m3u8')
+
+    assert resolver.select_variant(variants)['height'] == 1080
+    resolver.max_height = 720
+    assert resolver.select_variant(variants)['height'] == 720
+    # Không có biến thể nào đủ thấp: chọn biến thể tốt nhất
+    resolver.max_height = 240
+    assert resolver.select_variant(variants)['height'] == 1080
+
+
+@pytest.fixture
+def playlists():
+    """Máy chủ HLS cục bộ; hai master playlist chỉ trả lời khi cả hai được yêu cầu cùng lúc"""
+    requests = []
+    both_masters = threading.Barrier(2, timeout=5)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            requests.append((self.path, self.headers.get('Referer')))
+            if self.path.endswith('/master.m3u8'):
+                both_masters.wait()
+                body = MASTER
+            elif self.path.endswith('/index.m3u8'):
+                body = MEDIA
+            else:
+                self.send_error(404)
+                return
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_resolve_streams_concurrently_once_per_playlist(workflow_module, playlists):
+    base, requests = playlists
+    scraper = workflow_module.HavamathCourseScraper(resolve_hls=True, hls_workers=4, hls_max_height=360)
+    lectures = [
+        {"Lecture Link": "https://havamath.vn/learn/a", "Video URL": base + "/a/master.m3u8"},
+        {"Lecture Link": "https://havamath.vn/learn/a-lai", "Video URL": base + "/a/master.m3u8"},
+        {"Lecture Link": "https://havamath.vn/learn/b", "Video URL": base + "/b/master.m3u8"},
+        {"Lecture Link": "https://havamath.vn/learn/c", "Video URL": base + "/c/mat.m3u8"},
+        {"Lecture Link": "https://havamath.vn/learn/d", "Video URL": "https://youtu.be/6MIQlvqDnLU"},
+    ]
+
+    scraper.resolve_hls_streams({"data": lectures})
+
+    info = lectures[0]['Stream Info']
+    assert info['status'] == 'ok'
+    assert info['selected']['uri'] == base + '/a/360p/index.m3u8'
+    assert (info['segments'], info['duration'], info['live']) == (3, 23.75, False)
+    assert lectures[1]['Stream Info'] is info
+    assert lectures[2]['Stream Info']['status'] == 'ok'
+    assert lectures[3]['Stream Info']['status'] == 'error'
+    assert 'Stream Info' not in lectures[4]
+
+    masters = [request for request in requests if request[0].endswith('/master.m3u8')]
+    # Mỗi playlist chỉ được tải một lần, kèm trang bài giảng làm Referer
+    assert sorted(masters) == [('/a/master.m3u8', 'https://havamath.vn/learn/a'),
+                               ('/b/master.m3u8', 'https://havamath.vn/learn/b')]
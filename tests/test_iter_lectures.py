@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+VIDEO_URL = 'https://youtu.be/6MIQlvqDnLU'
+
+
+def lecture(position):
+    return {"Position": position, "Lecture Title": f"Bài {position}",
+            "Lecture Link": f"https://havamath.vn/learn/{position}"}
+
+
+@pytest.fixture
+def extractor(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False, max_workers=2)
+    extractor.started, extractor.finished = [], []
+    lock = threading.Lock()
+
+    def extract(url, worker_id=None):
+        extractor._local.error = None
+        extractor._local.method = 'iframe'
+        with lock:
+            extractor.started.append(url)
+        try:
+            # Bài số 1 xong ngay, các bài khác chờ đến khi bị hủy
+            if not url.endswith('/1'):
+                extractor._sleep(5)
+            return VIDEO_URL
+        finally:
+            with lock:
+                extractor.finished.append(url)
+
+    extractor.extract_youtube_url = extract
+    yield extractor
+    extractor.close()
+
+
+def test_records_are_read_only_when_there_is_room(extractor):
+    pulled = []
+
+    def records():
+        for position in range(1, 10):
+            pulled.append(position)
+            yield lecture(position)
+
+    results = extractor.iter_lectures(records(), max_in_flight=2)
+    first = next(results)
+    assert first.position == 1 and first.video_url == VIDEO_URL
+    # Hai bài đang chạy cộng một bài được đọc để lấp chỗ của bài vừa xong
+    assert len(pulled) <= 3
+    results.close()
+
+
+def test_none_record_does_not_end_iteration(extractor):
+    records = [lecture(1), None, lecture(2)]
+    extractor.extract_youtube_url = lambda url, worker_id=None: VIDEO_URL
+    assert sorted(result.position for result in extractor.iter_lectures(records)) == [1, 2]
+
+
+def test_close_cancels_and_waits_for_lectures_in_flight(extractor):
+    results = extractor.iter_lectures([lecture(position) for position in range(1, 6)], max_in_flight=3)
+    assert next(results).position == 1
+
+    started = time.monotonic()
+    results.close()
+    assert time.monotonic() - started < 2
+    assert extractor.cancelled
+    # Không bài nào còn chạy sau khi generator đã đóng, và không bài mới nào được bắt đầu
+    assert sorted(extractor.finished) == sorted(extractor.started)
+    started_count = len(extractor.started)
+    time.sleep(0.1)
+    assert len(extractor.started) == started_count <= 4
@@ -0,0 +1,81 @@
+import pytest
+
+
+@pytest.fixture
+def index(extractor_module, tmp_path):
+    index = extractor_module.LectureIndex(str(tmp_path / 'index.db'))
+    yield index
+    index.close()
+
+
+def course(*lectures):
+    return {
+        "export_id": "toan-6-1",
+        "data": [
+            {"Position": i + 1, "Lecture Title": title, "Chapter": chapter,
+             "Lecture Link": f"https://havamath.vn/learn/{i + 1}", "Video URL": video_url}
+            for i, (title, chapter, video_url) in enumerate(lectures)
+        ],
+    }
+
+
+@pytest.mark.parametrize('value', [
+    'https://youtu.be/6MIQlvqDnLU',
+    'https://youtu.be/6MIQlvqDnLU?t=42',
+    'https://www.youtube.com/watch?v=6MIQlvqDnLU',
+    'https://www.youtube.com/embed/6MIQlvqDnLU?rel=0',
+    'https://www.youtube.com/watch?feature=share&v=6MIQlvqDnLU',
+    '6MIQlvqDnLU',
+])
+def test_video_id(index, value):
+    assert index.video_id(value) == '6MIQlvqDnLU'
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    None,
+    'https://havamath.vn/files/de-cuong.pdf?token=AbCdEfGhIjK',
+    'https://havamath.vn/learn/tap-hop-so-tu',
+    'https://youtu.be/6MIQlvqDnLUx',
+    'https://havamath.vn/watch?v=abcdefghijk',
+    'https://havamath.vn/embed/abcdefghijk',
+    'https://havamath.vn/redirect?to=https://youtu.be/6MIQlvqDnLU',
+])
+def test_video_id_requires_video_url(index, value):
+    assert index.video_id(value) is None
+
+
+def test_write_and_export_course(index):
+    data = course(("Tập hợp", "Chương 1", "https://youtu.be/6MIQlvqDnLU"),
+                  ("Phép cộng", "Chương 1", ""))
+
+    assert index.write_course('toan-6', data, 'https://havamath.vn/courses/toan-6') == 2
+    assert index.export_course('toan-6') == data
+    assert index.export_course('toan-7') is None
+    assert [row[:3] for row in index.courses()] == [('toan-6', 2, 1)]
+
+
+def test_queries(index):
+    index.write_course('toan-6', course(("Tập hợp", "Chương 1", "https://youtu.be/6MIQlvqDnLU"),
+                                        ("Phép cộng", "Chương 1", "")))
+    index.write_course('toan-7', course(("Ôn tập", "Chương 0", "https://youtu.be/6MIQlvqDnLU")))
+
+    assert index.find_video('6MIQlvqDnLU') == [('toan-6', 1, 'Tập hợp', 'Chương 1'),
+                                              ('toan-7', 1, 'Ôn tập', 'Chương 0')]
+    assert index.reused_videos() == [('6MIQlvqDnLU', 2, 'toan-6,toan-7')]
+    assert index.missing_videos() == [('toan-6', 2, 'Phép cộng', 'Chương 1', 'missing')]
+    assert index.missing_videos('toan-7') == []
+
+
+def test_partial_write_keeps_other_positions(index):
+    index.write_course('toan-6', course(("A", "Chương 1", ""), ("B", "Chương 1", "")))
+    shard = {"data": [{"Position": 2, "Lecture Title": "B", "Video URL": "https://youtu.be/zEoW8Ze3mlY"}]}
+
+    index.write_course('toan-6', shard, replace=False)
+
+    lectures = index.export_course('toan-6')['data']
+    assert [lecture['Lecture Title'] for lecture in lectures] == ['A', 'B']
+    assert lectures[1]['Video URL'] == 'https://youtu.be/zEoW8Ze3mlY'
+
+    index.write_course('toan-6', shard)
+    assert [lecture['Lecture Title'] for lecture in index.export_course('toan-6')['data']] == ['B']
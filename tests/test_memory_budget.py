@@ -0,0 +1,47 @@
+import sys
+import threading
+
+import pytest
+
+MB = 1024 * 1024
+
+
+class FakeDriver:
+    def __init__(self, rss):
+        self.rss = rss
+        self.closed = False
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('outcome', ['error', 'timeout'])
+def test_budget_enforced_on_every_exit_and_counts_main_driver(extractor_module, monkeypatch, outcome):
+    monkeypatch.setattr(sys.modules['havamath_youtube_extractor_final'], 'driver_tree_rss', lambda driver: driver.rss)
+    extractor = extractor_module.HavamathExtractor(verbose=False, max_workers=4, memory_budget_mb=400)
+    worker_id = threading.current_thread().name
+    main, worker = FakeDriver(300 * MB), FakeDriver(200 * MB)
+    extractor.driver = main
+    extractor.worker_drivers[worker_id] = worker
+    try:
+        def extract(url, worker_id=None):
+            if outcome == 'error':
+                raise RuntimeError('chrome not reachable')
+            return None
+
+        extractor.extract_youtube_url = extract
+        if outcome == 'timeout':
+            extractor.watchdog.end = lambda worker_id: True
+
+        lecture = {"Lecture Title": "Tập hợp", "Lecture Link": "https://havamath.vn/learn/tap-hop"}
+        extractor.process_lecture(lecture, 0, 1)
+
+        assert lecture['Extract Status'] == outcome
+        # 300 MB của trình duyệt chính được tính vào tổng nhưng chỉ trình duyệt của worker bị tái tạo
+        assert set(extractor.memory_monitor.last_usage) == {worker_id, extractor.MAIN_DRIVER_ID}
+        assert worker.closed and worker_id not in extractor.worker_drivers
+        assert not main.closed
+        assert extractor.limiter.limit == 1
+    finally:
+        extractor.driver = None
+        extractor.close()
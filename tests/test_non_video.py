@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+BASE = 'https://havamath.vn/learn/'
+
+
+def lecture(slug, title):
+    return {"Lecture Title": title, "Lecture Link": BASE + slug}
+
+
+@pytest.fixture
+def make_extractor(extractor_module, tmp_path):
+    """Extractor phát lại trang từ kho tạm; trình duyệt chỉ được giả lập qua extract_youtube_url"""
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    store.record(BASE + 'bai-tap-co-video', 'raw', '<iframe src="https://www.youtube.com/embed/6MIQlvqDnLU"></iframe>')
+    store.record(BASE + 'trac-nghiem-1', 'raw', '<form>Câu 1</form>')
+    extractors = []
+
+    def make(non_video, browse=None):
+        cache = extractor_module.NoVideoCache(str(tmp_path / 'no-video.json'))
+        extractor = extractor_module.HavamathExtractor(verbose=False, replay_dir=str(tmp_path / 'store'),
+                                                       non_video=non_video, no_video_cache=cache)
+        extractor.browsed = []
+
+        def extract(url, worker_id=None):
+            extractor.browsed.append(url)
+            extractor._local.error = None
+            extractor._local.method = 'iframe' if browse else None
+            return browse
+
+        extractor.extract_youtube_url = extract
+        extractors.append(extractor)
+        return extractor
+
+    yield make
+    for extractor in extractors:
+        extractor.close()
+
+
+def test_no_video_cache_round_trip(extractor_module, tmp_path):
+    cache_file = str(tmp_path / 'no-video.json')
+    cache = extractor_module.NoVideoCache(cache_file)
+    cache.add(BASE + 'tai-lieu/', 'Tài liệu')
+    cache.add(BASE + 'tai-lieu#top', 'Tài liệu')
+    cache.save()
+
+    reloaded = extractor_module.NoVideoCache(cache_file)
+    assert BASE + 'tai-lieu' in reloaded
+    assert reloaded.entries[BASE + 'tai-lieu']['misses'] == 2
+    reloaded.discard(BASE + 'tai-lieu')
+    reloaded.save()
+    with open(cache_file, encoding='utf-8') as f:
+        assert json.load(f) == {}
+
+
+def test_non_video_reason(make_extractor):
+    extractor = make_extractor('skip')
+    extractor.no_video_cache.add(BASE + 'da-mo', 'Ôn tập')
+
+    assert extractor._non_video_reason(lecture('da-mo', 'Ôn tập')) == 'cache'
+    assert extractor._non_video_reason(lecture('bai-7', 'Bài tập cuối chương')) == 'title'
+    assert extractor._non_video_reason(lecture('trac-nghiem-1', 'Ôn luyện')) == 'hint'
+    assert extractor._non_video_reason(lecture('tap-hop', 'Tập hợp')) is None
+
+
+def test_skip_mode_never_browses(make_extractor):
+    extractor = make_extractor('skip')
+    row = extractor.process_lecture(lecture('trac-nghiem-1', 'Trắc nghiệm'), 0, 1)
+    assert row['Extract Status'] == 'skipped'
+    assert extractor.browsed == []
+
+
+def test_http_mode_reads_raw_html(make_extractor):
+    extractor = make_extractor('http')
+    found = extractor.process_lecture(lecture('bai-tap-co-video', 'Bài tập có lời giải'), 0, 2)
+    missing = extractor.process_lecture(lecture('trac-nghiem-1', 'Trắc nghiệm'), 1, 2)
+
+    assert (found['Extract Status'], found['Video URL']) == ('found', 'https://youtu.be/6MIQlvqDnLU')
+    assert missing['Extract Status'] == 'skipped'
+    assert extractor.browsed == []
+
+
+def test_browse_mode_updates_cache(make_extractor):
+    extractor = make_extractor('browse')
+    row = extractor.process_lecture(lecture('tap-hop', 'Tập hợp'), 0, 1)
+    assert row['Extract Status'] == 'not_found'
+    assert extractor.browsed == [BASE + 'tap-hop']
+    assert extractor._non_video_reason(row) == 'cache'
+
+    # Lần sau tìm thấy video: bài bị xóa khỏi cache
+    extractor = make_extractor('browse', browse='https://youtu.be/6MIQlvqDnLU')
+    extractor.no_video_cache.add(BASE + 'tap-hop', 'Tập hợp')
+    row = extractor.process_lecture(lecture('tap-hop', 'Tập hợp'), 0, 1)
+    assert row['Extract Status'] == 'found'
+    assert BASE + 'tap-hop' not in extractor.no_video_cache
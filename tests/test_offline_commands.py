@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('selenium', 'bs4', 'requests', 'psutil')
+
+FULL_DATA = {
+    "export_id": "toan-6-1",
+    "data": [
+        {"Position": 1, "Lecture Title": "Tập hợp", "Chapter": "Chương 1",
+         "Lecture Link": "https://havamath.vn/learn/tap-hop", "Video URL": "https://youtu.be/6MIQlvqDnLU"},
+        {"Position": 2, "Lecture Title": "Bài tập", "Chapter": "Chương 1",
+         "Lecture Link": "https://havamath.vn/learn/bai-tap", "Video URL": ""},
+    ],
+}
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_import_does_not_load_heavy_dependencies():
+    loaded = run_python(f"import sys, havamath_extractor; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    assert loaded.strip() == '[]'
+
+
+def test_offline_commands_run_without_browser_dependencies(tmp_path):
+    source = tmp_path / 'full.json'
+    source.write_text(json.dumps(FULL_DATA, ensure_ascii=False), encoding='utf-8')
+    target = tmp_path / 'simplified.json'
+
+    loaded = run_python(
+        "import sys, havamath_extractor as h\n"
+        f"assert h.main(['convert', {str(source)!r}, '--to', 'simplified', '-o', {str(target)!r}]) == 0\n"
+        f"assert h.main(['validate', {str(source)!r}]) == 0\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    assert loaded.strip().splitlines()[-1] == '[]'
+
+    with open(target, encoding='utf-8') as f:
+        simplified = json.load(f)
+    assert [lecture['title'] for lecture in simplified['lectures']] == ['Tập hợp', 'Bài tập']
+    assert simplified['lectures'][0]['videoUrl'] == 'https://youtu.be/6MIQlvqDnLU'
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'corpus')
+COURSE_URL = 'https://havamath.vn/courses/toan-6'
+VIDEOS = {
+    'tap-hop': '6MIQlvqDnLU',
+    'phep-cong': 'dQw4w9WgXcQ',
+    'so-nguyen-am': 'M7lc1UVf-VE',
+    'thu-tu-so-nguyen': 'aqz-KE-bpKQ',
+}
+
+
+@pytest.fixture
+def store_dir(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    with open(os.path.join(CORPUS, 'chapters', 'section-containers.html'), encoding='utf-8') as f:
+        course = f.read()
+    store.record(COURSE_URL, 'raw', course)
+    store.record(COURSE_URL, 'dom', course)
+    for slug, video_id in VIDEOS.items():
+        store.record(f'https://havamath.vn/learn/{slug}', 'dom',
+                     f'<iframe src="https://www.youtube.com/embed/{video_id}"></iframe>')
+    return str(tmp_path / 'store')
+
+
+def run(extractor_module, store_dir, output, **options):
+    extractor = extractor_module.HavamathExtractor(verbose=False, replay_dir=store_dir, wait_time=0,
+                                                   max_workers=2, video_hook=False, **options)
+    try:
+        assert extractor.process_full_workflow(COURSE_URL, str(output))
+    finally:
+        extractor.close()
+    with open(output, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_pipeline_matches_sequential_discovery(extractor_module, store_dir, tmp_path):
+    sequential = run(extractor_module, store_dir, tmp_path / 'sequential.json')
+    pipelined = run(extractor_module, store_dir, tmp_path / 'pipelined.json', pipeline=True)
+
+    assert pipelined == sequential
+    lectures = {lecture['title']: lecture for lecture in pipelined['lectures']}
+    assert len(lectures) == len(VIDEOS)
+    # Chương được gán lại sau khi phân chương xong
+    assert lectures['Số nguyên âm']['chapter'] == 'Chương 2: Số nguyên'
+    assert lectures['Tập hợp']['videoUrl'] == 'https://youtu.be/6MIQlvqDnLU'
@@ -0,0 +1,43 @@
+import os
+import subprocess
+
+import pytest
+
+
+def write(path, content='x'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+@pytest.fixture
+def template(extractor_module, tmp_path):
+    template = extractor_module.ProfileTemplate(str(tmp_path / 'template'))
+    for name in ('Default/Cache/Cache_Data/0123456789abcdef_0', 'Default/Cache/Cache_Data/index',
+                 'Default/Code Cache/js/fedcba9876543210_0', 'Default/Code Cache/js/index-dir/the-real-index',
+                 'Default/Preferences', 'Default/Cookies', 'SingletonLock', 'Local State'):
+        write(os.path.join(template.path, name))
+    template.mark_ready()
+    return template
+
+
+def test_clone_without_reflink_hardlinks_cache_entries(template, monkeypatch):
+    def no_reflink(args, **kwargs):
+        raise subprocess.CalledProcessError(1, args, stderr=b'failed to clone: Operation not supported')
+
+    monkeypatch.setattr(subprocess, 'run', no_reflink)
+    clone = template.clone()
+    try:
+        def same_inode(name):
+            return os.stat(os.path.join(template.path, name)).st_ino == os.stat(os.path.join(clone, name)).st_ino
+
+        assert same_inode('Default/Cache/Cache_Data/0123456789abcdef_0')
+        assert same_inode('Default/Code Cache/js/fedcba9876543210_0')
+        assert not same_inode('Default/Cache/Cache_Data/index')
+        assert not same_inode('Default/Code Cache/js/index-dir/the-real-index')
+        assert not same_inode('Default/Preferences')
+        assert not same_inode('Local State')
+        assert not os.path.exists(os.path.join(clone, 'SingletonLock'))
+    finally:
+        template.discard(clone)
+    assert os.path.exists(os.path.join(template.path, 'Default/Cache/Cache_Data/0123456789abcdef_0'))
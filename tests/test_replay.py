@@ -0,0 +1,55 @@
+import os
+
+LECTURE_URL = 'https://havamath.vn/learn/tap-hop'
+LECTURE_HTML = ('<html><body><h1>Tập hợp</h1><a href="/learn/phep-cong">Tiếp</a>'
+                '<iframe src="https://www.youtube.com/embed/6MIQlvqDnLU?rel=0"></iframe></body></html>')
+
+
+def object_files(store):
+    return [name for _, _, files in os.walk(store.objects_dir) for name in files]
+
+
+def test_page_store_round_trip(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    digest = store.record(LECTURE_URL, 'dom', LECTURE_HTML)
+    # Nội dung trùng lặp chỉ được lưu một lần; phần #fragment của URL bị bỏ qua
+    assert store.record(LECTURE_URL + '#video', 'raw', LECTURE_HTML) == digest
+    assert len(object_files(store)) == 1
+
+    reopened = extractor_module.PageStore(str(tmp_path / 'store'))
+    assert reopened.load(LECTURE_URL, 'dom') == LECTURE_HTML
+    assert reopened.load(LECTURE_URL, 'raw') == LECTURE_HTML
+    assert reopened.load('https://havamath.vn/learn/khac', 'dom') is None
+
+
+def test_replay_driver_reads_recorded_dom(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    store.record(LECTURE_URL, 'dom', LECTURE_HTML)
+    store.record('https://havamath.vn/learn/chi-co-html', 'raw', '<p>raw</p>')
+    driver = extractor_module.ReplayDriver(store)
+
+    driver.get(LECTURE_URL)
+    assert driver.current_url == LECTURE_URL
+    [link] = driver.find_elements('css selector', "a[href*='/learn/']")
+    assert link.get_attribute('href') == 'https://havamath.vn/learn/phep-cong'
+    assert driver.find_element('tag name', 'h1').text == 'Tập hợp'
+
+    # Mỗi tab giữ trang riêng; trang chưa render thì phát lại HTML thô
+    first = driver.current_window_handle
+    driver.switch_to.new_window('tab')
+    driver.get('https://havamath.vn/learn/chi-co-html')
+    assert driver.page_source == '<p>raw</p>'
+    driver.switch_to.window(first)
+    assert driver.page_source == LECTURE_HTML
+
+
+def test_recorded_pages_replay_to_same_result(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    store.record(LECTURE_URL, 'dom', LECTURE_HTML)
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, replay_dir=str(tmp_path / 'store'))
+    try:
+        assert extractor.extract_youtube_url(LECTURE_URL) == 'https://youtu.be/6MIQlvqDnLU'
+        assert extractor._local.method == 'iframe'
+    finally:
+        extractor.close()
@@ -0,0 +1,95 @@
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+VIDEO_URL = 'https://youtu.be/6MIQlvqDnLU'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def service(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False, max_workers=2)
+
+    def extract(url, worker_id=None):
+        extractor._local.error = None
+        extractor._local.method = 'iframe'
+        return VIDEO_URL if not url.endswith('/khong-co-video') else None
+
+    extractor.extract_youtube_url = extract
+    service = extractor_module.ExtractionService(extractor)
+    yield service
+    service.executor.shutdown(wait=True)
+    extractor.close()
+
+
+LECTURES = [
+    {"Lecture Title": "Tập hợp", "Lecture Link": "https://havamath.vn/learn/tap-hop", "Chapter": "Chương 1"},
+    {"Lecture Title": "Ôn tập", "Lecture Link": "https://havamath.vn/learn/khong-co-video", "Chapter": "Chương 1"},
+]
+
+
+def test_job_results_stream_as_lectures_finish(service):
+    job = service.submit({"data": [dict(lecture) for lecture in LECTURES]})
+    lines = []
+    service.stream_results(job, lines.append)
+
+    assert job.status == 'done' and job.total == 2
+    results = sorted((json.loads(line) for line in lines), key=lambda result: result['position'])
+    assert results == [
+        {"position": 1, "title": "Tập hợp", "videoUrl": VIDEO_URL, "chapter": "Chương 1"},
+        {"position": 2, "title": "Ôn tập", "videoUrl": "", "chapter": "Chương 1"},
+    ]
+    assert [entry['id'] for entry in service.list_jobs()] == [job.job_id]
+
+
+def test_submit_requires_course_or_lectures(service):
+    with pytest.raises(ValueError):
+        service.submit({"data": "không phải danh sách"})
+
+
+def request(port, path, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data),
+                                    timeout=5) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8')
+
+
+def test_http_api(service):
+    port = free_port()
+    threading.Thread(target=service.serve_forever, args=('127.0.0.1', port), daemon=True).start()
+    for _ in range(50):
+        try:
+            status, body = request(port, '/health')
+            break
+        except OSError:
+            time.sleep(0.05)
+    assert status == 200 and json.loads(body)['status'] == 'ok'
+
+    status, body = request(port, '/jobs', {"data": [dict(lecture) for lecture in LECTURES]})
+    assert status == 202
+    job_id = json.loads(body)['id']
+
+    status, body = request(port, f'/jobs/{job_id}/results')
+    assert status == 200
+    assert sorted(json.loads(line)['position'] for line in body.splitlines()) == [1, 2]
+    status, body = request(port, f'/jobs/{job_id}')
+    assert json.loads(body)['status'] == 'done' and json.loads(body)['completed'] == 2
+
+    assert request(port, '/jobs', {"course": "thiếu course_url"})[0] == 400
+    assert request(port, '/jobs/khong-co')[0] == 404
+
+    service.extractor.auth_lost = True
+    assert request(port, '/health')[0] == 503
@@ -0,0 +1,111 @@
+import argparse
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def extractor(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False)
+    yield extractor
+    extractor.close()
+
+
+URLS = [f"https://havamath.vn/learn/bai-{i}" for i in range(50)]
+
+
+def test_canonical_lecture_url(extractor_module):
+    canonical = extractor_module.canonical_lecture_url
+    assert canonical('HTTPS://Havamath.VN/learn/tap-hop/#video') == 'https://havamath.vn/learn/tap-hop'
+    assert canonical('https://havamath.vn/learn/tap-hop?lesson=2') == 'https://havamath.vn/learn/tap-hop?lesson=2'
+
+
+def test_lecture_shard_is_stable_and_partitions_urls(extractor_module):
+    lecture_shard = extractor_module.lecture_shard
+    shards = [lecture_shard(url, 4) for url in URLS]
+
+    assert all(0 <= shard < 4 for shard in shards)
+    assert len(set(shards)) == 4
+    # Cùng một bài giảng viết khác nhau vẫn thuộc cùng một shard
+    assert [lecture_shard(url.replace('https://havamath.vn', 'HTTPS://Havamath.VN') + '/#x', 4)
+            for url in URLS] == shards
+
+
+@pytest.mark.parametrize('value, expected', [('0/1', (0, 1)), ('2/3', (2, 3))])
+def test_parse_shard(extractor_module, value, expected):
+    assert extractor_module.parse_shard(value) == expected
+
+
+@pytest.mark.parametrize('value', ['3/3', '1', 'a/b', '-1/2', ''])
+def test_parse_shard_rejects_invalid_values(extractor_module, value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        extractor_module.parse_shard(value)
+
+
+def shard_output(extractor_module, index, count, fmt='full'):
+    lectures = [
+        {"Position": position, "Lecture Title": f"Bài {position}", "Lecture Link": url,
+         "Video URL": f"https://youtu.be/{position:011d}", "Chapter": "Chương 1"}
+        for position, url in enumerate(URLS, 1)
+        if extractor_module.lecture_shard(url, count) == index
+    ]
+    return {"export_id": "toan-6-1", "shard": f"{index}/{count}", "data": lectures}
+
+
+def test_merge_shards_restores_original_order(extractor_module, extractor):
+    datasets = [shard_output(extractor_module, i, 3) for i in (2, 0, 1)]
+    # Một shard được gộp hai lần chỉ được tính một lần
+    datasets.append(shard_output(extractor_module, 0, 3))
+
+    merged = extractor_module._merge_shards(extractor, datasets, 'full')
+
+    assert 'shard' not in merged
+    assert [lecture['Position'] for lecture in merged['data']] == list(range(1, len(URLS) + 1))
+    assert [lecture['Lecture Link'] for lecture in merged['data']] == URLS
+
+
+def test_merge_shards_warns_about_missing_shards(extractor_module, extractor, capsys):
+    merged = extractor_module._merge_shards(extractor, [shard_output(extractor_module, 0, 3)], 'full')
+
+    assert '1 shard' in capsys.readouterr().err
+    assert len(merged['data']) == sum(extractor_module.lecture_shard(url, 3) == 0 for url in URLS)
+
+
+def test_merge_simplified_shards_to_full_keeps_links(extractor_module, extractor, tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"shard-{i}.json"
+        simplified = extractor.simplify_lecture_data(shard_output(extractor_module, i, 3), with_position=True)
+        extractor_module._write_json_file(simplified, str(path))
+        paths.append(str(path))
+
+    output = tmp_path / 'merged.json'
+    assert extractor_module.run_offline_command(['merge', *paths, '--to', 'full', '-o', str(output)]) == 0
+
+    merged = extractor_module._read_json_file(str(output))
+    assert [lecture['Lecture Link'] for lecture in merged['data']] == URLS
+
+
+def test_merge_refuses_full_output_without_links(extractor_module, extractor, tmp_path, capsys):
+    path = tmp_path / 'simplified.json'
+    extractor_module._write_json_file(extractor.simplify_lecture_data(shard_output(extractor_module, 0, 1)), str(path))
+
+    assert extractor_module.run_offline_command(['merge', str(path), '--to', 'full']) == 1
+    assert 'liên kết' in capsys.readouterr().err
+
+
+def test_select_lectures_leaves_caller_records_unchanged(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False, limit=10, shard=(0, 2))
+    try:
+        lectures = [{"Position": position, "Lecture Link": url, "Lecture List Limit": 100}
+                    for position, url in enumerate(URLS, 1)]
+        data = {"export_id": "toan-6-1", "data": lectures}
+        snapshot = [dict(lecture) for lecture in lectures]
+
+        selected = extractor._select_lectures(data)
+
+        assert selected['shard'] == '0/2'
+        assert selected['data'] and all(lecture['Lecture List Limit'] == 10 for lecture in selected['data'])
+        assert all(extractor_module.lecture_shard(lecture['Lecture Link'], 2) == 0 for lecture in selected['data'])
+        assert lectures == snapshot and data == {"export_id": "toan-6-1", "data": lectures}
+    finally:
+        extractor.close()
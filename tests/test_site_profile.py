@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from site_profile import PROFILE_DIR, SiteProfile, load_site_profile
+
+
+@pytest.fixture
+def vimeo_profile():
+    with open(f"{PROFILE_DIR}/havamath.json", encoding='utf-8') as f:
+        config = json.load(f)
+    config['video'].update({
+        "url_template": "https://vimeo.com/{id}",
+        "id_pattern": "\\d{9}",
+        "link_pattern": "^https://(?:player\\.)?vimeo\\.com/(?:video/)?(\\d{9})(?:$|[?#])",
+        "src_pattern": "player\\.vimeo\\.com/video/(\\d{9})",
+        "id_attributes": ["data-vimeo-id"],
+    })
+    return SiteProfile(config)
+
+
+def test_video_ids_follow_profile(vimeo_profile):
+    assert vimeo_profile.is_video_id('123456789')
+    assert not vimeo_profile.is_video_id('6MIQlvqDnLU')
+    assert vimeo_profile.video_id_from_link('https://player.vimeo.com/video/123456789?h=1') == '123456789'
+    assert vimeo_profile.video_id_from_link('https://vimeo.com/123456789') == '123456789'
+    assert vimeo_profile.video_id_from_link('https://youtu.be/6MIQlvqDnLU') is None
+
+
+def test_lecture_index_uses_profile(extractor_module, vimeo_profile, tmp_path):
+    index = extractor_module.LectureIndex(str(tmp_path / 'index.db'), vimeo_profile)
+    try:
+        assert index.video_id('https://vimeo.com/123456789') == '123456789'
+        assert index.video_id('https://youtu.be/6MIQlvqDnLU') is None
+    finally:
+        index.close()
+
+
+def test_video_hook_script_uses_profile(extractor_module, vimeo_profile):
+    script = extractor_module.video_hook_script(vimeo_profile)
+    assert '__HOOK_CONFIG__' not in script
+    assert '"attributes": ["data-vimeo-id"]' in script
+    assert '"srcPattern": "player\\\\.vimeo\\\\.com/video/(\\\\d{9})"' in script
+    assert 'data-youtube-id' not in script
+
+    default = extractor_module.video_hook_script(load_site_profile())
+    assert '"attributes": ["data-youtube-id", "data-video-id"]' in default
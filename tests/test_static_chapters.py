@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'corpus')
+
+with open(os.path.join(CORPUS, 'manifest.json'), encoding='utf-8') as f:
+    CHAPTER_PAGES = json.load(f)['chapter_pages']
+
+
+@pytest.fixture
+def extractor(extractor_module, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    store = extractor_module.PageStore(store_dir)
+    for case in CHAPTER_PAGES:
+        with open(os.path.join(CORPUS, case['file']), encoding='utf-8') as f:
+            store.record(case['course_url'], 'raw', f.read())
+    store.record('https://havamath.vn/courses/trong', 'raw', '<html><body><h2>Chương 1</h2></body></html>')
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, replay_dir=store_dir, auth_check=False)
+
+    def no_browser(*args, **kwargs):
+        raise AssertionError("phân tích HTML tĩnh không được mở trình duyệt")
+
+    extractor._render_course_page = no_browser
+    yield extractor
+    extractor.close()
+
+
+@pytest.mark.parametrize('case', CHAPTER_PAGES, ids=[case['file'] for case in CHAPTER_PAGES])
+def test_static_chapters_match_corpus(extractor, case):
+    lectures = extractor._extract_chapters_static(case['course_url'])
+
+    chapters = {lecture['title']: lecture['chapter'] for lecture in lectures}
+    assert {title: chapters.get(title) for title in case['expected']} == case['expected']
+    assert all(lecture['url'].startswith('https://havamath.vn/learn/') for lecture in lectures)
+    assert extractor.chapters
+
+
+def test_page_without_lecture_links_falls_through(extractor):
+    assert extractor._extract_chapters_static('https://havamath.vn/courses/trong') == []
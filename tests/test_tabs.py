@@ -0,0 +1,82 @@
+import time
+
+BASE = 'https://havamath.vn/learn/'
+
+
+def make_driver(extractor_module, store, load_after):
+    """ReplayDriver whose tabs report document.readyState like Chrome with page load strategy 'none'"""
+
+    class TabsDriver(extractor_module.ReplayDriver):
+        def __init__(self):
+            super().__init__(store)
+            self.loaded_at = {}
+
+        def get(self, url):
+            if url.endswith('/broken'):
+                raise RuntimeError('net::ERR_CONNECTION_RESET')
+            super().get(url)
+            self.loaded_at[self.current_window_handle] = time.monotonic() + load_after.get(url, 0)
+
+        def execute_script(self, script, *args):
+            if 'readyState' in script:
+                loaded = time.monotonic() >= self.loaded_at.get(self.current_window_handle, 0)
+                return 'interactive' if loaded else 'loading'
+            return None
+
+    return TabsDriver()
+
+
+def test_tabs_wait_for_load_and_record_failures(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    iframe = '<iframe src="https://www.youtube.com/embed/{}"></iframe>'
+    store.record(BASE + 'fast', 'dom', iframe.format('6MIQlvqDnLU'))
+    store.record(BASE + 'slow', 'dom', iframe.format('dQw4w9WgXcQ'))
+    store.record(BASE + 'hang', 'dom', '<p>loading</p>')
+    driver = make_driver(extractor_module, store, {BASE + 'slow': 0.4, BASE + 'hang': 60})
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, tabs=2, wait_time=0.1, lecture_timeout=1,
+                                                   video_hook=False)
+    try:
+        extractor._init_driver = lambda worker_id=None, page_load_strategy=None: driver
+        events = []
+        extractor.events.emit = lambda event, **fields: events.append((event, fields))
+        lectures = [{"Lecture Title": name, "Lecture Link": BASE + name}
+                    for name in ('fast', 'broken', 'slow', 'hang')]
+        extractor.update_lecture_data_with_videos_tabs({"data": lectures})
+
+        status = {lecture['Lecture Link'][len(BASE):]: lecture['Extract Status'] for lecture in lectures}
+        assert status == {'fast': 'found', 'broken': 'error', 'slow': 'found', 'hang': 'timeout'}
+        assert lectures[2]['Video URL'] == 'https://youtu.be/dQw4w9WgXcQ'
+
+        finished = {fields['url']: fields for event, fields in events if event == 'lecture_finish'}
+        assert set(finished) == {BASE + 'fast', BASE + 'slow'}
+        # Thời gian chờ chỉ bắt đầu khi trang có DOM
+        assert finished[BASE + 'slow']['duration_s'] >= 0.5
+        [error] = [fields for event, fields in events if event == 'lecture_error']
+        assert error['url'] == BASE + 'broken'
+        assert [fields['url'] for event, fields in events if event == 'lecture_timeout'] == [BASE + 'hang']
+    finally:
+        extractor.close()
+
+
+def test_tabs_stop_when_cancelled(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    driver = make_driver(extractor_module, store, {BASE + 'hang': 60})
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, tabs=1, wait_time=0.1, lecture_timeout=0,
+                                                   video_hook=False)
+    try:
+        extractor._init_driver = lambda worker_id=None, page_load_strategy=None: driver
+        lectures = [{"Lecture Title": "hang", "Lecture Link": BASE + 'hang'}]
+
+        def emit(event, **fields):
+            if event == 'lecture_start':
+                extractor.cancel()
+
+        extractor.events.emit = emit
+        started = time.monotonic()
+        extractor.update_lecture_data_with_videos_tabs({"data": lectures})
+        assert time.monotonic() - started < 1
+        assert 'Extract Status' not in lectures[0]
+    finally:
+        extractor.close()
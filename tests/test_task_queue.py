@@ -0,0 +1,93 @@
+import pytest
+
+
+@pytest.fixture
+def clock(extractor_module, monkeypatch):
+    """Đồng hồ giả cho hạn thuê tác vụ"""
+    now = [1000.0]
+    monkeypatch.setattr(extractor_module.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def task_queue(extractor_module, tmp_path):
+    queue = extractor_module.SQLiteTaskQueue(str(tmp_path / 'queue.db'), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def lecture_data(*titles):
+    return {"export_id": "toan-6", "data": [{"Lecture Title": title} for title in titles]}
+
+
+def test_task_queue_is_abstract(extractor_module):
+    with pytest.raises(TypeError):
+        extractor_module.TaskQueue()
+
+
+def test_lease_hands_out_each_task_once(task_queue, clock):
+    task_queue.create_job('job', lecture_data('A', 'B'))
+
+    first = task_queue.lease('w1', 60)
+    second = task_queue.lease('w2', 60)
+
+    assert [first[2], second[2]] == [0, 1]
+    assert task_queue.lease('w3', 60) is None
+    assert task_queue.progress('job') == {'pending': 0, 'leased': 2, 'done': 0, 'failed': 0}
+
+
+def test_expired_lease_is_handed_out_again(task_queue, clock):
+    task_queue.create_job('job', lecture_data('A'))
+    task_id = task_queue.lease('w1', 60)[0]
+
+    clock[0] += 30
+    assert task_queue.lease('w2', 60) is None
+
+    clock[0] += 31
+    assert task_queue.lease('w2', 60)[0] == task_id
+    # Kết quả của worker cũ (đã mất hợp đồng thuê) bị bỏ qua
+    assert not task_queue.complete(task_id, 'w1', {"Lecture Title": "A", "Video URL": "old"})
+    assert task_queue.complete(task_id, 'w2', {"Lecture Title": "A", "Video URL": "new"})
+    assert task_queue.results('job')['data'] == [{"Lecture Title": "A", "Video URL": "new"}]
+
+
+def test_task_fails_after_max_attempts(task_queue, clock):
+    task_queue.create_job('job', lecture_data('A'))
+    task_queue.lease('w1', 10)
+    clock[0] += 11
+    task_queue.lease('w2', 10)
+    clock[0] += 11
+
+    assert task_queue.lease('w3', 10) is None
+    assert task_queue.progress('job')['failed'] == 1
+    assert not task_queue.has_open_tasks()
+
+
+def test_results_keep_original_order_and_header(task_queue, clock):
+    task_queue.create_job('job', lecture_data('A', 'B', 'C'))
+    tasks = [task_queue.lease('w', 60) for _ in range(3)]
+    for task_id, _, position, lecture in reversed(tasks):
+        task_queue.complete(task_id, 'w', dict(lecture, Position=position + 1))
+
+    results = task_queue.results('job')
+    assert results['export_id'] == 'toan-6'
+    assert [lecture['Lecture Title'] for lecture in results['data']] == ['A', 'B', 'C']
+
+
+def test_create_job_refuses_active_job(task_queue, clock):
+    task_queue.create_job('job', lecture_data('A'))
+    with pytest.raises(ValueError):
+        task_queue.create_job('job', lecture_data('B'))
+
+    task_id = task_queue.lease('w', 60)[0]
+    task_queue.complete(task_id, 'w', {"Lecture Title": "A"})
+    task_queue.create_job('job', lecture_data('B'))
+    assert task_queue.progress('job')['pending'] == 1
+
+
+def test_open_task_queue_uri(extractor_module, tmp_path):
+    queue = extractor_module.open_task_queue(f"sqlite:///{tmp_path}/queue.db")
+    assert queue.path == f"{tmp_path}/queue.db"
+    queue.close()
+    with pytest.raises(ValueError):
+        extractor_module.open_task_queue('redis://localhost/0')
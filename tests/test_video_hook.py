@@ -0,0 +1,75 @@
+import time
+
+URL = 'https://havamath.vn/learn/tap-hop'
+
+
+def make_driver(extractor_module, store, ready_after):
+    """ReplayDriver có CDP, script theo dõi ghi ID video sau ready_after giây"""
+
+    class HookedDriver(extractor_module.ReplayDriver):
+        def __init__(self):
+            super().__init__(store)
+            self.scripts = []
+            self.loaded = None
+
+        def execute_cdp_cmd(self, cmd, params):
+            self.scripts.append((cmd, params['source']))
+
+        def get(self, url):
+            super().get(url)
+            self.loaded = time.monotonic()
+
+        def execute_script(self, script, *args):
+            if '__havamathVideoId' in script and time.monotonic() - self.loaded >= ready_after:
+                return {'id': '6MIQlvqDnLU', 'method': 'iframe'}
+            return None
+
+    return HookedDriver()
+
+
+def test_hook_result_returns_before_wait_time(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    store.record(URL, 'dom', '<p>Video chưa gắn vào trang</p>')
+    driver = make_driver(extractor_module, store, ready_after=0.2)
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, wait_time=5)
+    try:
+        extractor._init_driver = lambda worker_id=None: driver
+        assert extractor._install_video_hook(driver)
+        [(cmd, source)] = driver.scripts
+        assert cmd == 'Page.addScriptToEvaluateOnNewDocument'
+        assert 'window.__havamathVideoId' in source
+
+        started = time.monotonic()
+        url = extractor.extract_youtube_url(URL)
+        assert url == 'https://youtu.be/6MIQlvqDnLU'
+        assert extractor._local.method == 'hook:iframe'
+        # Thời gian chờ chỉ là giới hạn trên
+        assert time.monotonic() - started < 2
+    finally:
+        extractor.close()
+
+
+def test_scan_dom_when_hook_finds_nothing(extractor_module, tmp_path):
+    store = extractor_module.PageStore(str(tmp_path / 'store'))
+    store.record(URL, 'dom', '<iframe src="https://www.youtube.com/embed/dQw4w9WgXcQ"></iframe>')
+    driver = make_driver(extractor_module, store, ready_after=60)
+
+    extractor = extractor_module.HavamathExtractor(verbose=False, wait_time=0.2)
+    try:
+        extractor._init_driver = lambda worker_id=None: driver
+        extractor._install_video_hook(driver)
+        assert extractor.extract_youtube_url(URL) == 'https://youtu.be/dQw4w9WgXcQ'
+        assert extractor._local.method == 'iframe'
+    finally:
+        extractor.close()
+
+
+def test_hook_disabled(extractor_module, tmp_path):
+    driver = make_driver(extractor_module, extractor_module.PageStore(str(tmp_path / 'store')), 0)
+    extractor = extractor_module.HavamathExtractor(verbose=False, video_hook=False)
+    try:
+        assert not extractor._install_video_hook(driver)
+        assert driver.scripts == []
+    finally:
+        extractor.close()
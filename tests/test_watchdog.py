@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+def test_watchdog_expires_only_overdue_workers(extractor_module):
+    expired = []
+    watchdog = extractor_module.LectureWatchdog(0.2, lambda worker_id, url: expired.append((worker_id, url)),
+                                                interval=0.05)
+    try:
+        watchdog.begin('worker_0', 'https://havamath.vn/learn/nhanh')
+        watchdog.begin('worker_1', 'https://havamath.vn/learn/treo')
+        assert watchdog.end('worker_0') is False
+        time.sleep(0.4)
+        assert expired == [('worker_1', 'https://havamath.vn/learn/treo')]
+        assert watchdog.end('worker_1') is True
+        # Sau khi end(), worker được tính giờ lại từ đầu cho bài tiếp theo
+        assert watchdog.end('worker_1') is False
+    finally:
+        watchdog.stop()
+
+
+def test_disabled_watchdog_never_starts(extractor_module):
+    watchdog = extractor_module.LectureWatchdog(0, lambda worker_id, url: None)
+    watchdog.begin('worker_0', 'https://havamath.vn/learn/tap-hop')
+    assert watchdog._thread is None
+    assert watchdog.end('worker_0') is False
+
+
+class HangingDriver:
+    """Trình duyệt treo: lệnh đang chờ chỉ kết thúc khi trình duyệt bị dừng"""
+
+    def __init__(self):
+        self.killed = threading.Event()
+
+    def quit(self):
+        self.killed.set()
+
+
+def test_hung_lecture_is_recorded_as_timeout(extractor_module):
+    extractor = extractor_module.HavamathExtractor(verbose=False, lecture_timeout=0.3)
+    extractor.watchdog.interval = 0.05
+    worker_id = threading.current_thread().name
+    driver = HangingDriver()
+    extractor.worker_drivers[worker_id] = driver
+    events = []
+    extractor.events.emit = lambda event, **fields: events.append(event)
+
+    def extract(url, worker_id=None):
+        extractor._local.method = None
+        assert driver.killed.wait(5)
+        extractor._local.error = 'invalid session id'
+        return None
+
+    extractor.extract_youtube_url = extract
+    try:
+        lecture = {"Lecture Title": "Treo", "Lecture Link": "https://havamath.vn/learn/treo"}
+        started = time.monotonic()
+        extractor.process_lecture(lecture, 0, 1)
+        assert time.monotonic() - started < 2
+        assert lecture['Extract Status'] == 'timeout' and lecture['Video URL'] == ''
+        assert 'lecture_timeout' in events and 'lecture_error' not in events
+        # Trình duyệt bị dừng được gỡ để worker tạo trình duyệt mới cho bài sau
+        assert worker_id not in extractor.worker_drivers
+    finally:
+        extractor.close()